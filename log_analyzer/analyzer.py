@@ -1,58 +1,773 @@
 import sys
-from collections import defaultdict
-from typing import List, Dict, DefaultDict, Any
+import time
+from typing import List, Any, Callable, Dict, Iterable, Iterator, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
 from pathlib import Path
-from .log_parser import parse_log_line
-from .utils import LOG_LEVELS
+from .compression import READ_ERRORS, detect_compression, iter_line_blocks, open_log_binary, open_log_text
+from .formats import AUTO_FORMAT, LineParser, compile_scanner, get_scanner, resolve_formats
+from .log_parser import (
+    REQUEST_LOGGER,
+    LogRecord,
+    classify_record,
+    extract_handler,
+    parse_timestamp,
+    scan_request_lines,
+)
+from .normalize import PathNormalizer
+from .sketch import SpaceSaving
+from .stats import (
+    REJECT_NO_LEVEL_PREFIX,
+    REJECT_NO_TIMESTAMP,
+    REJECT_OUT_OF_RANGE,
+    REJECT_REASONS,
+    REJECT_UNCLASSIFIED,
+    RunStats,
+    ScanStats,
+    measure_stage,
+)
+from .store import HandlerStore
 
 
-HandlerData = DefaultDict[str, DefaultDict[str, int]] 
+# Счетчики хэндлеров по уровням (хэндлер -> уровень -> число записей)
+HandlerData = HandlerStore
+
+# Участок файла для обработки одним рабочим процессом: (путь, начало, конец) в байтах
+FileRange = Tuple[Path, int, int]
+
+# Размер участка файла по умолчанию при внутрифайловом распараллеливании
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Если участки вместе меньше этого, пул процессов не создается: его запуск
+# дольше, чем разбор (частые короткие вызовы из cron и мониторинга)
+MIN_PARALLEL_BYTES = 16 * 1024 * 1024
+
+# Отчет со специализированным конвейером (mmap, кэш, приближенный режим)
+HANDLERS_REPORT = "handlers"
+
+# Движки разбора: 'lines' - построчное чтение текста, 'mmap' - сканирование байтов через mmap
+ENGINES: Tuple[str, ...] = ("lines", "mmap")
+DEFAULT_ENGINE = "lines"
+# Форматы, которые умеет движок 'mmap'; остальные разбираются построчно
+MMAP_FORMATS: Tuple[str, ...] = ("django",)
+
+
+class ScanOptions(NamedTuple):
+    """Настройки разбора, одинаковые для всех файлов и рабочих процессов."""
+    engine: str = DEFAULT_ENGINE
+    normalizer: Optional[PathNormalizer] = None
+    # Емкость сводки Space-Saving; None - точный подсчет в HandlerStore
+    sketch_capacity: Optional[int] = None
+    # Ключ ранжирования для сводки: 'total' или уровень логирования
+    sort_by: str = "total"
+    # Интервал отбора записей [since, until) в секундах POSIX; None - без границы
+    since: Optional[float] = None
+    until: Optional[float] = None
+    # Ширина интервала отчета 'timeline' в секундах; None - по умолчанию отчета
+    bucket: Optional[int] = None
+    # Выводить ли в stdout строки индикации ('Analyzing for ...')
+    progress: bool = True
+    # Формат строк (см. log_analyzer.formats); AUTO_FORMAT - определить по началу файла
+    log_format: str = AUTO_FORMAT
+
+    @property
+    def time_filtered(self) -> bool:
+        """Задан ли отбор записей по времени."""
+        return self.since is not None or self.until is not None
+
+    def fingerprint(self) -> str:
+        """Отпечаток настроек, влияющих на ключи результата (для кэша)."""
+        fingerprint = self.normalizer.fingerprint() if self.normalizer is not None else ""
+        if self.log_format != AUTO_FORMAT:
+            fingerprint += f"|format={self.log_format}"
+        return fingerprint
+
+
+DEFAULT_SCAN_OPTIONS = ScanOptions()
+
+def _progress(options: ScanOptions, message: str) -> None:
+    """Строка индикации, если она не отключена (--no-progress)."""
+    if options.progress:
+        print(message)
+
+def _new_handler_counts(options: ScanOptions) -> Union[HandlerData, SpaceSaving]:
+    """Создает пустой агрегат: точное хранилище или приближенную сводку."""
+    if options.sketch_capacity is not None:
+        return SpaceSaving(options.sketch_capacity, options.sort_by)
+    return HandlerStore()
 
 #  Функции для отчета 'handlers'
-def _process_file_for_handlers(file_path: Path) -> HandlerData:
+def _handler_adder(handler_counts: HandlerData, options: ScanOptions) -> Callable[[str, str], None]:
+    """
+    Возвращает функцию add(handler, level) для счетчиков.
+    Нормализация пути применяется сразу после его извлечения из строки.
+    """
+    normalizer = options.normalizer
+    if normalizer is None:
+        return handler_counts.add
+    store_add = handler_counts.add
+
+    def add(handler: str, level: str) -> None:
+        store_add(normalizer(handler), level)
+    return add
+
+def _update_handler_counts(
+    handler_counts: HandlerData,
+    lines: Iterable[str],
+    options: ScanOptions = DEFAULT_SCAN_OPTIONS,
+    stats: Optional[ScanStats] = None,
+    scan: Optional[LineParser] = None,
+) -> None:
+    """
+    Разбирает строки сканером scan (по умолчанию - для options.log_format
+    без привязки к файлу) и добавляет найденные хэндлеры в счетчики.
+    Если передан stats, строки считаются локально и добавляются в stats
+    один раз по окончании.
+    """
+    if scan is None:
+        scan = get_scanner(options.log_format)
+    add = _handler_adder(handler_counts, options)
+    if stats is None:
+        for line in lines:
+            record = scan(line)
+            if record is None:
+                continue
+            # То же, что record_handler, без вызова функции на каждую строку
+            handler = record.path
+            if handler is None:
+                if record.logger != REQUEST_LOGGER:
+                    continue
+                handler = extract_handler(record.message)
+                if handler is None:
+                    continue
+            add(handler, record.level)
+        return
+
+    seen = 0
+    rejected = dict.fromkeys(REJECT_REASONS, 0)
+    for line in lines:
+        seen += 1
+        result = classify_record(scan(line))
+        if type(result) is tuple:
+            add(result[1], result[0])
+        else:
+            rejected[result] += 1
+    stats.lines_seen += seen
+    stats.lines_matched += seen - sum(rejected.values())
+    stats.add_rejected(rejected)
+
+def _count_lines(buffer: Union[bytes, memoryview, "mmap.mmap"], start: int, end: int) -> int:
+    """Число строк в диапазоне буфера (последняя строка может быть без '\n')."""
+    block_size = 16 * 1024 * 1024
+    lines = 0
+    for block_start in range(start, end, block_size):
+        lines += buffer[block_start:min(end, block_start + block_size)].count(b"\n")
+    if end > start and buffer[end - 1:end] != b"\n":
+        lines += 1
+    return lines
+
+def _record_scan(
+    stats: Optional[ScanStats], buffer: Union[bytes, memoryview, "mmap.mmap"], start: int, end: int, matched: int
+) -> None:
+    """Учитывает участок, разобранный байтовым сканером: причины отказа не различаются."""
+    if stats is None:
+        return
+    seen = _count_lines(buffer, start, end)
+    stats.lines_seen += seen
+    stats.lines_matched += matched
+    stats.rejected[REJECT_UNCLASSIFIED] += seen - matched
+
+def _decode_raw_line(raw_line: bytes) -> List[str]:
+    """
+    Декодирует сырую строку как UTF-8 с errors='ignore'. Одиночный '\r'
+    считается концом строки, как при чтении в текстовом режиме с
+    универсальными переводами строк.
+    """
+    line = raw_line.decode('utf-8', errors='ignore')
+    if '\r' in line:
+        return line.replace('\r\n', '\n').split('\r')
+    return [line]
+
+def _scan_file_for_handlers(
+    file_path: Path, options: ScanOptions = DEFAULT_SCAN_OPTIONS, stats: Optional[ScanStats] = None
+) -> HandlerData:
+    """
+    Читает файл и собирает счетчики хэндлеров по уровням (без вывода прогресса).
+    Сжатые файлы (.gz, .bz2, .xz, .zst) распаковываются потоково.
+    """
+    handler_counts = _new_handler_counts(options)
+    started = time.perf_counter()
+    try:
+        scan = get_scanner(options.log_format, file_path)
+        with open_log_text(file_path) as f:
+            _update_handler_counts(handler_counts, f, options, stats, scan)
+        if stats is not None:
+            stats.bytes_read += file_path.stat().st_size
+    except READ_ERRORS as e:
+        print(f"Warning: Could not read file {file_path}: {e}", file=sys.stderr)
+    if stats is not None:
+        stats.seconds += time.perf_counter() - started
+    return handler_counts
+
+def _process_file_for_handlers(
+    file_path: Path, options: ScanOptions = DEFAULT_SCAN_OPTIONS, stats: Optional[ScanStats] = None
+) -> HandlerData:
     """
     Обрабатывает один файл, собирая данные для отчета 'handlers'.
     (Внутренняя функция, специфичная для 'handlers')
     """
-    handler_counts: HandlerData = defaultdict(lambda: defaultdict(int))
-    print(f"Analyzing for 'handlers': {file_path}...") # Индикация
+    _progress(options, f"Analyzing for 'handlers': {file_path}...") # Индикация
+    if options.engine == "mmap":
+        try:
+            size = file_path.stat().st_size
+        except OSError as e:
+            print(f"Warning: Could not read file {file_path}: {e}", file=sys.stderr)
+            return _new_handler_counts(options)
+        return _scan_range_for_handlers((file_path, 0, size), options, stats)
+    return _scan_file_for_handlers(file_path, options, stats)
+
+def _split_file_ranges(
+    file_path: Path, chunk_size: int, start: int = 0, end: Optional[int] = None
+) -> List[Tuple[int, int]]:
+    """
+    Делит диапазон файла [start, end) на участки размером около chunk_size.
+    Каждая граница сдвигается на начало следующей строки, поэтому
+    строка никогда не разрезается между двумя участками.
+    start должен быть началом строки; по умолчанию делится весь файл.
+    Сжатые файлы не делятся: архив разбирается одним заданием целиком.
+    """
+    size = file_path.stat().st_size if end is None else end
+    if size - start <= chunk_size or detect_compression(file_path) is not None:
+        return [(start, size)]
+
+    boundaries = [start]
+    with file_path.open('rb') as f:
+        target = start + chunk_size
+        while target < size:
+            # Начинаем с предыдущего байта: если он '\n', граница уже на начале строки
+            f.seek(target - 1)
+            f.readline()
+            boundary = f.tell()
+            if boundary >= size:
+                break
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+            target = max(boundary, target) + chunk_size
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+def _last_line_end(file_path: Path, start: int, end: int) -> int:
+    """
+    Возвращает позицию сразу после последнего '\n' в диапазоне [start, end)
+    или start, если в диапазоне нет ни одной завершенной строки.
+    """
+    block_size = 64 * 1024
+    with file_path.open('rb') as f:
+        position = end
+        while position > start:
+            block_start = max(start, position - block_size)
+            f.seek(block_start)
+            block = f.read(position - block_start)
+            newline = block.rfind(b"\n")
+            if newline >= 0:
+                return block_start + newline + 1
+            position = block_start
+    return start
+
+def _iter_range_lines(file_path: Path, start: int, end: int) -> Iterator[str]:
+    """Читает и декодирует строки из диапазона байт [start, end) (см. _decode_raw_line)."""
+    with file_path.open('rb') as f:
+        f.seek(start)
+        position = start
+        while position < end:
+            raw_line = f.readline()
+            if not raw_line:
+                break
+            position += len(raw_line)
+            yield from _decode_raw_line(raw_line)
+
+def _scan_range_mmap(
+    file_path: Path,
+    start: int,
+    end: int,
+    handler_counts: HandlerData,
+    options: ScanOptions,
+    stats: Optional[ScanStats] = None,
+) -> None:
+    """Движок 'mmap': сканирует диапазон файла по сырым байтам без построчного декодирования."""
+    import mmap
+
+    if end <= start:
+        return
+    with file_path.open('rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            add = _handler_adder(handler_counts, options)
+            end = min(end, len(mapped))
+            matched = 0
+            for level, handler in scan_request_lines(mapped, start, end):
+                add(handler, level)
+                matched += 1
+            _record_scan(stats, mapped, start, end, matched)
+
+def _scan_compressed_stream(
+    file_path: Path,
+    compression: str,
+    handler_counts: HandlerData,
+    options: ScanOptions,
+    stats: Optional[ScanStats] = None,
+    formats: Tuple[str, ...] = MMAP_FORMATS,
+) -> None:
+    """
+    Потоково распаковывает архив и передает данные парсеру без записи на диск.
+    Движок 'mmap' получает распакованные данные большими блоками байт.
+    """
+    if options.engine == "mmap" and formats == MMAP_FORMATS:
+        with open_log_binary(file_path, compression) as stream:
+            add = _handler_adder(handler_counts, options)
+            for block in iter_line_blocks(stream):
+                matched = 0
+                for level, handler in scan_request_lines(block):
+                    add(handler, level)
+                    matched += 1
+                _record_scan(stats, block, 0, len(block), matched)
+    else:
+        with open_log_text(file_path) as f:
+            _update_handler_counts(handler_counts, f, options, stats, compile_scanner(formats))
+
+def _scan_range_for_handlers(
+    file_range: FileRange, options: ScanOptions = DEFAULT_SCAN_OPTIONS, stats: Optional[ScanStats] = None
+) -> HandlerData:
+    """
+    Собирает счетчики хэндлеров по уровням для одного диапазона файла.
+    Для сжатого файла диапазон игнорируется и архив разбирается целиком.
+    Движок 'mmap' применяется только к форматам MMAP_FORMATS.
+    """
+    file_path, start, end = file_range
+    handler_counts = _new_handler_counts(options)
+    started = time.perf_counter()
     try:
-        with file_path.open('r', encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                parsed_data = parse_log_line(line)
-                if parsed_data and "handler" in parsed_data and "level" in parsed_data:
-                    handler = parsed_data["handler"]
-                    level = parsed_data["level"]
-                    handler_counts[handler][level] += 1
-    except IOError as e:
+        formats = resolve_formats(options.log_format, file_path)
+        compression = detect_compression(file_path)
+        if compression is not None:
+            _scan_compressed_stream(file_path, compression, handler_counts, options, stats, formats)
+            if stats is not None:
+                stats.bytes_read += file_path.stat().st_size
+        else:
+            if options.engine == "mmap" and formats == MMAP_FORMATS:
+                _scan_range_mmap(file_path, start, end, handler_counts, options, stats)
+            else:
+                lines = _iter_range_lines(file_path, start, end)
+                _update_handler_counts(handler_counts, lines, options, stats, compile_scanner(formats))
+            if stats is not None:
+                stats.bytes_read += end - start
+    except READ_ERRORS + (ValueError,) as e:
         print(f"Warning: Could not read file {file_path}: {e}", file=sys.stderr)
+    if stats is not None:
+        stats.seconds += time.perf_counter() - started
     return handler_counts
 
-def _merge_handler_results(results_list: List[HandlerData]) -> HandlerData:
+def _process_range(file_range: FileRange, options: ScanOptions = DEFAULT_SCAN_OPTIONS) -> HandlerData:
+    """
+    Точка входа рабочего процесса: обрабатывает диапазон файла.
+    HandlerStore сериализуется pickle и возвращается в родительский процесс как есть.
+    """
+    return _scan_range_for_handlers(file_range, options)
+
+def _process_range_with_stats(
+    file_range: FileRange, options: ScanOptions = DEFAULT_SCAN_OPTIONS
+) -> Tuple[HandlerData, ScanStats]:
+    """Как _process_range, но дополнительно возвращает счетчики разбора участка."""
+    stats = ScanStats()
+    return _scan_range_for_handlers(file_range, options, stats), stats
+
+def _plan_file_ranges(
+    log_files: List[Path], chunk_size: int, options: ScanOptions = DEFAULT_SCAN_OPTIONS
+) -> List[FileRange]:
+    """
+    Формирует список заданий: большие файлы делятся на участки, малые идут целиком.
+    При отборе по времени из несжатого файла берется только участок,
+    найденный по разреженному индексу времени (см. log_analyzer.timeindex).
+    """
+    ranges: List[FileRange] = []
+    for file_path in log_files:
+        try:
+            start, end = 0, None
+            if options.time_filtered and detect_compression(file_path) is None:
+                from .timeindex import time_range_offsets
+
+                scan = get_scanner(options.log_format, file_path)
+                start, end = time_range_offsets(file_path, options.since, options.until, scan=scan)
+            file_ranges = _split_file_ranges(file_path, chunk_size, start, end)
+        except OSError as e:
+            print(f"Warning: Could not read file {file_path}: {e}", file=sys.stderr)
+            continue
+        ranges.extend((file_path, start, end) for start, end in file_ranges)
+    return ranges
+
+def _merge_handler_results(
+    results_list: List[Union[HandlerData, SpaceSaving, Mapping[str, Mapping[str, int]]]],
+    options: ScanOptions = DEFAULT_SCAN_OPTIONS,
+) -> Union[HandlerData, SpaceSaving]:
     """
     Объединяет результаты обработки нескольких файлов для отчета 'handlers'.
+    Принимает HandlerStore или вложенные словари хэндлер -> уровень -> счетчик;
+    в приближенном режиме - сводки SpaceSaving.
     (Внутренняя функция, специфичная для 'handlers')
     """
-    merged: HandlerData = defaultdict(lambda: defaultdict(int))
-    for result_dict in results_list:
-        for handler, level_counts in result_dict.items():
-            for level, count in level_counts.items():
-                merged[handler][level] += count
+    merged = _new_handler_counts(options)
+    if isinstance(merged, SpaceSaving):
+        for result in results_list:
+            merged.merge(result)
+        return merged
+    for result in results_list:
+        merged.merge(HandlerStore.from_mapping(result))
     return merged
 
-def analyze_logs(log_files: List[Path], report_type: str) -> Any:
+def _map_ranges(process: Callable[[FileRange], Any], file_ranges: List[FileRange], workers: int) -> List[Any]:
+    """
+    Применяет process к участкам файлов: в пуле процессов, если workers > 1
+    и участков достаточно для окупания пула (MIN_PARALLEL_BYTES), иначе
+    последовательно в текущем процессе. Порядок результатов
+    совпадает с порядком участков. process должен сериализоваться pickle.
+    """
+    if workers <= 1 or len(file_ranges) <= 1 or sum(end - start for _, start, end in file_ranges) < MIN_PARALLEL_BYTES:
+        return [process(file_range) for file_range in file_ranges]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(file_ranges))) as pool:
+        return list(pool.map(process, file_ranges))
+
+def _run_range_tasks(
+    file_ranges: List[FileRange], workers: int, options: ScanOptions, stats: Optional[RunStats] = None
+) -> List[HandlerData]:
+    """
+    Обрабатывает участки файлов для отчета 'handlers' (см. _map_ranges).
+    Если передан stats, в него добавляются счетчики каждого участка.
+    """
+    from functools import partial
+
+    process = _process_range if stats is None else _process_range_with_stats
+    results = _map_ranges(partial(process, options=options), file_ranges, workers)
+
+    if stats is None:
+        return results
+    for (file_path, _, _), (_, range_stats) in zip(file_ranges, results):
+        stats.add_file(file_path, range_stats)
+    return [handler_counts for handler_counts, _ in results]
+
+def _analyze_handlers_parallel(
+    log_files: List[Path], workers: int, chunk_size: int, options: ScanOptions, stats: Optional[RunStats] = None
+) -> HandlerData:
+    """
+    Раздает пулу процессов файлы и участки больших файлов,
+    затем объединяет их результаты.
+    """
+    for file_path in log_files:
+        _progress(options, f"Analyzing for 'handlers': {file_path}...") # Индикация
+    with measure_stage(stats, "scan"):
+        file_ranges = _plan_file_ranges(log_files, chunk_size, options)
+        results = _run_range_tasks(file_ranges, workers, options, stats)
+    with measure_stage(stats, "merge"):
+        return _merge_handler_results(results, options)
+
+def _analyze_handlers_cached(
+    log_files: List[Path],
+    workers: int,
+    chunk_size: int,
+    options: ScanOptions,
+    cache_path: Path,
+    stats: Optional[RunStats] = None,
+) -> HandlerData:
+    """
+    Инкрементальный анализ с персистентным кэшем: для каждого файла
+    разбирается только хвост, дописанный после предыдущего запуска.
+
+    В кэш попадают только завершенные строки; незавершенная последняя
+    строка учитывается в текущем результате, но разбирается заново в
+    следующий раз, когда будет дописана.
     """
-    Анализирует логи для указанного типа отчета.
-    В будущем может вызывать разные функции обработки в зависимости от report_type.
+    from .cache import AnalysisCache, file_identity
+
+    file_ranges: List[FileRange] = []
+    # Для каждого участка: индекс файла и признак того, что участок попадет в кэш
+    range_owners: List[Tuple[int, bool]] = []
+    states = []
+    with AnalysisCache(cache_path) as cache:
+        with measure_stage(stats, "cache_load"):
+            for index, file_path in enumerate(log_files):
+                _progress(options, f"Analyzing for 'handlers': {file_path}...") # Индикация
+                try:
+                    identity = file_identity(file_path)
+                    offset, cached_data = cache.load(file_path, identity, options.fingerprint())
+                    if detect_compression(file_path) is not None:
+                        # Архив неизменяем: либо используется целиком из кэша, либо разбирается заново
+                        if offset != identity.size:
+                            offset, cached_data = 0, HandlerStore()
+                        committed_end = identity.size
+                    else:
+                        committed_end = _last_line_end(file_path, offset, identity.size)
+                    pending = _split_file_ranges(file_path, chunk_size, offset, committed_end)
+                except OSError as e:
+                    print(f"Warning: Could not read file {file_path}: {e}", file=sys.stderr)
+                    states.append(None)
+                    continue
+                states.append((identity, committed_end, cached_data))
+                for start, end in pending:
+                    if end > start:
+                        file_ranges.append((file_path, start, end))
+                        range_owners.append((index, True))
+                if identity.size > committed_end:
+                    file_ranges.append((file_path, committed_end, identity.size))
+                    range_owners.append((index, False))
+
+        with measure_stage(stats, "scan"):
+            results = _run_range_tasks(file_ranges, workers, options, stats)
+
+        with measure_stage(stats, "merge"):
+            committed = {index: state[2] for index, state in enumerate(states) if state is not None}
+            uncommitted: List[HandlerData] = []
+            for (index, is_committed), result in zip(range_owners, results):
+                if is_committed:
+                    committed[index].merge(result)
+                else:
+                    uncommitted.append(result)
+        with measure_stage(stats, "cache_save"):
+            for index, data in committed.items():
+                identity, committed_end, _ = states[index]
+                cache.save(log_files[index], identity, committed_end, data, options.fingerprint())
+
+    with measure_stage(stats, "merge"):
+        return _merge_handler_results(list(committed.values()) + uncommitted, options)
+
+#  Общий однопроходный конвейер для любых отчетов из реестра
+def _update_aggregators(
+    updates: Sequence[Callable[[LogRecord], None]],
+    lines: Iterable[str],
+    stats: Optional[ScanStats] = None,
+    options: ScanOptions = DEFAULT_SCAN_OPTIONS,
+    scan: Optional[LineParser] = None,
+) -> None:
+    """
+    Разбирает каждую строку один раз сканером scan (по умолчанию - для
+    options.log_format без привязки к файлу) и передает запись всем
+    агрегаторам. При отборе по времени записи без метки или вне
+    [since, until) пропускаются.
+    """
+    if scan is None:
+        scan = get_scanner(options.log_format)
+    seen = 0
+    parsed = 0
+    no_timestamp = 0
+    out_of_range = 0
+    time_filtered = options.time_filtered
+    since = options.since if options.since is not None else float("-inf")
+    until = options.until if options.until is not None else float("inf")
+    for line in lines:
+        seen += 1
+        record = scan(line)
+        if record is None:
+            continue
+        parsed += 1
+        if time_filtered:
+            moment = parse_timestamp(record.timestamp) if record.timestamp is not None else None
+            if moment is None:
+                no_timestamp += 1
+                continue
+            if not since <= moment < until:
+                out_of_range += 1
+                continue
+        for update in updates:
+            update(record)
+    if stats is not None:
+        stats.lines_seen += seen
+        stats.lines_matched += parsed - no_timestamp - out_of_range
+        stats.rejected[REJECT_NO_LEVEL_PREFIX] += seen - parsed
+        stats.rejected[REJECT_NO_TIMESTAMP] += no_timestamp
+        stats.rejected[REJECT_OUT_OF_RANGE] += out_of_range
+
+def _process_report_range(
+    file_range: FileRange, reports: Sequence[Any], options: ScanOptions, collect_stats: bool = False
+) -> Tuple[List[Any], Optional[ScanStats]]:
+    """
+    Точка входа рабочего процесса для общего конвейера: возвращает
+    агрегаторы всех отчетов для участка файла и, по запросу, его счетчики.
+    Сжатый файл разбирается целиком, движок 'mmap' здесь не применяется.
+    """
+    file_path, start, end = file_range
+    aggregators = [report.create_aggregator(options) for report in reports]
+    updates = [aggregator.update for aggregator in aggregators]
+    stats = ScanStats() if collect_stats else None
+    started = time.perf_counter()
+    try:
+        scan = get_scanner(options.log_format, file_path)
+        if detect_compression(file_path) is not None:
+            with open_log_text(file_path) as f:
+                _update_aggregators(updates, f, stats, options, scan)
+            range_bytes = file_path.stat().st_size
+        else:
+            _update_aggregators(updates, _iter_range_lines(file_path, start, end), stats, options, scan)
+            range_bytes = end - start
+        if stats is not None:
+            stats.bytes_read += range_bytes
+    except READ_ERRORS + (ValueError,) as e:
+        print(f"Warning: Could not read file {file_path}: {e}", file=sys.stderr)
+    if stats is not None:
+        stats.seconds += time.perf_counter() - started
+    return aggregators, stats
+
+def _analyze_reports(
+    log_files: List[Path],
+    reports: Sequence[Any],
+    workers: int,
+    chunk_size: int,
+    options: ScanOptions,
+    stats: Optional[RunStats] = None,
+    store_dirs: Sequence[Path] = (),
+) -> Dict[str, Any]:
+    """
+    Считает несколько отчетов за один проход: каждая строка разбирается
+    один раз, запись получают агрегаторы всех отчетов. Участки файлов
+    распределяются по процессам так же, как для 'handlers'. Данные
+    колоночных хранилищ из store_dirs добавляются без разбора текста.
+    """
+    from functools import partial
+
+    names = ", ".join(report.name for report in reports)
+    for file_path in log_files:
+        _progress(options, f"Analyzing for '{names}': {file_path}...") # Индикация
+    with measure_stage(stats, "scan"):
+        file_ranges = _plan_file_ranges(log_files, chunk_size, options)
+        process = partial(_process_report_range, reports=reports, options=options, collect_stats=stats is not None)
+        results = _map_ranges(process, file_ranges, workers)
+    with measure_stage(stats, "merge"):
+        merged = [report.create_aggregator(options) for report in reports]
+        for (file_path, _, _), (aggregators, range_stats) in zip(file_ranges, results):
+            if stats is not None:
+                stats.add_file(file_path, range_stats)
+            for target, aggregator in zip(merged, aggregators):
+                target.merge(aggregator)
+    if store_dirs:
+        from .columnar import ColumnarStore
+
+        with measure_stage(stats, "columnar"):
+            for store_dir in store_dirs:
+                _progress(options, f"Reading columnar store for '{names}': {store_dir}...") # Индикация
+                store = ColumnarStore(store_dir)
+                for report, target in zip(reports, merged):
+                    try:
+                        target.merge(report.aggregator.from_columnar(store, options))
+                    except NotImplementedError:
+                        raise ValueError(f"Report '{report.name}' cannot be computed from a columnar store") from None
+    return {report.name: aggregator.finalize() for report, aggregator in zip(reports, merged)}
+
+def analyze_logs(
+    log_files: List[Path],
+    report_type: Union[str, Sequence[str]],
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    engine: str = DEFAULT_ENGINE,
+    cache_path: Optional[Path] = None,
+    normalizer: Optional[PathNormalizer] = None,
+    sketch_capacity: Optional[int] = None,
+    sort_by: str = "total",
+    stats: Optional[RunStats] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    bucket: Optional[int] = None,
+    progress: bool = True,
+    log_format: str = AUTO_FORMAT,
+) -> Any:
     """
+    Анализирует логи для указанного отчета или нескольких отчетов.
+
+    Отчет 'handlers' сам по себе считается специализированным конвейером
+    (движок 'mmap', кэш, приближенный режим). Любой другой набор отчетов
+    из реестра, а также любой отчет с отбором по времени считается за один
+    проход: каждая строка разбирается один раз, и запись получают
+    агрегаторы всех отчетов.
+
+    Args:
+        log_files: Пути к файлам логов; каталоги, созданные командой ingest,
+            читаются как колоночные хранилища.
+        report_type: Имя отчета или список имен. Для одного имени возвращаются
+            данные этого отчета, для списка - словарь имя -> данные.
+        workers: Число рабочих процессов; при 1 файлы обрабатываются последовательно.
+        chunk_size: Примерный размер участка (в байтах), на которые делятся
+            большие файлы в параллельном режиме.
+        engine: Движок разбора из ENGINES.
+        cache_path: Путь к SQLite-кэшу инкрементального анализа; если задан,
+            из каждого файла разбирается только новый хвост.
+        normalizer: Нормализатор путей (шаблоны маршрутов, маскирование ID);
+            применяется к каждому извлеченному пути.
+        sketch_capacity: Если задан, хэндлеры считаются приближенно сводкой
+            Space-Saving с таким числом счетчиков (память не зависит от числа
+            различных хэндлеров). Несовместим с cache_path.
+        sort_by: Ключ ранжирования для приближенного режима: 'total' или уровень.
+        stats: Если задан, в него записываются время этапов и счетчики строк
+            по файлам (см. log_analyzer.stats).
+        since, until: Границы интервала [since, until) в секундах POSIX (см.
+            parse_timestamp). Учитываются только записи с меткой времени из
+            интервала; несжатые файлы читаются только в участке, найденном
+            по разреженному индексу времени.
+        bucket: Ширина интервала отчета 'timeline' в секундах.
+        progress: Выводить ли строки индикации по файлам в stdout.
+        log_format: Формат строк из log_analyzer.formats или AUTO_FORMAT -
+            форматы каждого файла определяются по его началу.
+    """
+    from .columnar import is_columnar_store
+
     results = []
-    if report_type == 'handlers':
-        for file_path in log_files:
-            results.append(_process_file_for_handlers(file_path))
-        print("Analysis complete.")
-        return _merge_handler_results(results)
+    options = ScanOptions(
+        engine=engine,
+        normalizer=normalizer,
+        sketch_capacity=sketch_capacity,
+        sort_by=sort_by,
+        since=since,
+        until=until,
+        bucket=bucket,
+        progress=progress,
+        log_format=log_format,
+    )
+    store_dirs = [path for path in log_files if is_columnar_store(path)]
+    if store_dirs:
+        log_files = [path for path in log_files if path not in store_dirs]
+    if report_type == HANDLERS_REPORT and not store_dirs and not options.time_filtered:
+        if cache_path is not None and sketch_capacity is not None:
+            raise ValueError("Incremental cache cannot be combined with approximate counting")
+        if cache_path is not None:
+            merged = _analyze_handlers_cached(log_files, workers, chunk_size, options, cache_path, stats)
+            _progress(options, "Analysis complete.")
+            return merged
+        if workers > 1 and log_files:
+            merged = _analyze_handlers_parallel(log_files, workers, chunk_size, options, stats)
+            _progress(options, "Analysis complete.")
+            return merged
+        with measure_stage(stats, "scan"):
+            for file_path in log_files:
+                file_stats = ScanStats() if stats is not None else None
+                results.append(_process_file_for_handlers(file_path, options, file_stats))
+                if stats is not None:
+                    stats.add_file(file_path, file_stats)
+        _progress(options, "Analysis complete.")
+        with measure_stage(stats, "merge"):
+            return _merge_handler_results(results, options)
 
-    else:
-        # Если тип отчета неизвестен на этапе анализа (хотя он проверяется в main)
-        print(f"Warning: Analysis logic for report type '{report_type}' is not implemented.", file=sys.stderr)
-        return None # Или пустая структура данных
\ No newline at end of file
+    from .reporting import get_report_generator
+
+    report_names = [report_type] if isinstance(report_type, str) else list(dict.fromkeys(report_type))
+    reports = []
+    for name in report_names:
+        report = get_report_generator(name)
+        if report is None:
+            # Если тип отчета неизвестен на этапе анализа (хотя он проверяется в main)
+            print(f"Warning: Analysis logic for report type '{name}' is not implemented.", file=sys.stderr)
+            return None # Или пустая структура данных
+        reports.append(report)
+    if cache_path is not None:
+        raise ValueError(
+            f"Incremental cache is supported only for the '{HANDLERS_REPORT}' report on log files without time filters"
+        )
+    merged_reports = _analyze_reports(log_files, reports, workers, chunk_size, options, stats, store_dirs)
+    _progress(options, "Analysis complete.")
+    if isinstance(report_type, str):
+        return merged_reports[report_type]
+    return merged_reports
\ No newline at end of file
@@ -0,0 +1,659 @@
+"""
+Бенчмарки анализатора логов.
+
+Запуск:
+    python -m log_analyzer.bench throughput --size-mb 100 --output results.json
+    python -m log_analyzer.bench compare baseline.json results.json
+    python -m log_analyzer.bench columnar --size-mb 100
+    python -m log_analyzer.bench timerange --size-mb 200 --window 0.05
+    python -m log_analyzer.bench compression --lines 1000000
+    python -m log_analyzer.bench memory --handlers 200000
+    python -m log_analyzer.bench startup --runs 20
+    python -m log_analyzer.bench formats --lines 200000
+"""
+import argparse
+import contextlib
+import gzip
+import io
+import itertools
+import json
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+from .analyzer import (
+    _merge_handler_results,
+    _process_file_for_handlers,
+    _scan_range_for_handlers,
+    _split_file_ranges,
+    analyze_logs,
+)
+from .formats import AUTO_FORMAT, LOG_FORMATS, compile_scanner, detect_formats
+from .log_parser import parse_log_line, parse_log_record
+from .reporting import HandlersReport
+from .stats import RunStats, peak_rss_bytes
+from .store import HandlerStore
+from .utils import LOG_LEVELS
+
+# Версия формата JSON с результатами (меняется при несовместимых изменениях полей)
+RESULTS_FORMAT_VERSION = 1
+
+
+class LogProfile(NamedTuple):
+    """Параметры синтетического лога."""
+    # Доля строк логгера django.request
+    request_ratio: float = 0.4
+    # Число различных путей (кардинальность хэндлеров)
+    handlers: int = 200
+    # Веса уровней в порядке LOG_LEVELS
+    level_weights: Sequence[float] = (1, 1, 1, 1, 1)
+    # Доля строк, не подходящих под формат лога
+    malformed_ratio: float = 0.0
+    # Шаг меток времени между строками в секундах; 0 - строки без меток
+    line_interval: float = 0.0
+
+
+# Время первой строки лога с метками (UTC)
+SYNTHETIC_START_TIME = 1_700_000_000
+
+
+DEFAULT_PROFILE = LogProfile()
+
+_METHODS = ["GET", "POST", "PUT", "DELETE"]
+_MALFORMED_LINES = [
+    "Traceback (most recent call last):\n",
+    "  File \"/app/views.py\", line 42, in get\n",
+    "INFO django.request GET /missing/colons/ 200\n",
+    "\n",
+]
+
+
+def iter_log_lines(seed: int = 0, profile: LogProfile = DEFAULT_PROFILE) -> Iterator[str]:
+    """Бесконечный детерминированный поток строк в формате Django-логов."""
+    rng = random.Random(seed)
+    paths = [f"/api/v1/items/{i}/" for i in range(1, profile.handlers + 1)]
+    for i in itertools.count():
+        if profile.malformed_ratio and rng.random() < profile.malformed_ratio:
+            yield rng.choice(_MALFORMED_LINES)
+            continue
+        prefix = ""
+        if profile.line_interval:
+            # asctime стандартного logging.Formatter: '2023-11-14 22:13:20,000 '
+            moment = SYNTHETIC_START_TIME + i * profile.line_interval
+            millis = int(moment * 1000) % 1000
+            prefix = f"{time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(moment))},{millis:03d} "
+        level = rng.choices(LOG_LEVELS, weights=profile.level_weights)[0]
+        if rng.random() < profile.request_ratio:
+            path = rng.choice(paths)
+            yield f"{prefix}{level}:django.request:{rng.choice(_METHODS)} {path} 200 {rng.randint(1, 900)}ms\n"
+        else:
+            yield f"{prefix}{level}:django.db.backends:(0.001) SELECT * FROM items WHERE id = {i}; args=()\n"
+
+
+# Код ответа журналов доступа для уровня синтетической записи
+_STATUS_BY_LEVEL = {"DEBUG": 200, "INFO": 200, "WARNING": 404, "ERROR": 500, "CRITICAL": 503}
+
+
+def iter_format_lines(log_format: str, seed: int = 0, profile: LogProfile = DEFAULT_PROFILE) -> Iterator[str]:
+    """
+    Бесконечный детерминированный поток строк формата log_format (см.
+    log_analyzer.formats) с метками времени: 'django' - как iter_log_lines,
+    журналы доступа - только запросы, 'json' - записи structlog.
+    """
+    interval = profile.line_interval or 0.01
+    if log_format == "django":
+        yield from iter_log_lines(seed, profile._replace(line_interval=interval))
+        return
+    rng = random.Random(seed)
+    paths = [f"/api/v1/items/{i}/" for i in range(1, profile.handlers + 1)]
+    for i in itertools.count():
+        moment = SYNTHETIC_START_TIME + i * interval
+        level = rng.choices(LOG_LEVELS, weights=profile.level_weights)[0]
+        request = f"{rng.choice(_METHODS)} {rng.choice(paths)}?page={rng.randint(1, 9)}"
+        millis = rng.randint(1, 900)
+        if log_format == "json":
+            is_request = rng.random() < profile.request_ratio
+            yield json.dumps({
+                "event": "request_finished" if is_request else f"query took {millis}ms",
+                "level": level.lower(),
+                "logger": "django_structlog.middlewares.request" if is_request else "django.db.backends",
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(moment)),
+                "request": request if is_request else None,
+                "code": _STATUS_BY_LEVEL[level],
+            }) + "\n"
+            continue
+        access = (
+            f'10.0.{i % 256}.{i % 199 + 1} - - [{time.strftime("%d/%b/%Y:%H:%M:%S +0000", time.gmtime(moment))}] '
+            f'"{request} HTTP/1.1" {_STATUS_BY_LEVEL[level]} {rng.randint(100, 9999)} "-" "python-requests/2.31"'
+        )
+        if log_format == "nginx":
+            access += f' rt={millis / 1000:.3f} uct="0.000" uht="{millis / 1000:.3f}" urt="{millis / 1000:.3f}"'
+        yield access + "\n"
+
+
+def generate_log_lines(count: int, seed: int = 0, profile: LogProfile = DEFAULT_PROFILE) -> List[str]:
+    """Детерминированно генерирует count строк в формате Django-логов."""
+    return list(itertools.islice(iter_log_lines(seed, profile), count))
+
+
+def write_synthetic_log(
+    path: Path,
+    count: Optional[int] = None,
+    seed: int = 0,
+    profile: LogProfile = DEFAULT_PROFILE,
+    size_bytes: Optional[int] = None,
+) -> Path:
+    """
+    Записывает синтетический лог на диск: count строк или, если задан
+    size_bytes, строки до достижения этого размера.
+    """
+    if count is None and size_bytes is None:
+        raise ValueError("Either count or size_bytes must be given")
+    written = 0
+    with path.open('w', encoding='utf-8') as f:
+        for line in itertools.islice(iter_log_lines(seed, profile), count):
+            f.write(line)
+            written += len(line.encode('utf-8'))
+            if size_bytes is not None and written >= size_bytes:
+                break
+    return path
+
+
+def _best_time(run: Callable[[], object], repeat: int) -> float:
+    """Минимальное время из repeat запусков (в секундах); вывод подавляется."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _stage_result(seconds: float, lines: int, size: int) -> Dict[str, float]:
+    return {
+        "seconds": round(seconds, 6),
+        "lines_per_s": round(lines / seconds) if seconds else 0,
+        "mb_per_s": round(size / (1024 * 1024) / seconds, 2) if seconds else 0.0,
+    }
+
+
+def _environment() -> Dict[str, str]:
+    """Сведения об окружении, чтобы результаты разных версий можно было сопоставить."""
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+        package_version = version("log_analyzer")
+    except (ImportError, PackageNotFoundError):
+        package_version = "unknown"
+    return {
+        "package_version": package_version,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+    }
+
+
+def bench_throughput(log_path: Path, chunk_size: int = 8 * 1024 * 1024, repeat: int = 3) -> Dict[str, object]:
+    """
+    Измеряет пропускную способность по этапам на готовом логе:
+    parse_log_line, _process_file_for_handlers, _merge_handler_results
+    (участки файла размером chunk_size) и HandlersReport.generate.
+    Для каждого этапа берется лучшее время из repeat запусков.
+    """
+    size = log_path.stat().st_size
+    with log_path.open('r', encoding='utf-8', errors='ignore') as f:
+        lines = f.readlines()
+    matched = sum(1 for line in lines if parse_log_line(line))
+
+    def parse_all():
+        for line in lines:
+            parse_log_line(line)
+
+    parts = [
+        _scan_range_for_handlers((log_path, start, end))
+        for start, end in _split_file_ranges(log_path, chunk_size)
+    ]
+    merged = _merge_handler_results(parts)
+    report = HandlersReport()
+
+    stages = {
+        "parse_log_line": _stage_result(_best_time(parse_all, repeat), len(lines), size),
+        "process_file_for_handlers": _stage_result(
+            _best_time(lambda: _process_file_for_handlers(log_path), repeat), len(lines), size
+        ),
+        "merge_handler_results": {
+            "seconds": round(_best_time(lambda: _merge_handler_results(parts), repeat), 6),
+            "parts": len(parts),
+        },
+        "handlers_report_generate": {
+            "seconds": round(_best_time(lambda: report.generate(merged), repeat), 6),
+            "handlers": len(merged),
+        },
+    }
+    return {
+        "input": {"lines": len(lines), "bytes": size, "matched_lines": matched, "handlers": len(merged)},
+        "stages": stages,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def compare_results(
+    baseline: Dict[str, object], current: Dict[str, object], threshold: float = 0.1
+) -> Dict[str, object]:
+    """
+    Сравнивает время этапов двух запусков throughput. Этап считается
+    регрессией, если стал медленнее более чем на threshold (доля).
+    """
+    stages = {}
+    regressions = []
+    for name, stage in current["stages"].items():
+        old = baseline.get("stages", {}).get(name)
+        if not old or not old.get("seconds"):
+            continue
+        ratio = stage["seconds"] / old["seconds"]
+        stages[name] = {
+            "baseline_s": old["seconds"],
+            "current_s": stage["seconds"],
+            "ratio": round(ratio, 3),
+        }
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return {"stages": stages, "regressions": regressions, "threshold": threshold}
+
+
+def _timed_analysis(log_files: List[Path], engine: str) -> float:
+    """Время analyze_logs в секундах; вывод прогресса подавляется."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyze_logs(log_files, "handlers", engine=engine)
+    return time.perf_counter() - start
+
+
+def bench_compression(lines: int, engine: str, workdir: Path) -> Dict[str, float]:
+    """
+    Сравнивает два способа анализа gzip-архива:
+    распаковка на диск с последующим разбором и потоковый разбор архива.
+    """
+    plain_path = write_synthetic_log(workdir / "django.log", lines)
+    archive_path = workdir / "django.log.1.gz"
+    with plain_path.open('rb') as src, gzip.open(archive_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    plain_path.unlink()
+
+    start = time.perf_counter()
+    unpacked_path = workdir / "django.log.1"
+    with gzip.open(archive_path, 'rb') as src, unpacked_path.open('wb') as dst:
+        shutil.copyfileobj(src, dst)
+    decompress_seconds = time.perf_counter() - start
+    parse_seconds = _timed_analysis([unpacked_path], engine)
+    unpacked_path.unlink()
+
+    streaming_seconds = _timed_analysis([archive_path], engine)
+    return {
+        "lines": lines,
+        "archive_bytes": archive_path.stat().st_size,
+        "decompress_to_disk_then_parse_s": round(decompress_seconds + parse_seconds, 4),
+        "streaming_parse_s": round(streaming_seconds, 4),
+    }
+
+
+def bench_columnar(size_bytes: int, workdir: Path, repeat: int = 3) -> Dict[str, object]:
+    """
+    Сравнивает разбор сырого текста с чтением колоночного хранилища:
+    время ingest (один раз) и время отчетов 'handlers' и 'status_by_logger'
+    из текста и из хранилища.
+    """
+    from .columnar import ColumnarStore, _load_numpy, ingest_logs
+
+    log_path = write_synthetic_log(workdir / "django.log", size_bytes=size_bytes)
+    store_dir = workdir / "store"
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        summary = ingest_logs([log_path], store_dir)
+    ingest_seconds = time.perf_counter() - start
+
+    raw_handlers = _best_time(lambda: analyze_logs([log_path], "handlers"), repeat)
+    raw_both = _best_time(lambda: analyze_logs([log_path], ["handlers", "status_by_logger"]), repeat)
+    store_handlers = _best_time(lambda: ColumnarStore(store_dir).count_handlers(), repeat)
+    store_both = _best_time(lambda: analyze_logs([store_dir], ["handlers", "status_by_logger"]), repeat)
+    store_bytes = sum(path.stat().st_size for path in store_dir.iterdir())
+    return {
+        "bytes": log_path.stat().st_size,
+        "records": summary.rows,
+        "store_bytes": store_bytes,
+        "numpy": _load_numpy() is not None,
+        "ingest_s": round(ingest_seconds, 4),
+        "raw_handlers_s": round(raw_handlers, 4),
+        "store_handlers_s": round(store_handlers, 4),
+        "raw_handlers_and_status_by_logger_s": round(raw_both, 4),
+        "store_handlers_and_status_by_logger_s": round(store_both, 4),
+        "handlers_speedup": round(raw_handlers / store_handlers, 1) if store_handlers else 0.0,
+    }
+
+
+def bench_timerange(size_bytes: int, window: float, workdir: Path, repeat: int = 3) -> Dict[str, object]:
+    """
+    Сравнивает отчет 'handlers' по всему логу с отчетом за окно --since/--until,
+    занимающее долю window времени в середине лога (участок ищется по индексу).
+    """
+    profile = DEFAULT_PROFILE._replace(line_interval=0.01)
+    log_path = write_synthetic_log(workdir / "django.log", size_bytes=size_bytes, profile=profile)
+    with log_path.open('rb') as f:
+        lines = sum(1 for _ in f)
+    span = lines * profile.line_interval
+    since = SYNTHETIC_START_TIME + span * (0.5 - window / 2)
+    until = since + span * window
+
+    def run(**kwargs: object) -> RunStats:
+        stats = RunStats()
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyze_logs([log_path], "handlers", stats=stats, **kwargs)
+        return stats
+
+    full = _best_time(lambda: run(), repeat)
+    windowed = _best_time(lambda: run(since=since, until=until), repeat)
+    window_stats = run(since=since, until=until).totals()
+    return {
+        "bytes": log_path.stat().st_size,
+        "lines": lines,
+        "window": window,
+        "full_scan_s": round(full, 4),
+        "window_s": round(windowed, 4),
+        "window_bytes_read": window_stats.bytes_read,
+        "window_records": window_stats.lines_matched,
+        "speedup": round(full / windowed, 1) if windowed else 0.0,
+    }
+
+
+def bench_formats(lines: int, workdir: Path, repeat: int = 3) -> Dict[str, object]:
+    """
+    Пропускная способность разбора для каждого формата: сканер одного
+    формата, сканер, собранный --log-format auto по началу файла, и
+    отчет 'handlers' по файлу целиком. Для 'django' дополнительно -
+    прежний разбор двумя regex подряд (parse_log_record).
+    """
+    results: Dict[str, object] = {"lines": lines, "formats": {}}
+    for name in LOG_FORMATS:
+        log_path = workdir / f"{name}.log"
+        log_path.write_text("".join(itertools.islice(iter_format_lines(name), lines)), encoding='utf-8')
+        size = log_path.stat().st_size
+        with log_path.open('r', encoding='utf-8') as f:
+            text_lines = f.readlines()
+        with log_path.open('rb') as f:
+            detected = detect_formats(f.read(8 * 1024))
+
+        def scan_all(scan: Callable[[str], object] = compile_scanner((name,))) -> None:
+            for line in text_lines:
+                scan(line)
+
+        auto_scan = compile_scanner(detected)
+        entry: Dict[str, object] = {
+            "bytes": size,
+            "detected": list(detected),
+            "matched_lines": sum(1 for line in text_lines if auto_scan(line) is not None),
+            "scanner": _stage_result(_best_time(scan_all, repeat), lines, size),
+            "auto_scanner": _stage_result(_best_time(lambda: scan_all(auto_scan), repeat), lines, size),
+            "handlers_report": _stage_result(
+                _best_time(lambda: analyze_logs([log_path], "handlers", log_format=AUTO_FORMAT), repeat), lines, size
+            ),
+        }
+        if name == "django":
+            entry["two_regex_parse_log_record"] = _stage_result(
+                _best_time(lambda: scan_all(parse_log_record), repeat), lines, size
+            )
+        results["formats"][name] = entry
+    return results
+
+
+def _median_run_time(command: List[str], runs: int) -> float:
+    """Медиана времени выполнения команды (секунды) за runs запусков."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def _import_time_us(module: str) -> int:
+    """Накопленное время импорта модуля по -X importtime (микросекунды)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        check=True, capture_output=True, text=True,
+    )
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1])
+    return 0
+
+
+def bench_startup(lines: int, runs: int, workdir: Path) -> Dict[str, object]:
+    """
+    Время запуска CLI на маленьком логе: пустой интерпретатор, импорт
+    log_analyzer.main (-X importtime), полный запуск отчета 'handlers' и
+    тот же запуск через клиент прогретого сервера (serve).
+    """
+    log_path = workdir / "small.log"
+    log_path.write_text("".join(generate_log_lines(lines)), encoding='utf-8')
+    command = ["-m", "log_analyzer.main", str(log_path), "--report", "handlers"]
+    result: Dict[str, object] = {
+        "lines": lines,
+        "runs": runs,
+        "python_s": round(_median_run_time([sys.executable, "-c", "pass"], runs), 4),
+        "import_main_ms": round(_import_time_us("log_analyzer.main") / 1000, 1),
+        "cli_s": round(_median_run_time([sys.executable, *command], runs), 4),
+        "import_client_ms": round(_import_time_us("log_analyzer.client") / 1000, 1),
+    }
+    socket_path = workdir / "server.sock"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "log_analyzer.main", "serve", "--socket", str(socket_path)],
+        stdout=subprocess.PIPE,
+    )
+    try:
+        server.stdout.readline()  # 'Serving on ...': модули загружены, сокет слушает
+        client = [sys.executable, "-m", "log_analyzer.client", "--socket", str(socket_path), *command[2:]]
+        result["client_s"] = round(_median_run_time(client, runs), 4)
+    finally:
+        server.terminate()
+        server.wait()
+    return result
+
+
+def _peak_memory(build: Callable[[], object]) -> int:
+    """Пиковый объем памяти (байт), выделенной при построении структуры."""
+    tracemalloc.start()
+    try:
+        result = build()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak
+
+
+def bench_memory(handlers: int, records_per_handler: int, seed: int = 0) -> Dict[str, float]:
+    """
+    Сравнивает память вложенных defaultdict и HandlerStore на логе
+    с высокой кардинальностью хэндлеров (ID в путях).
+    """
+    rng = random.Random(seed)
+    records = [
+        (f"/api/users/{i}/orders/{rng.randint(1, 10 ** 6)}/", rng.choice(LOG_LEVELS))
+        for i in range(handlers)
+        for _ in range(records_per_handler)
+    ]
+
+    def build_nested():
+        nested = defaultdict(lambda: defaultdict(int))
+        for handler, level in records:
+            nested[handler][level] += 1
+        return nested
+
+    def build_store():
+        store = HandlerStore()
+        for handler, level in records:
+            store.add(handler, level)
+        return store
+
+    nested_peak = _peak_memory(build_nested)
+    store_peak = _peak_memory(build_store)
+    return {
+        "handlers": handlers,
+        "records": len(records),
+        "nested_defaultdict_bytes": nested_peak,
+        "handler_store_bytes": store_peak,
+        "ratio": round(nested_peak / store_peak, 2) if store_peak else 0.0,
+    }
+
+
+def parse_arguments(args: List[str] = None) -> argparse.Namespace:
+    """Парсит аргументы командной строки бенчмарка."""
+    parser = argparse.ArgumentParser(description="Log analyzer benchmarks.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    throughput = subparsers.add_parser(
+        "throughput", help="Per-stage throughput on a synthetic (or given) Django log."
+    )
+    throughput.add_argument("--size-mb", type=float, default=50.0, help="Size of the synthetic log in MB.")
+    throughput.add_argument("--log-file", type=Path, default=None, help="Benchmark an existing log instead.")
+    throughput.add_argument("--seed", type=int, default=0, help="Generator seed.")
+    throughput.add_argument("--request-ratio", type=float, default=DEFAULT_PROFILE.request_ratio,
+                            help="Share of django.request lines.")
+    throughput.add_argument("--handlers", type=int, default=DEFAULT_PROFILE.handlers,
+                            help="Number of distinct request paths.")
+    throughput.add_argument("--level-weights", type=float, nargs=len(LOG_LEVELS),
+                            default=list(DEFAULT_PROFILE.level_weights), metavar="W",
+                            help=f"Relative weights of {', '.join(LOG_LEVELS)}.")
+    throughput.add_argument("--malformed-ratio", type=float, default=DEFAULT_PROFILE.malformed_ratio,
+                            help="Share of lines that do not match the log format.")
+    throughput.add_argument("--chunk-size", type=float, default=8.0,
+                            help="Size in MB of the ranges merged in the merge stage.")
+    throughput.add_argument("--repeat", type=int, default=3, help="Runs per stage; the best time is kept.")
+    throughput.add_argument("--output", type=Path, default=None, help="Also write the JSON results to this file.")
+
+    compare = subparsers.add_parser(
+        "compare", help="Compare two throughput JSON results; exits with 1 on regressions."
+    )
+    compare.add_argument("baseline", type=Path, help="Results of the previous version.")
+    compare.add_argument("current", type=Path, help="Results of the current version.")
+    compare.add_argument("--threshold", type=float, default=0.1,
+                         help="Allowed slowdown per stage as a fraction (default: 0.1).")
+
+    compression = subparsers.add_parser(
+        "compression", help="Decompress-to-disk-then-parse vs. streaming parse of a .gz archive."
+    )
+    compression.add_argument("--lines", type=int, default=200_000, help="Number of synthetic lines.")
+    compression.add_argument("--engine", choices=["lines", "mmap"], default="lines", help="Parsing engine.")
+
+    columnar = subparsers.add_parser(
+        "columnar", help="Parsing raw text vs. reading a columnar store created by 'ingest'."
+    )
+    columnar.add_argument("--size-mb", type=float, default=50.0, help="Size of the synthetic log in MB.")
+    columnar.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the best time is kept.")
+
+    timerange = subparsers.add_parser(
+        "timerange", help="Full scan vs. a --since/--until window located through the sparse timestamp index."
+    )
+    timerange.add_argument("--size-mb", type=float, default=50.0, help="Size of the synthetic log in MB.")
+    timerange.add_argument("--window", type=float, default=0.05,
+                           help="Window length as a fraction of the log's time span (default: 0.05).")
+    timerange.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the best time is kept.")
+
+    startup = subparsers.add_parser(
+        "startup", help="Interpreter, import and full CLI wall-clock time on a small log."
+    )
+    startup.add_argument("--lines", type=int, default=1000, help="Number of lines in the small log.")
+    startup.add_argument("--runs", type=int, default=20, help="Invocations per measurement; the median is kept.")
+
+    formats = subparsers.add_parser(
+        "formats", help="Parsing throughput of every log format (single-format and auto-detected scanners)."
+    )
+    formats.add_argument("--lines", type=int, default=200_000, help="Number of synthetic lines per format.")
+    formats.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the best time is kept.")
+
+    memory = subparsers.add_parser(
+        "memory", help="Memory of nested defaultdicts vs. HandlerStore on high-cardinality handlers."
+    )
+    memory.add_argument("--handlers", type=int, default=200_000, help="Number of distinct handlers.")
+    memory.add_argument("--records-per-handler", type=int, default=2, help="Log records per handler.")
+    return parser.parse_args(args)
+
+
+def _run_throughput(parsed: argparse.Namespace, workdir: Path) -> Dict[str, object]:
+    profile = LogProfile(
+        request_ratio=parsed.request_ratio,
+        handlers=parsed.handlers,
+        level_weights=tuple(parsed.level_weights),
+        malformed_ratio=parsed.malformed_ratio,
+    )
+    log_path = parsed.log_file
+    if log_path is None:
+        log_path = write_synthetic_log(
+            workdir / "django.log", seed=parsed.seed, profile=profile,
+            size_bytes=int(parsed.size_mb * 1024 * 1024),
+        )
+    result = {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "benchmark": "throughput",
+        "environment": _environment(),
+        "parameters": {
+            "log_file": str(parsed.log_file) if parsed.log_file else None,
+            "seed": parsed.seed,
+            "profile": profile._asdict(),
+            "chunk_size_mb": parsed.chunk_size,
+            "repeat": parsed.repeat,
+        },
+    }
+    result.update(bench_throughput(log_path, int(parsed.chunk_size * 1024 * 1024), parsed.repeat))
+    return result
+
+
+def main(args: List[str] = None) -> None:
+    """Точка входа: python -m log_analyzer.bench."""
+    parsed = parse_arguments(args)
+    if parsed.benchmark == "compare":
+        with parsed.baseline.open(encoding='utf-8') as f:
+            baseline = json.load(f)
+        with parsed.current.open(encoding='utf-8') as f:
+            current = json.load(f)
+        comparison = compare_results(baseline, current, parsed.threshold)
+        json.dump(comparison, sys.stdout, indent=2)
+        print()
+        if comparison["regressions"]:
+            sys.exit(1)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if parsed.benchmark == "throughput":
+            result = _run_throughput(parsed, Path(tmp))
+        elif parsed.benchmark == "columnar":
+            result = bench_columnar(int(parsed.size_mb * 1024 * 1024), Path(tmp), parsed.repeat)
+        elif parsed.benchmark == "timerange":
+            result = bench_timerange(int(parsed.size_mb * 1024 * 1024), parsed.window, Path(tmp), parsed.repeat)
+        elif parsed.benchmark == "compression":
+            result = bench_compression(parsed.lines, parsed.engine, Path(tmp))
+        elif parsed.benchmark == "startup":
+            result = bench_startup(parsed.lines, parsed.runs, Path(tmp))
+        elif parsed.benchmark == "formats":
+            result = bench_formats(parsed.lines, Path(tmp), parsed.repeat)
+        elif parsed.benchmark == "memory":
+            result = bench_memory(parsed.handlers, parsed.records_per_handler)
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    if getattr(parsed, "output", None) is not None:
+        with parsed.output.open('w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
+
+from .store import HandlerStore
+
+# Версия схемы: при изменении формата старый кэш просто игнорируется
+CACHE_SCHEMA_VERSION = 2
+# Таблица привязана к версии схемы, чтобы старые файлы кэша открывались без миграций
+_TABLE = f"file_state_v{CACHE_SCHEMA_VERSION}"
+# Сколько первых байт файла участвует в контрольной сумме для обнаружения ротации
+HEAD_CHECKSUM_SIZE = 4096
+
+
+class FileIdentity(NamedTuple):
+    """Идентичность файла на диске: inode, размер и время модификации."""
+    inode: int
+    size: int
+    mtime_ns: int
+
+
+def file_identity(file_path: Path) -> FileIdentity:
+    """Возвращает идентичность файла по os.stat."""
+    stat = file_path.stat()
+    return FileIdentity(stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def _head_checksum(file_path: Path, length: int) -> str:
+    """Контрольная сумма первых length байт файла."""
+    with file_path.open('rb') as f:
+        head = f.read(length)
+    return hashlib.blake2b(head, digest_size=16).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Персистентный кэш инкрементального анализа в SQLite.
+
+    Для каждого файла хранит его идентичность, контрольную сумму начала,
+    смещение до которого файл уже разобран и накопленные счетчики хэндлеров.
+    Логи считаются дописываемыми: при совпадении идентичности разбирается
+    только новый хвост, а ротация или усечение приводят к полному пересчету.
+    Запись действительна только для тех же настроек разбора (options), так как
+    например нормализация путей меняет ключи счетчиков.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(str(db_path))
+        self._conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {_TABLE} (
+                path TEXT PRIMARY KEY,
+                schema_version INTEGER NOT NULL,
+                options TEXT NOT NULL,
+                inode INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                head_length INTEGER NOT NULL,
+                head_checksum TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                data TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def __enter__(self) -> "AnalysisCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Закрывает соединение с базой."""
+        self._conn.close()
+
+    @staticmethod
+    def _key(file_path: Path) -> str:
+        return os.path.realpath(file_path)
+
+    def load(self, file_path: Path, identity: FileIdentity, options: str = "") -> Tuple[int, HandlerStore]:
+        """
+        Возвращает точку продолжения для файла: (смещение, накопленные данные).
+
+        Если записи нет, она сделана с другими настройками, файл был ротирован (другой inode или начало файла
+        изменилось) или усечен, возвращается (0, пустое хранилище) - файл
+        разбирается заново.
+        """
+        row = self._conn.execute(
+            "SELECT schema_version, options, inode, size, mtime_ns, head_length, head_checksum, offset, data "
+            f"FROM {_TABLE} WHERE path = ?",
+            (self._key(file_path),),
+        ).fetchone()
+        if row is None:
+            return 0, HandlerStore()
+
+        schema_version, cached_options, inode, size, mtime_ns, head_length, head_checksum, offset, data = row
+        if schema_version != CACHE_SCHEMA_VERSION or cached_options != options:
+            return 0, HandlerStore()
+        if inode != identity.inode:
+            return 0, HandlerStore()
+        if identity.size < offset or identity.size < size:
+            return 0, HandlerStore()  # Файл усечен
+        if identity.size == size and identity.mtime_ns != mtime_ns:
+            return 0, HandlerStore()  # Файл перезаписан без изменения размера
+        if _head_checksum(file_path, head_length) != head_checksum:
+            return 0, HandlerStore()  # На месте старого файла оказался другой
+        return offset, HandlerStore.from_compact(json.loads(data))
+
+    def save(
+        self,
+        file_path: Path,
+        identity: FileIdentity,
+        offset: int,
+        data: HandlerStore,
+        options: str = "",
+    ) -> None:
+        """Сохраняет состояние файла: данные соответствуют байтам [0, offset)."""
+        head_length = min(HEAD_CHECKSUM_SIZE, offset)
+        with self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {_TABLE} "
+                "(path, schema_version, options, inode, size, mtime_ns, head_length, head_checksum, offset, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self._key(file_path),
+                    CACHE_SCHEMA_VERSION,
+                    options,
+                    identity.inode,
+                    identity.size,
+                    identity.mtime_ns,
+                    head_length,
+                    _head_checksum(file_path, head_length),
+                    offset,
+                    json.dumps(data.to_compact(), separators=(',', ':')),
+                ),
+            )
+
+    def get_offset(self, file_path: Path) -> Optional[int]:
+        """Возвращает сохраненное смещение для файла (для диагностики и тестов)."""
+        row = self._conn.execute(
+            f"SELECT offset FROM {_TABLE} WHERE path = ?", (self._key(file_path),)
+        ).fetchone()
+        return row[0] if row else None
@@ -0,0 +1,137 @@
+"""
+Тонкий клиент прогретого сервера (python -m log_analyzer.main serve).
+
+Запуск:
+    python -m log_analyzer.client [--socket PATH] LOG_FILE... --report NAME
+
+Клиент импортирует только os, stat, sys и _socket: он передает серверу рабочий
+каталог, аргументы и свои stdin/stdout/stderr (SCM_RIGHTS), сервер
+выполняет команду в дочернем процессе с уже загруженными модулями и
+пишет вывод прямо в эти дескрипторы. Клиент получает только код выхода.
+Перед отправкой клиент проверяет, что сервер запущен тем же пользователем
+(SO_PEERCRED), иначе чужой процесс на сокете получил бы его терминал.
+Если сервер не запущен, команда выполняется в самом клиенте, как
+python -m log_analyzer.main.
+
+Протокол: запрос - 4 байта длины (big-endian) и строки 'каталог\\0арг\\0...'
+в UTF-8 (surrogateescape) вместе с тремя дескрипторами в одном sendmsg;
+ответ - код выхода десятичным числом, после чего сервер закрывает
+соединение.
+"""
+from __future__ import annotations
+
+import os
+import stat
+import sys
+
+# Модуль socket импортирует enum и selectors (около 10 мс при каждом запуске),
+# клиенту достаточно его C-ядра. По той же причине не импортируется typing.
+import _socket
+
+SOCKET_ENV = "LOG_ANALYZER_SOCKET"
+# Сколько байт ответа читается за раз (ответ - короткое число)
+REPLY_SIZE = 64
+
+
+def default_socket_path() -> str:
+    """
+    Путь сокета: $LOG_ANALYZER_SOCKET, log_analyzer-UID.sock в $XDG_RUNTIME_DIR
+    или server.sock в личном каталоге log_analyzer-UID (0700, создает сервер)
+    в $TMPDIR или /tmp.
+    """
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, f"log_analyzer-{os.getuid()}.sock")
+    directory = os.path.join(os.environ.get("TMPDIR") or "/tmp", f"log_analyzer-{os.getuid()}")
+    return os.path.join(directory, "server.sock")
+
+
+def trusted_directory(directory: str) -> bool:
+    """
+    True, если другие пользователи не могут подменить сокет в каталоге:
+    каталог принадлежит текущему пользователю или root с sticky-битом (как /tmp).
+    """
+    info = os.stat(directory)
+    return info.st_uid == os.getuid() or (info.st_uid == 0 and bool(info.st_mode & stat.S_ISVTX))
+
+
+def _peer_uid(sock: _socket.socket, socket_path: str) -> int:
+    """
+    uid процесса, слушающего сокет: SO_PEERCRED там, где он есть (Linux),
+    иначе владелец файла сокета в доверенном каталоге (-1, если каталог чужой).
+    """
+    option = getattr(_socket, "SO_PEERCRED", None)
+    if option is not None:
+        # struct ucred: pid, uid, gid - три int в порядке байт платформы
+        credentials = sock.getsockopt(_socket.SOL_SOCKET, option, 12)
+        return int.from_bytes(credentials[4:8], sys.byteorder)
+    if not trusted_directory(os.path.dirname(os.path.abspath(socket_path))):
+        return -1
+    return os.stat(socket_path).st_uid
+
+
+def encode_request(cwd: str, argv: list[str]) -> bytes:
+    """Кодирует рабочий каталог и аргументы запроса."""
+    payload = "\0".join([cwd, *argv]).encode('utf-8', errors='surrogateescape')
+    return len(payload).to_bytes(4, 'big') + payload
+
+
+def run_remote(argv: list[str], socket_path: str | None = None) -> int | None:
+    """
+    Выполняет команду на сервере и возвращает ее код выхода или None,
+    если сервер не запущен.
+    """
+    socket_path = socket_path or default_socket_path()
+    sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return None
+        # Дескрипторы терминала и аргументы получает только сервер того же пользователя
+        if _peer_uid(sock, socket_path) != os.getuid():
+            print(f"Error: Server socket {socket_path} belongs to another user.", file=sys.stderr)
+            return 1
+        # То же, что socket.send_fds: дескрипторы как массив int в SCM_RIGHTS
+        fds = b"".join(fd.to_bytes(4, sys.byteorder) for fd in (0, 1, 2))
+        sock.sendmsg([encode_request(os.getcwd(), argv)], [(_socket.SOL_SOCKET, _socket.SCM_RIGHTS, fds)])
+        reply = b""
+        while True:
+            chunk = sock.recv(REPLY_SIZE)
+            if not chunk:
+                break
+            reply += chunk
+    finally:
+        sock.close()
+    try:
+        return int(reply)
+    except ValueError:
+        print("Error: Server closed the connection without an exit code.", file=sys.stderr)
+        return 1
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Точка входа: python -m log_analyzer.client."""
+    args = sys.argv[1:] if argv is None else list(argv)
+    socket_path = None
+    if args[:1] == ["--socket"] and len(args) > 1:
+        socket_path, args = args[1], args[2:]
+    code = run_remote(args, socket_path)
+    if code is None:
+        # Сервер не запущен: обычный запуск в этом процессе
+        from log_analyzer.main import main as cli_main
+
+        cli_main(args)
+        return
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        # Закрытие соединения прерывает команду на сервере, сообщение выводит она
+        sys.exit(1)
@@ -0,0 +1,282 @@
+"""
+Колоночное хранилище разобранных записей.
+
+Команда 'ingest' один раз разбирает логи и сохраняет записи в каталог:
+manifest.json (словари значений, исходные файлы) и по одному двоичному
+файлу на колонку. Отчеты затем считаются группировкой по колонкам (через
+NumPy, если он установлен) без повторного разбора текста.
+"""
+import json
+import os
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .analyzer import _decode_raw_line
+from .compression import READ_ERRORS, open_log_binary
+from .formats import AUTO_FORMAT, get_scanner
+from .log_parser import parse_timestamp, record_handler
+from .store import LEVEL_COUNT, LEVEL_INDEX, HandlerStore
+from .utils import LOG_LEVELS
+
+COLUMNAR_FORMAT_VERSION = 2
+MANIFEST_NAME = "manifest.json"
+# Колонки и типы элементов array: коды словарей, время записи (секунды POSIX,
+# NaN - без метки), номер файла и смещение строки в нем
+COLUMNS: Dict[str, str] = {
+    "level": "B",
+    "logger": "I",
+    "handler": "I",
+    "time": "d",
+    "file": "I",
+    "offset": "Q",
+}
+# Код 0 в колонке handler - запись без пути (не django.request или путь не найден)
+NO_HANDLER = 0
+# Значение колонки time для записи без метки времени (не попадает ни в один интервал)
+NAN = float("nan")
+# Сколько строк копится в памяти перед дозаписью колонок на диск
+FLUSH_ROWS = 1 << 20
+
+
+def is_columnar_store(path: Path) -> bool:
+    """Проверяет, что путь - каталог, созданный командой ingest."""
+    return path.is_dir() and (path / MANIFEST_NAME).is_file()
+
+
+def _column_path(store_dir: Path, name: str) -> Path:
+    return store_dir / f"{name}.bin"
+
+
+class IngestSummary(NamedTuple):
+    """Итоги ingest."""
+    rows: int
+    files: int
+    bytes_read: int
+    seconds: float
+
+
+class _ColumnWriter:
+    """Копит значения колонок в array и дозаписывает их на диск пачками."""
+
+    def __init__(self, store_dir: Path):
+        self.store_dir = store_dir
+        self.columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        self.rows = 0
+        for name in COLUMNS:
+            _column_path(store_dir, name).write_bytes(b"")
+
+    def flush(self) -> None:
+        for name, values in self.columns.items():
+            with _column_path(self.store_dir, name).open('ab') as f:
+                values.tofile(f)
+            del values[:]
+
+
+class _Dictionary:
+    """Словарное кодирование строк: значение -> код в порядке появления."""
+
+    def __init__(self, reserved: Sequence[Optional[str]] = ()):
+        self.values: List[Optional[str]] = list(reserved)
+        self.codes: Dict[Optional[str], int] = {value: code for code, value in enumerate(self.values)}
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+
+def ingest_logs(
+    log_files: Sequence[Path], store_dir: Path, log_format: str = AUTO_FORMAT, progress: bool = True
+) -> IngestSummary:
+    """
+    Разбирает логи (обычные и сжатые) и записывает колоночное хранилище в store_dir.
+    Существующее хранилище в этом каталоге перезаписывается. log_format -
+    формат строк (см. log_analyzer.formats), по умолчанию определяется по
+    началу каждого файла. progress=False отключает строки индикации (--no-progress).
+    """
+    started = time.perf_counter()
+    store_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = store_dir / MANIFEST_NAME
+    if manifest_path.exists():
+        manifest_path.unlink()  # Пока колонки перезаписываются, хранилище недействительно
+    writer = _ColumnWriter(store_dir)
+    loggers = _Dictionary()
+    handlers = _Dictionary(reserved=[None])
+    levels = writer.columns["level"]
+    logger_codes = writer.columns["logger"]
+    handler_codes = writer.columns["handler"]
+    times = writer.columns["time"]
+    file_codes = writer.columns["file"]
+    offsets = writer.columns["offset"]
+    files: List[Dict[str, Any]] = []
+    bytes_read = 0
+
+    for file_index, file_path in enumerate(log_files):
+        if progress:
+            print(f"Ingesting: {file_path}...") # Индикация
+        file_rows = 0
+        try:
+            stat = file_path.stat()
+            scan = get_scanner(log_format, file_path)
+            with open_log_binary(file_path) as f:
+                offset = 0
+                for raw_line in f:
+                    line_offset = offset
+                    offset += len(raw_line)
+                    for line in _decode_raw_line(raw_line):
+                        record = scan(line)
+                        if record is None:
+                            continue
+                        handler = record_handler(record)
+                        levels.append(LEVEL_INDEX[record.level])
+                        logger_codes.append(loggers.encode(record.logger))
+                        handler_codes.append(handlers.encode(handler) if handler is not None else NO_HANDLER)
+                        moment = parse_timestamp(record.timestamp) if record.timestamp is not None else None
+                        times.append(moment if moment is not None else NAN)
+                        file_codes.append(file_index)
+                        offsets.append(line_offset)
+                        file_rows += 1
+                    if len(levels) >= FLUSH_ROWS:
+                        writer.flush()
+            bytes_read += stat.st_size
+        except READ_ERRORS as e:
+            print(f"Warning: Could not read file {file_path}: {e}", file=sys.stderr)
+            stat = None
+        writer.rows += file_rows
+        files.append({
+            "path": str(file_path),
+            "size": stat.st_size if stat is not None else None,
+            "mtime_ns": stat.st_mtime_ns if stat is not None else None,
+            "rows": file_rows,
+        })
+    writer.flush()
+
+    manifest = {
+        "format_version": COLUMNAR_FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "rows": writer.rows,
+        "columns": COLUMNS,
+        "levels": LOG_LEVELS,
+        "loggers": loggers.values,
+        "handlers": handlers.values,
+        "files": files,
+    }
+    # Манифест пишется последним: хранилище без него не считается готовым
+    manifest_tmp = store_dir / (MANIFEST_NAME + ".tmp")
+    with manifest_tmp.open('w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(manifest_tmp, manifest_path)
+    return IngestSummary(writer.rows, len(log_files), bytes_read, time.perf_counter() - started)
+
+
+def _load_numpy() -> Any:
+    """NumPy - необязательная зависимость: без него группировка идет циклом Python."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class ColumnarStore:
+    """Чтение хранилища, созданного ingest_logs, и группировка по колонкам."""
+
+    def __init__(self, store_dir: Path):
+        self.store_dir = store_dir
+        with (store_dir / MANIFEST_NAME).open('r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format_version") != COLUMNAR_FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar store format in {store_dir}")
+        if self.manifest["levels"] != LOG_LEVELS:
+            raise ValueError(f"Columnar store {store_dir} uses different log levels")
+        self.rows: int = self.manifest["rows"]
+        self.loggers: List[str] = self.manifest["loggers"]
+        self.handlers: List[Optional[str]] = self.manifest["handlers"]
+
+    def column(self, name: str, numpy: Any = None) -> Any:
+        """Загружает колонку целиком: numpy.ndarray, если передан модуль numpy, иначе array."""
+        typecode = self.manifest["columns"][name]
+        path = _column_path(self.store_dir, name)
+        swap = self.manifest["byteorder"] != sys.byteorder
+        if numpy is not None:
+            values = numpy.fromfile(path, dtype=numpy.dtype(typecode))
+            return values.byteswap() if swap else values
+        values = array(typecode)
+        with path.open('rb') as f:
+            values.fromfile(f, self.rows)
+        if swap:
+            values.byteswap()
+        return values
+
+    def _group_counts(
+        self, key_column: str, groups: int, since: Optional[float] = None, until: Optional[float] = None
+    ) -> List[Sequence[int]]:
+        """
+        Считает записи по парам (код ключа, уровень): строка матрицы на
+        каждый код ключа, LEVEL_COUNT ячеек в порядке LOG_LEVELS. Если
+        задана граница since или until, учитываются только записи с
+        временем из [since, until).
+        """
+        time_filtered = since is not None or until is not None
+        since = since if since is not None else float("-inf")
+        until = until if until is not None else float("inf")
+        numpy = _load_numpy()
+        if numpy is not None:
+            keys = self.column(key_column, numpy).astype(numpy.int64)
+            levels = self.column("level", numpy)
+            if time_filtered:
+                times = self.column("time", numpy)
+                selected = (times >= since) & (times < until)  # NaN не проходит ни одно сравнение
+                keys, levels = keys[selected], levels[selected]
+            flat = numpy.bincount(keys * LEVEL_COUNT + levels, minlength=groups * LEVEL_COUNT)
+            return flat.reshape(groups, LEVEL_COUNT).tolist()
+
+        flat = [0] * (groups * LEVEL_COUNT)
+        if time_filtered:
+            for key, level, moment in zip(self.column(key_column), self.column("level"), self.column("time")):
+                if since <= moment < until:
+                    flat[key * LEVEL_COUNT + level] += 1
+        else:
+            for key, level in zip(self.column(key_column), self.column("level")):
+                flat[key * LEVEL_COUNT + level] += 1
+        return [flat[base:base + LEVEL_COUNT] for base in range(0, len(flat), LEVEL_COUNT)]
+
+    def count_handlers(
+        self,
+        normalizer: Optional[Callable[[str], str]] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> HandlerStore:
+        """
+        Счетчики хэндлеров по уровням (за интервал [since, until), если он задан).
+        Нормализация применяется к словарю путей (по разу на различный путь),
+        а не к каждой записи.
+        """
+        store = HandlerStore()
+        groups = self._group_counts("handler", len(self.handlers), since, until)
+        for handler, counts in zip(self.handlers, groups):
+            if handler is None or not any(counts):
+                continue
+            store.add_counts(normalizer(handler) if normalizer is not None else handler, counts)
+        return store
+
+    def count_by_logger(self, since: Optional[float] = None, until: Optional[float] = None) -> HandlerStore:
+        """Счетчики записей каждого логгера по уровням (за интервал [since, until), если он задан)."""
+        store = HandlerStore()
+        groups = self._group_counts("logger", len(self.loggers), since, until)
+        for logger, counts in zip(self.loggers, groups):
+            if any(counts):
+                store.add_counts(logger, counts)
+        return store
+
+    def iter_provenance(self) -> Iterable[Tuple[str, int]]:
+        """Пары (файл, смещение строки) для каждой записи - для перехода к исходному тексту."""
+        paths = [entry["path"] for entry in self.manifest["files"]]
+        for file_index, offset in zip(self.column("file"), self.column("offset")):
+            yield paths[file_index], offset
@@ -0,0 +1,133 @@
+import io
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, TextIO, Tuple
+
+# Сигнатуры (magic bytes) поддерживаемых форматов сжатия
+COMPRESSION_MAGIC: List[Tuple[bytes, str]] = [
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+]
+_MAGIC_READ_SIZE = max(len(magic) for magic, _ in COMPRESSION_MAGIC)
+
+# Размер блока при потоковой распаковке
+STREAM_BLOCK_SIZE = 1024 * 1024
+
+# Ошибки чтения, включая поврежденные и обрезанные архивы (zlib.error - поврежденный
+# поток deflate в gzip; lzma.LZMAError переводится в IOError, см. _XzReader)
+READ_ERRORS: Tuple[type, ...] = (IOError, EOFError, zlib.error)
+
+
+def detect_compression(file_path: Path) -> Optional[str]:
+    """
+    Определяет формат сжатия по первым байтам файла (а не по расширению).
+
+    Returns:
+        'gzip', 'bz2', 'xz', 'zstd' или None для обычного текста.
+    """
+    with file_path.open('rb') as f:
+        head = f.read(_MAGIC_READ_SIZE)
+    for magic, name in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def _open_zstd(file_path: Path) -> BinaryIO:
+    """Открывает zstd-архив; пакет zstandard - необязательная зависимость."""
+    try:
+        import zstandard
+    except ImportError:
+        raise IOError(
+            f"{file_path} is zstd-compressed; install the 'zstandard' package to read it"
+        ) from None
+    raw = file_path.open('rb')
+    return zstandard.ZstdDecompressor().stream_reader(raw, read_size=STREAM_BLOCK_SIZE, closefd=True)
+
+
+class _XzReader(io.RawIOBase):
+    """
+    Поток lzma.LZMAFile, в котором ошибки распаковки становятся IOError:
+    так READ_ERRORS не требует импорта lzma при запуске.
+    """
+
+    def __init__(self, file_path: Path):
+        import lzma
+
+        self._errors = lzma.LZMAError
+        self._stream = lzma.open(file_path, 'rb')
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: bytearray) -> int:  # type: ignore[override]
+        try:
+            return self._stream.readinto(buffer)
+        except self._errors as e:
+            raise IOError(f"Corrupt xz data: {e}") from e
+
+    def close(self) -> None:
+        self._stream.close()
+        super().close()
+
+
+def open_log_binary(file_path: Path, compression: Optional[str] = None) -> BinaryIO:
+    """
+    Открывает лог в бинарном режиме с прозрачной потоковой распаковкой.
+
+    Args:
+        file_path: Путь к файлу лога (обычному или сжатому).
+        compression: Уже определенный формат сжатия; если None, определяется по magic bytes.
+    """
+    if compression is None:
+        compression = detect_compression(file_path)
+    if compression is None:
+        return file_path.open('rb', buffering=STREAM_BLOCK_SIZE)
+    if compression == "gzip":
+        import gzip
+        stream = gzip.open(file_path, 'rb')
+    elif compression == "bz2":
+        import bz2
+        stream = bz2.open(file_path, 'rb')
+    elif compression == "xz":
+        stream = _XzReader(file_path)
+    elif compression == "zstd":
+        stream = _open_zstd(file_path)
+    else:
+        raise ValueError(f"Unsupported compression: {compression}")
+    return io.BufferedReader(stream, buffer_size=STREAM_BLOCK_SIZE)
+
+
+def open_log_text(file_path: Path) -> TextIO:
+    """
+    Открывает лог как текст UTF-8 (errors='ignore') с прозрачной распаковкой.
+    Для несжатых файлов поведение совпадает с file_path.open('r', ...).
+    """
+    compression = detect_compression(file_path)
+    if compression is None:
+        return file_path.open('r', encoding='utf-8', errors='ignore')
+    return io.TextIOWrapper(open_log_binary(file_path, compression), encoding='utf-8', errors='ignore')
+
+
+def iter_line_blocks(stream: BinaryIO, block_size: int = STREAM_BLOCK_SIZE) -> Iterator[bytes]:
+    """
+    Читает поток большими блоками и выдает их, обрезая по последнему '\\n',
+    чтобы ни одна строка не оказалась разрезана между блоками.
+    """
+    carry = b""
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        if carry:
+            block = carry + block
+        newline = block.rfind(b"\n")
+        if newline < 0:
+            carry = block
+            continue
+        carry = block[newline + 1:]
+        yield block[:newline + 1]
+    if carry:
+        yield carry
@@ -0,0 +1,186 @@
+import os
+import sys
+import time
+from pathlib import Path
+from typing import BinaryIO, Callable, List, Optional, Union
+
+from .analyzer import HandlerData, ScanOptions, _decode_raw_line, _new_handler_counts, _update_handler_counts
+from .formats import AUTO_FORMAT
+from .normalize import PathNormalizer
+from .reporting import HandlersReport
+from .sketch import SpaceSaving
+
+# Максимальный объем данных, читаемый из одного файла за один опрос. Перед
+# перерисовкой файл опрашивается, пока не дочитан до конца (см. follow_logs),
+# так что предел ограничивает лишь размер одной пачки строк в памяти
+MAX_READ_PER_POLL = 8 * 1024 * 1024
+# Незавершенная строка длиннее этого предела отбрасывается, чтобы буфер не рос бесконечно
+MAX_PARTIAL_LINE = 1024 * 1024
+
+# Очистка экрана терминала перед перерисовкой отчета
+_CLEAR_SCREEN = "\x1b[H\x1b[2J"
+
+
+class FileFollower:
+    """
+    Следит за файлом как `tail -F`: читает только новые данные,
+    переоткрывает файл после ротации и начинает сначала после усечения.
+    Хранит лишь смещение и незавершенный хвост последней строки.
+    """
+
+    def __init__(self, path: Path, from_end: bool = False):
+        self.path = path
+        self._file: Optional[BinaryIO] = None
+        self._inode: Optional[int] = None
+        self._partial = b""
+        self._from_end = from_end
+        # True, если последний опрос дочитал файл до конца
+        self.at_eof = True
+
+    def _open(self, seek_to_end: bool) -> bool:
+        """Открывает файл, если он существует; возвращает True при успехе."""
+        try:
+            self._file = self.path.open('rb')
+        except OSError:
+            return False
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        if seek_to_end:
+            self._file.seek(0, os.SEEK_END)
+        self._partial = b""
+        return True
+
+    def close(self) -> None:
+        """Закрывает отслеживаемый файл."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read_available(self) -> List[bytes]:
+        """Читает доступные данные из текущего дескриптора и возвращает завершенные строки."""
+        data = self._file.read(MAX_READ_PER_POLL)
+        self.at_eof = len(data) < MAX_READ_PER_POLL
+        if not data:
+            return []
+        data = self._partial + data
+        lines = data.split(b"\n")
+        self._partial = lines.pop()
+        if len(self._partial) > MAX_PARTIAL_LINE:
+            print(f"Warning: Dropping over-long line in {self.path}", file=sys.stderr)
+            self._partial = b""
+        return [line + b"\n" for line in lines]
+
+    def poll(self) -> List[str]:
+        """
+        Возвращает строки, дописанные с момента предыдущего опроса (не
+        больше MAX_READ_PER_POLL байт; at_eof - дочитан ли файл до конца).
+        """
+        if self._file is None:
+            self.at_eof = True
+            opened = self._open(seek_to_end=self._from_end)
+            # После ротации новый файл читается с начала; файл, появившийся
+            # после запуска, тоже: все его строки новые
+            self._from_end = False
+            if not opened:
+                return []
+
+        raw_lines = self._read_available()
+        try:
+            stat = self.path.stat()
+        except OSError:
+            stat = None  # Файл удален или ротирован, новый еще не создан
+
+        if stat is not None and stat.st_ino != self._inode:
+            # Ротация: дочитываем старый файл и переключаемся на новый
+            while True:
+                rest = self._read_available()
+                if not rest:
+                    break
+                raw_lines.extend(rest)
+            if self._partial:
+                raw_lines.append(self._partial)
+            self.close()
+            if self._open(seek_to_end=False):
+                raw_lines.extend(self._read_available())
+        elif stat is not None and stat.st_size < self._file.tell():
+            # Усечение (copytruncate): начинаем с начала того же файла
+            self._file.seek(0)
+            self._partial = b""
+            raw_lines.extend(self._read_available())
+
+        lines: List[str] = []
+        for raw_line in raw_lines:
+            lines.extend(_decode_raw_line(raw_line))
+        return lines
+
+
+def _render(report: HandlersReport, handler_counts: Union[HandlerData, SpaceSaving], top: Optional[int], sort_by: str) -> None:
+    """Перерисовывает отчет; стоимость зависит от числа хэндлеров, а не строк."""
+    if sys.stdout.isatty():
+        sys.stdout.write(_CLEAR_SCREEN)
+    report.generate(handler_counts, top=top, sort_by=sort_by)
+    sys.stdout.flush()
+
+
+def follow_logs(
+    log_files: List[Path],
+    interval: float = 2.0,
+    from_end: bool = False,
+    max_iterations: Optional[int] = None,
+    sleep: Callable[[float], None] = time.sleep,
+    normalizer: Optional[PathNormalizer] = None,
+    top: Optional[int] = None,
+    sort_by: str = "total",
+    log_format: str = AUTO_FORMAT,
+    sketch_capacity: Optional[int] = None,
+) -> Union[HandlerData, SpaceSaving]:
+    """
+    Отслеживает файлы и периодически перерисовывает отчет 'handlers'.
+
+    Новые строки добавляются в те же счетчики, что строит анализатор,
+    поэтому старые данные повторно не читаются. Перед каждой перерисовкой
+    файлы дочитываются до конца пачками по MAX_READ_PER_POLL, но не дольше
+    interval на все файлы: отставший от лога отчет догоняет его, а не
+    отстает все сильнее. Память ограничена числом различных хэндлеров (или
+    sketch_capacity) и буфером незавершенных строк.
+
+    Args:
+        log_files: Файлы для отслеживания (могут еще не существовать).
+        interval: Интервал перерисовки в секундах.
+        from_end: Начинать с конца файлов, пропуская уже записанные данные.
+        max_iterations: Число циклов опроса (None - бесконечно, до Ctrl+C).
+        sleep: Функция ожидания (подменяется в тестах).
+        normalizer: Нормализатор путей, как в analyze_logs.
+        top: Выводить только top самых тяжелых хэндлеров.
+        sort_by: Ключ ранжирования для top: 'total' или уровень логирования.
+        log_format: Формат строк; при AUTO_FORMAT строка разбирается
+            сканером всех форматов, так как файлы могут появиться позже.
+        sketch_capacity: Размер сводки Space-Saving (--approx); None - точные счетчики.
+
+    Returns:
+        Накопленные счетчики хэндлеров (или сводка Space-Saving).
+    """
+    options = ScanOptions(
+        normalizer=normalizer, log_format=log_format, sketch_capacity=sketch_capacity, sort_by=sort_by
+    )
+    handler_counts = _new_handler_counts(options)
+    followers = [FileFollower(path, from_end=from_end) for path in log_files]
+    report = HandlersReport()
+    # Время на дочитывание одного файла перед перерисовкой
+    budget = interval / max(len(followers), 1)
+    iteration = 0
+    try:
+        while max_iterations is None or iteration < max_iterations:
+            for follower in followers:
+                deadline = time.monotonic() + budget
+                while True:
+                    _update_handler_counts(handler_counts, follower.poll(), options)
+                    if follower.at_eof or time.monotonic() >= deadline:
+                        break
+            _render(report, handler_counts, top, sort_by)
+            iteration += 1
+            if max_iterations is None or iteration < max_iterations:
+                sleep(interval)
+    finally:
+        for follower in followers:
+            follower.close()
+    return handler_counts
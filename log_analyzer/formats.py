@@ -0,0 +1,328 @@
+"""
+Форматы строк логов и составной сканер.
+
+Каждый формат объявляется один раз: класс LogFormat, зарегистрированный
+декоратором register_format, сообщает, с каких символов могут начинаться
+его строки и каким разборщиком разбирать строку, начинающуюся с каждого
+из них (prefixes). compile_scanner объединяет выбранные форматы в одну
+функцию: по первому символу строки берется короткий кортеж разборщиков
+(обычно один целевой regex или json.loads), так что строка не
+проверяется всеми шаблонами подряд.
+
+При --log-format auto форматы каждого файла определяются по его первым
+SNIFF_BYTES байтам (detect_formats): в сканер попадают только
+встретившиеся форматы, самый частый первым. Для потоков, у которых нет
+начала для проверки, сканер собирается из всех форматов.
+"""
+import re
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from .compression import open_log_binary
+from .log_parser import LOG_LEVELS, LogRecord, parse_plain_record, parse_timestamped_record
+
+# Разборщик строки: LogRecord или None, если строка не в этом формате
+LineParser = Callable[[str], Optional[LogRecord]]
+
+AUTO_FORMAT = "auto"
+# Формат по умолчанию, если в начале файла не нашлось ни одной знакомой строки
+FALLBACK_FORMAT = "django"
+# Сколько байт начала файла проверяется при --log-format auto
+SNIFF_BYTES = 8 * 1024
+
+# Символы начала строки журнала доступа: адрес клиента IPv4 или IPv6
+_ADDRESS_CHARS = "0123456789abcdef:"
+# Строка в кавычках с экранированием '\"'; развернутый цикл вместо
+# (?:[^"\\]|\\.)*, который движок re проверяет посимвольно
+_QUOTED_BODY = r'[^"\\]*(?:\\.[^"\\]*)*'
+_QUOTED = rf'"{_QUOTED_BODY}"'
+# Общее начало формата 'combined': адрес, ident, пользователь, [время], "запрос", код, размер.
+# Путь без query выделяется тем же проходом, если запрос имеет вид 'МЕТОД /путь ...'
+_ACCESS_PREFIX = (
+    r'\S+ \S+ \S+ \[(?P<timestamp>[^\]]+)\] '
+    rf'"(?P<request>(?:[^\s"\\]+ (?P<path>/[^\s?"\\]*))?{_QUOTED_BODY})" (?P<status>\d{{3}}) (?P<size>\S+)'
+)
+# Время запроса nginx в секундах: rt=$request_time (или request_time=...)
+_NGINX_REQUEST_TIME_RE = re.compile(r'\s(?:rt|request_time)="?(\d+(?:\.\d+)?)')
+# Уровень записи журнала доступа по первой цифре кода ответа
+_STATUS_CLASS_LEVELS: Dict[str, str] = {"5": "ERROR", "4": "WARNING"}
+
+
+class LogFormat(ABC):
+    """
+    Формат строк лога. Подклассы регистрируются декоратором
+    register_format, после чего имя становится значением --log-format.
+    """
+
+    # Имя в реестре (заполняется register_format)
+    name: str = ""
+
+    @abstractmethod
+    def prefixes(self) -> Dict[str, LineParser]:
+        """Разборщик для каждого символа, с которого может начинаться строка формата."""
+
+
+LOG_FORMATS: Dict[str, LogFormat] = {}
+
+def register_format(name: str) -> Callable[[Type[LogFormat]], Type[LogFormat]]:
+    """Декоратор класса формата: регистрирует его экземпляр в LOG_FORMATS под именем name."""
+    def decorator(format_class: Type[LogFormat]) -> Type[LogFormat]:
+        log_format = format_class()
+        log_format.name = name
+        LOG_FORMATS[name] = log_format
+        return format_class
+    return decorator
+
+def status_level(status: str) -> str:
+    """Уровень записи журнала доступа по коду ответа, как у django.request: 5xx - ERROR, 4xx - WARNING."""
+    return _STATUS_CLASS_LEVELS.get(status[:1], "INFO")
+
+def request_path(request: str) -> Optional[str]:
+    """Путь без query-параметров из строки запроса 'МЕТОД /путь?query ПРОТОКОЛ'."""
+    parts = request.split(" ", 2)
+    if len(parts) < 2 or not parts[1].startswith("/"):
+        return None
+    return parts[1].split("?", 1)[0]
+
+
+@register_format("django")
+class DjangoFormat(LogFormat):
+    """'[метка времени] УРОВЕНЬ:логгер:сообщение' (logging.Formatter в настройках Django)."""
+
+    def prefixes(self) -> Dict[str, LineParser]:
+        parsers = {level[0]: parse_plain_record for level in LOG_LEVELS}
+        parsers.update(dict.fromkeys("0123456789[", parse_timestamped_record))
+        return parsers
+
+
+class AccessLogFormat(LogFormat):
+    """
+    Журнал доступа в духе 'combined'. Уровень записи выводится из кода
+    ответа (status_level), логгер - имя формата с суффиксом '.access'.
+    """
+
+    # Шаблон строки с группами timestamp, request, path, status, size и fields
+    # (поля после user agent). Компилируется при сборке сканера, а не при
+    # импорте (короткие запуски, см. server.py)
+    pattern: str
+
+    def duration(self, fields: str) -> Optional[float]:
+        """Длительность запроса в миллисекундах из полей после user agent; None, если ее нет."""
+        return None
+
+    def prefixes(self) -> Dict[str, LineParser]:
+        match_line = re.compile(self.pattern).match
+        logger = f"{self.name}.access"
+        duration = self.duration
+
+        def parse(line: str) -> Optional[LogRecord]:
+            match = match_line(line)
+            if match is None:
+                return None
+            timestamp, request, path, status, size, fields = match.group(
+                "timestamp", "request", "path", "status", "size", "fields"
+            )
+            return LogRecord(
+                status_level(status), logger, f"{request} {status}", timestamp, path,
+                int(status), duration(fields) if fields else None, int(size) if size.isdigit() else None,
+            )
+        return dict.fromkeys(_ADDRESS_CHARS, parse)
+
+
+@register_format("gunicorn")
+class GunicornFormat(AccessLogFormat):
+    """
+    Журнал доступа gunicorn (access_log_format по умолчанию); допускаются
+    поля после user agent без '=' (например, %(L)s - время ответа). Первое
+    из них, если это число, считается временем ответа в секундах.
+    """
+
+    pattern = _ACCESS_PREFIX + rf"(?: {_QUOTED} {_QUOTED})?(?P<fields>(?:\s+[^\s=]+)*)\s*$"
+
+    def duration(self, fields: str) -> Optional[float]:
+        try:
+            return float(fields.split(None, 1)[0]) * 1000.0
+        except (IndexError, ValueError):
+            return None
+
+
+@register_format("nginx")
+class NginxFormat(AccessLogFormat):
+    """
+    Журнал nginx с полями upstream: 'combined' и следом поля ключ=значение
+    (rt=$request_time uct="$upstream_connect_time" urt="$upstream_response_time" ...).
+    Длительность запроса - из поля rt (или request_time).
+    """
+
+    pattern = _ACCESS_PREFIX + rf" {_QUOTED} {_QUOTED}(?P<fields>(?:\s+[\w.-]+=\S*)+)\s*$"
+
+    def duration(self, fields: str) -> Optional[float]:
+        match = _NGINX_REQUEST_TIME_RE.search(fields)
+        return float(match.group(1)) * 1000.0 if match else None
+
+
+# Синонимы уровней, которые пишут structlog и python-json-logger
+_JSON_LEVEL_ALIASES: Dict[str, str] = {"WARN": "WARNING", "EXCEPTION": "ERROR", "FATAL": "CRITICAL"}
+_LEVELS = frozenset(LOG_LEVELS)
+# Логгер записи без поля логгера (как корневой логгер logging)
+JSON_DEFAULT_LOGGER = "root"
+_INFINITY = float("inf")
+
+
+def _json_timestamp(value: Any) -> Optional[str]:
+    """Метка времени поля JSON: строка как есть, секунды POSIX - в ISO 8601 (UTC)."""
+    if isinstance(value, str):
+        return value
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return None
+    try:
+        return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(value))
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+def _json_number(value: Any) -> Optional[float]:
+    """Неотрицательное число поля JSON; None для отсутствующих, строковых и логических значений."""
+    if type(value) is int or type(value) is float:
+        # Отрицательные, NaN и Infinity (json.loads их принимает) отбрасываются
+        return value if 0 <= value < _INFINITY else None
+    return None
+
+
+@register_format("json")
+class JsonFormat(LogFormat):
+    """
+    JSON-объект на строку (structlog JSONRenderer, python-json-logger):
+    поля level/levelname, logger/logger_name/name, event/message/msg,
+    timestamp/time/@timestamp/asctime (строка или секунды POSIX), путь
+    из path/request_path или из строки запроса в request, код ответа
+    status/status_code/code, длительность duration_ms (мс) или duration/
+    request_time (секунды) и размер ответа response_size/bytes.
+    """
+
+    def __init__(self) -> None:
+        # json импортируется при первой строке '{', а не при запуске
+        self._loads: Optional[Callable[[str], Any]] = None
+
+    def prefixes(self) -> Dict[str, LineParser]:
+        return {"{": self.parse}
+
+    def parse(self, line: str) -> Optional[LogRecord]:
+        if self._loads is None:
+            from json import loads
+            self._loads = loads
+        try:
+            data = self._loads(line)
+        except (ValueError, RecursionError):
+            return None
+        if not isinstance(data, dict):
+            return None
+        # Поля перечислены в порядке частоты: structlog, затем python-json-logger
+        level = data.get("level") or data.get("levelname")
+        if type(level) is not str:
+            return None
+        level = level.upper()
+        level = _JSON_LEVEL_ALIASES.get(level, level)
+        if level not in _LEVELS:
+            return None
+        logger = str(data.get("logger") or data.get("logger_name") or data.get("name") or JSON_DEFAULT_LOGGER)
+        message = str(data.get("event") or data.get("message") or data.get("msg") or "").strip()
+        timestamp = _json_timestamp(
+            data.get("timestamp") or data.get("time") or data.get("@timestamp") or data.get("asctime")
+        )
+        path = data.get("path") or data.get("request_path")
+        if type(path) is str:
+            path = path.split("?", 1)[0] if path.startswith("/") else None
+        else:
+            request = data.get("request")
+            path = request_path(request) if type(request) is str else None
+        status = data.get("status") or data.get("status_code") or data.get("code")
+        if type(status) is not int:
+            status = int(status) if type(status) is str and status.isdigit() else None
+        duration = _json_number(data.get("duration_ms"))
+        if duration is None:
+            duration = _json_number(data.get("duration") or data.get("request_time"))
+            if duration is not None:
+                duration *= 1000.0
+        size = _json_number(data.get("response_size") or data.get("bytes"))
+        return LogRecord(
+            level, logger, message, timestamp, path, status, duration, int(size) if size is not None else None
+        )
+
+
+@lru_cache(maxsize=None)
+def compile_scanner(names: Tuple[str, ...]) -> LineParser:
+    """
+    Собирает сканер форматов names: таблица 'первый символ -> разборщики'
+    в порядке names. Если каждому символу соответствует один разборщик,
+    сканер вызывает его напрямую.
+    """
+    dispatch: Dict[str, Tuple[LineParser, ...]] = {}
+    for name in names:
+        for char, parser in LOG_FORMATS[name].prefixes().items():
+            dispatch[char] = dispatch.get(char, ()) + (parser,)
+
+    if all(len(parsers) == 1 for parsers in dispatch.values()):
+        get_parser = {char: parsers[0] for char, parsers in dispatch.items()}.get
+
+        def scan_single(line: str) -> Optional[LogRecord]:
+            parser = get_parser(line[:1])
+            return parser(line) if parser is not None else None
+        return scan_single
+
+    get_parsers = dispatch.get
+
+    def scan(line: str) -> Optional[LogRecord]:
+        for parser in get_parsers(line[:1], ()):
+            record = parser(line)
+            if record is not None:
+                return record
+        return None
+    return scan
+
+def detect_formats(head: bytes) -> Tuple[str, ...]:
+    """
+    Определяет форматы по началу файла: имена форматов, разобравших хотя
+    бы одну строку, по убыванию числа строк. Последняя строка, обрезанная
+    на SNIFF_BYTES, не учитывается. Если не подошел ни один формат -
+    (FALLBACK_FORMAT,).
+    """
+    lines = head.decode('utf-8', errors='ignore').splitlines()
+    if len(head) >= SNIFF_BYTES and len(lines) > 1:
+        lines.pop()
+    scanners = {name: compile_scanner((name,)) for name in LOG_FORMATS}
+    counts = dict.fromkeys(LOG_FORMATS, 0)
+    for line in lines:
+        for name, scan in scanners.items():
+            if scan(line) is not None:
+                counts[name] += 1
+    # sorted устойчив: при равенстве сохраняется порядок регистрации
+    found = sorted((name for name, count in counts.items() if count), key=lambda name: -counts[name])
+    return tuple(found) or (FALLBACK_FORMAT,)
+
+def resolve_formats(log_format: str, file_path: Optional[Path] = None) -> Tuple[str, ...]:
+    """
+    Форматы для разбора: заданный явно, найденные в начале file_path при
+    AUTO_FORMAT или, без файла (потоки), все зарегистрированные.
+
+    Raises:
+        OSError и другие ошибки чтения (см. compression.READ_ERRORS).
+    """
+    if log_format != AUTO_FORMAT:
+        return (log_format,)
+    if file_path is None:
+        return tuple(LOG_FORMATS)
+    with open_log_binary(file_path) as f:
+        head = f.read(SNIFF_BYTES)
+    return detect_formats(head)
+
+def get_scanner(log_format: str, file_path: Optional[Path] = None) -> LineParser:
+    """Сканер для log_format (см. resolve_formats)."""
+    return compile_scanner(resolve_formats(log_format, file_path))
+
+def get_format_names() -> Tuple[str, ...]:
+    """Значения --log-format: AUTO_FORMAT и имена зарегистрированных форматов."""
+    return (AUTO_FORMAT, *LOG_FORMATS)
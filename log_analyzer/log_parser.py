@@ -1,13 +1,193 @@
 import re
-from typing import Optional, Dict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Dict, Iterator, NamedTuple, Tuple, Union
+from .stats import REJECT_NO_LEVEL_PREFIX, REJECT_NO_PATH, REJECT_OTHER_LOGGER
+
+if TYPE_CHECKING:  # mmap нужен только движку 'mmap', он импортирует его сам
+    import mmap
 
 # Уровни логирования 
 LOG_LEVELS: list[str] = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
 
+# Метки времени распространенных форматтеров Django: asctime ('2024-05-01 14:00:00,123'),
+# ISO 8601 со смещением и server_time логгера django.server ('01/May/2024 14:00:00')
+TIMESTAMP_PATTERN = (
+    r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"
+    r"|\d{2}/[A-Z][a-z]{2}/\d{4}[ :]\d{2}:\d{2}:\d{2}"
+)
 # Regex для захвата уровня, логгера и сообщения
-LOG_LINE_RE = re.compile(r"^(DEBUG|INFO|WARNING|ERROR|CRITICAL):(?P<logger>[^:]+):(?P<message>.*)")
+LOG_LINE_RE = re.compile(r"^(?P<level>DEBUG|INFO|WARNING|ERROR|CRITICAL):(?P<logger>[^:]+):(?P<message>.*)")
+# То же с меткой времени впереди (в том числе в [скобках]).
+# Проверяется только для строк, не подошедших под LOG_LINE_RE, чтобы не замедлять логи без меток
+TIMESTAMPED_LOG_LINE_RE = re.compile(
+    rf"^\[?(?P<timestamp>{TIMESTAMP_PATTERN})\]?\s+"
+    r"(?P<level>DEBUG|INFO|WARNING|ERROR|CRITICAL):(?P<logger>[^:]+):(?P<message>.*)"
+)
+_ISO_TIMESTAMP_RE = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:[.,](\d+))?(Z|[+-]\d{2}:?\d{2})?$"
+)
+# server_time и время журналов доступа ('01/May/2024:14:00:00 +0000')
+_SERVER_TIMESTAMP_RE = re.compile(r"(\d{2})/([A-Z][a-z]{2})/(\d{4})[ :](\d{2}):(\d{2}):(\d{2})(?: ([+-]\d{4}))?$")
+_MONTHS: Dict[str, int] = {
+    name: number
+    for number, name in enumerate(
+        ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], start=1
+    )
+}
+# Логгер запросов Django: путь запроса извлекается из его сообщений
+REQUEST_LOGGER = "django.request"
 # Regex для поиска пути в сообщении django.request
 REQUEST_PATH_RE = re.compile(r"\s+(/[^ ]*)\s+")  # Захватывает путь с параметрами запроса
+# Код ответа и длительность после пути в сообщении django.request ('GET /path 200 12ms')
+REQUEST_METRICS_RE = re.compile(r"\s/[^ ]*\s+([1-5]\d\d)\b(?:\s+(\d+(?:\.\d+)?)\s*(ms|us|µs|s)\b)?")
+# Множители единиц длительности к миллисекундам
+DURATION_UNITS_MS: Dict[str, float] = {"s": 1000.0, "ms": 1.0, "us": 0.001, "µs": 0.001}
+
+# Байтовые аналоги для быстрого сканера
+_REQUEST_LOGGER_MARKER = b":django.request:"
+_LEVEL_BYTES: Dict[bytes, str] = {level.encode('ascii'): level for level in LOG_LEVELS}
+# Пробельные символы ASCII, которые str.strip() и \s в str-regex считают пробелами
+_ASCII_WHITESPACE = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+# Префикс 'метка времени УРОВЕНЬ' перед маркером логгера
+_TIMESTAMPED_LEVEL_BYTES_RE = re.compile(
+    rb"\[?(?:" + TIMESTAMP_PATTERN.encode('ascii') + rb")\]?\s+(DEBUG|INFO|WARNING|ERROR|CRITICAL)"
+)
+REQUEST_PATH_BYTES_RE = re.compile(rb"[\s\x1c-\x1f]+(/[^ ]*)[\s\x1c-\x1f]+")
+
+class LogRecord(NamedTuple):
+    """Разобранная строка лога любого логгера (общий вход для агрегаторов отчетов)."""
+    level: str
+    logger: str
+    message: str
+    # Метка времени как в строке (см. parse_timestamp); None, если ее нет
+    timestamp: Optional[str] = None
+    # Путь запроса без query-параметров, если его дает сам формат (журналы
+    # доступа, поле JSON); иначе он извлекается из сообщения django.request
+    path: Optional[str] = None
+    # Код ответа, длительность запроса (мс) и размер ответа (байты), если их
+    # дает сам формат; для django.request - см. record_request_metrics
+    status: Optional[int] = None
+    duration: Optional[float] = None
+    size: Optional[int] = None
+
+# Создает LogRecord из кортежа всех полей, минуя разбор аргументов
+# NamedTuple.__new__ (втрое дороже на горячем пути разбора строк)
+_new_record = tuple.__new__
+
+def parse_plain_record(line: str) -> Optional[LogRecord]:
+    """Разбирает строку 'УРОВЕНЬ:логгер:сообщение' (без метки времени)."""
+    match = LOG_LINE_RE.match(line)
+    if match is None:
+        return None
+    level, logger, message = match.groups()
+    return _new_record(LogRecord, (level, logger, message.strip(), None, None, None, None, None))
+
+def parse_timestamped_record(line: str) -> Optional[LogRecord]:
+    """Разбирает строку '[метка времени] УРОВЕНЬ:логгер:сообщение'."""
+    match = TIMESTAMPED_LOG_LINE_RE.match(line)
+    if match is None:
+        return None
+    timestamp, level, logger, message = match.groups()
+    return _new_record(LogRecord, (level, logger, message.strip(), timestamp, None, None, None, None))
+
+def parse_log_record(line: str) -> Optional[LogRecord]:
+    """
+    Разбирает строку '[метка времени] УРОВЕНЬ:логгер:сообщение' без привязки
+    к логгеру. Сообщение возвращается без пробелов по краям. Сканеры
+    log_analyzer.formats выбирают один из двух разборщиков по первому
+    символу строки; здесь они пробуются по очереди.
+
+    Returns:
+        LogRecord или None, если строка не соответствует формату.
+    """
+    return parse_plain_record(line) or parse_timestamped_record(line)
+
+def record_handler(record: LogRecord) -> Optional[str]:
+    """Путь запроса записи: из формата или из сообщения django.request; None, если записи нет дела до запросов."""
+    if record.path is not None:
+        return record.path
+    if record.logger == REQUEST_LOGGER:
+        return extract_handler(record.message)
+    return None
+
+def record_request_metrics(record: LogRecord) -> Tuple[Optional[int], Optional[float], Optional[int]]:
+    """
+    Код ответа, длительность (мс) и размер ответа (байты) записи: из формата
+    или из сообщения django.request вида 'МЕТОД /путь КОД 12ms'. Чего нет
+    в записи - None.
+    """
+    if record.status is not None or record.duration is not None or record.size is not None:
+        return record.status, record.duration, record.size
+    if record.logger != REQUEST_LOGGER:
+        return None, None, None
+    match = REQUEST_METRICS_RE.search(record.message)
+    if match is None:
+        return None, None, None
+    status, duration, unit = match.groups()
+    return int(status), float(duration) * DURATION_UNITS_MS[unit] if duration else None, None
+
+def classify_record(record: Optional[LogRecord]) -> Union[Tuple[str, str], str]:
+    """
+    Пара (УРОВЕНЬ, ПУТЬ) для отчета 'handlers' или причина отказа:
+    'no_level_prefix' (строка не разобрана), 'other_logger' или 'no_path'.
+    """
+    if record is None:
+        return REJECT_NO_LEVEL_PREFIX
+    if record.path is not None:
+        return record.level, record.path
+    if record.logger != REQUEST_LOGGER:
+        return REJECT_OTHER_LOGGER
+    handler = extract_handler(record.message)
+    if handler is None:
+        return REJECT_NO_PATH
+    return record.level, handler
+
+def _match_log_line(line: str) -> Optional["re.Match[str]"]:
+    """Сопоставляет строку с форматом лога без метки времени или с ней."""
+    return LOG_LINE_RE.match(line) or TIMESTAMPED_LOG_LINE_RE.match(line)
+
+@lru_cache(maxsize=1 << 14)
+def _epoch_seconds(year: int, month: int, day: int, hour: int, minute: int, second: int, offset: int) -> int:
+    """Секунды POSIX для времени с точностью до секунды (кэшируется: соседние строки делят секунду)."""
+    import calendar  # Импортируется при первой метке времени, а не при запуске
+    return calendar.timegm((year, month, day, hour, minute, second, 0, 0, 0)) - offset
+
+@lru_cache(maxsize=1024)
+def parse_timestamp(text: str) -> Optional[float]:
+    """
+    Переводит метку времени из строки лога в секунды POSIX.
+
+    Метки без смещения считаются временем UTC, поэтому они сравнимы с
+    границами --since/--until, заданными в том же виде. Кэш по всей строке
+    нужен, чтобы фильтр и агрегаторы, получившие одну запись, не разбирали
+    ее метку повторно.
+
+    Returns:
+        Секунды (с долями) или None, если метка не распознана.
+    """
+    match = _ISO_TIMESTAMP_RE.match(text)
+    if match:
+        year, month, day, hour, minute, second, fraction, zone = match.groups()
+        offset = 0
+        if zone and zone != "Z":
+            sign = -1 if zone[0] == "-" else 1
+            digits = zone[1:].replace(":", "")
+            offset = sign * (int(digits[:2]) * 3600 + int(digits[2:]) * 60)
+        month_number = int(month)
+    else:
+        match = _SERVER_TIMESTAMP_RE.match(text)
+        if not match:
+            return None
+        day, month, year, hour, minute, second, zone = match.groups()
+        month_number = _MONTHS.get(month, 0)
+        fraction, offset = None, 0
+        if zone:
+            sign = -1 if zone[0] == "-" else 1
+            offset = sign * (int(zone[1:3]) * 3600 + int(zone[3:]) * 60)
+    if not 1 <= month_number <= 12:
+        return None
+    seconds = _epoch_seconds(int(year), month_number, int(day), int(hour), int(minute), int(second), offset)
+    return seconds + float("0." + fraction) if fraction else float(seconds)
 
 def parse_log_line(line: str) -> Optional[Dict[str, str]]:
     """
@@ -19,21 +199,95 @@ def parse_log_line(line: str) -> Optional[Dict[str, str]]:
     Returns:
         Словарь {'level': УРОВЕНЬ, 'handler': ПУТЬ} или None.
     """
-    match = LOG_LINE_RE.match(line)
+    match = _match_log_line(line)
     if not match:
         return None
 
     data = match.groupdict()
-    level = match.groups()[0] 
+    level = match.group("level")
     logger = data.get("logger")
     message = data.get("message", "").strip()
 
-    if logger == "django.request":
-        path_match = REQUEST_PATH_RE.search(message)
-        if path_match:
-            handler = path_match.group(1)
-            handler = handler.split('?')[0]
-            if level in LOG_LEVELS:
-                 return {"level": level, "handler": handler}
+    if logger == REQUEST_LOGGER:
+        handler = extract_handler(message)
+        if handler is not None and level in LOG_LEVELS:
+            return {"level": level, "handler": handler}
+
+    return None
+
+def classify_log_line(line: str) -> Union[Tuple[str, str], str]:
+    """
+    Разбирает строку как parse_log_line, но при неудаче сообщает причину.
+    Используется при сборе статистики, чтобы не разбирать строку дважды.
+
+    Returns:
+        Пара (УРОВЕНЬ, ПУТЬ) или причина отказа: 'no_level_prefix',
+        'other_logger' или 'no_path'.
+    """
+    return classify_record(parse_log_record(line))
+
+def extract_handler(message: str) -> Optional[str]:
+    """Извлекает путь без query-параметров из сообщения django.request."""
+    path_match = REQUEST_PATH_RE.search(message)
+    if path_match:
+        return path_match.group(1).split('?')[0]
+    return None
+
+def scan_request_lines(
+    buffer: Union[bytes, memoryview, "mmap.mmap"],
+    start: int = 0,
+    end: Optional[int] = None,
+) -> Iterator[Tuple[str, str]]:
+    """
+    Быстрый сканер по сырым байтам (например, mmap файла).
+
+    Ищет только строки логгера django.request; остальные строки пропускаются
+    без декодирования. Результат совпадает с parse_log_line для валидного UTF-8.
+
+    Args:
+        buffer: Байтовый буфер с содержимым лога.
+        start: Смещение начала диапазона (должно быть началом строки).
+        end: Смещение конца диапазона (по умолчанию конец буфера).
+
+    Yields:
+        Пары (УРОВЕНЬ, ПУТЬ).
+    """
+    if end is None:
+        end = len(buffer)
+    marker_len = len(_REQUEST_LOGGER_MARKER)
+    position = start
+    while True:
+        # Префильтр уровня memchr: ищем маркер логгера, не трогая остальные строки
+        marker = buffer.find(_REQUEST_LOGGER_MARKER, position, end)
+        if marker < 0:
+            return
+        # Начало строки - после '\n' или одиночного '\r' (универсальные переводы строк);
+        # ищем только от предыдущей позиции, чтобы общий проход оставался линейным
+        line_break = max(buffer.rfind(b"\n", position, marker), buffer.rfind(b"\r", position, marker))
+        line_start = line_break + 1 if line_break >= 0 else position
+        line_end = buffer.find(b"\n", marker, end)
+        if line_end < 0:
+            line_end = end
+        carriage = buffer.find(b"\r", marker, line_end)
+        if carriage >= 0:
+            line_end = carriage
+        position = line_end
 
-    return None 
+        prefix = buffer[line_start:marker]
+        level = _LEVEL_BYTES.get(prefix)
+        if level is None:
+            # Строка с меткой времени: проверяем префикс целиком тем же шаблоном, что и LOG_LINE_RE
+            timestamped = _TIMESTAMPED_LEVEL_BYTES_RE.fullmatch(prefix)
+            if timestamped is None:
+                continue
+            level = timestamped.group(1).decode('ascii')
+        message = buffer[marker + marker_len:line_end]
+        if message.isascii():
+            path_match = REQUEST_PATH_BYTES_RE.search(message.strip(_ASCII_WHITESPACE))
+            if path_match:
+                yield level, path_match.group(1).split(b'?', 1)[0].decode('ascii')
+        else:
+            # Редкий случай: не-ASCII сообщение разбираем той же логикой, что и str-путь
+            handler = extract_handler(message.decode('utf-8', errors='ignore').strip())
+            if handler is not None:
+                yield level, handler
@@ -1,9 +1,221 @@
 import argparse
+import os
+import re
 import sys
 from pathlib import Path
-from typing import List
-from log_analyzer.analyzer import analyze_logs
-from log_analyzer.reporting import get_report_generator
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, TextIO, Tuple
+from log_analyzer.sources import is_stream_source, parse_source
+from log_analyzer.stats import RunStats, measure_stage
+
+# Анализатор, форматы, отчеты и вывод импортируются в функциях, которые их
+# используют: импорт CLI не платит за регулярные выражения разборщиков и
+# реестры, а имена отчетов и форматов проверяются после разбора аргументов
+# (см. _check_choices).
+if TYPE_CHECKING:
+    from log_analyzer.normalize import PathNormalizer
+    from log_analyzer.output import ReportWriter
+
+# Формат вывода по умолчанию (output.DEFAULT_OUTPUT_FORMAT); нужен до импорта output
+DEFAULT_OUTPUT_FORMAT = "table"
+
+def _positive_int(value: str) -> int:
+    """Тип для argparse: целое число больше нуля."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+def _positive_float(value: str) -> float:
+    """Тип для argparse: число больше нуля."""
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive number, got {value}")
+    return number
+
+def _timestamp(value: str) -> float:
+    """
+    Тип для argparse: метка времени в формате логов (секунды POSIX).
+    Допускаются сокращения без секунд и без времени.
+    """
+    from log_analyzer.log_parser import parse_timestamp
+
+    for candidate in (value, value + ":00", value + " 00:00:00"):
+        moment = parse_timestamp(candidate)
+        if moment is not None:
+            return moment
+    raise argparse.ArgumentTypeError(
+        f"unrecognized timestamp {value!r} (expected e.g. '2024-05-01 14:00' or '2024-05-01T14:00:00+02:00')"
+    )
+
+# Единицы ширины интервала --bucket
+_BUCKET_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def _bucket_width(value: str) -> int:
+    """Тип для argparse: ширина интервала вида 30s, 1m, 5m, 1h или 1d (в секундах)."""
+    match = re.fullmatch(r"(\d+)([smhd])", value.strip())
+    if not match or int(match.group(1)) < 1:
+        raise argparse.ArgumentTypeError(f"invalid bucket width {value!r} (expected e.g. 1m, 5m or 1h)")
+    return int(match.group(1)) * _BUCKET_UNITS[match.group(2)]
+
+def _report_names(value: str) -> List[str]:
+    """Тип для argparse: имена отчетов через запятую (по реестру проверяет _check_choices)."""
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    if not names:
+        raise argparse.ArgumentTypeError(f"no report names in {value!r}")
+    return list(dict.fromkeys(names))
+
+def _check_choice(parser: argparse.ArgumentParser, option: str, values: Sequence[str], choices: Sequence[str]) -> None:
+    """Сообщение и выход, как у choices в argparse, если значения нет среди choices."""
+    unknown = [value for value in values if value not in choices]
+    if unknown:
+        parser.error(
+            f"argument {option}: invalid choice: {', '.join(map(repr, unknown))} (choose from {', '.join(choices)})"
+        )
+
+def _check_choices(parser: argparse.ArgumentParser, args: argparse.Namespace) -> argparse.Namespace:
+    """
+    Проверяет значения, которые задаются реестрами модулей (отчеты, форматы
+    строк и вывода, ключи сортировки, движки), и подставляет их значения по
+    умолчанию. Модули импортируются только для тех аргументов, что есть у
+    парсера.
+    """
+    if getattr(args, "report", None) is not None:
+        from log_analyzer.reporting import get_available_report_names
+
+        _check_choice(parser, "--report", args.report, get_available_report_names())
+    if hasattr(args, "log_format"):
+        from log_analyzer.formats import AUTO_FORMAT, get_format_names
+
+        if args.log_format is None:
+            args.log_format = AUTO_FORMAT
+        _check_choice(parser, "--log-format", [args.log_format], get_format_names())
+    if hasattr(args, "engine"):
+        from log_analyzer.analyzer import DEFAULT_CHUNK_SIZE, DEFAULT_ENGINE, ENGINES
+
+        if args.engine is None:
+            args.engine = DEFAULT_ENGINE
+        if args.chunk_size is None:
+            args.chunk_size = DEFAULT_CHUNK_SIZE // (1024 * 1024)
+        _check_choice(parser, "--engine", [args.engine], ENGINES)
+    if hasattr(args, "format"):
+        from log_analyzer.output import OUTPUT_FORMATS
+
+        _check_choice(parser, "--format", [args.format], OUTPUT_FORMATS)
+    if hasattr(args, "sort_by"):
+        from log_analyzer.sketch import SORT_KEYS
+
+        _check_choice(parser, "--sort-by", [args.sort_by], SORT_KEYS)
+    return args
+
+def _add_log_format_argument(parser: argparse.ArgumentParser) -> None:
+    """Добавляет --log-format (общий для анализа и ingest)."""
+    parser.add_argument(
+        "--log-format",
+        type=str,
+        default=None,
+        help="Log line format: 'django' ([time] LEVEL:logger:message), 'gunicorn' and 'nginx' access logs "
+             "(level derived from the status code), 'json' (structlog/python-json-logger), or 'auto' to detect "
+             "the formats of every file from its first 8 KB (default: auto).",
+    )
+
+def _add_analysis_arguments(parser: argparse.ArgumentParser) -> None:
+    """Добавляет настройки разбора и отбора записей (общие для анализа и map)."""
+    parser.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes for parallel analysis (default: CPU count).",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=_positive_int,
+        default=None,
+        help="Size in MB of the byte ranges large files are split into for parallel analysis.",
+    )
+    parser.add_argument(
+        "--engine",
+        type=str,
+        default=None,
+        help="Parsing engine: 'lines' decodes every line, 'mmap' scans raw bytes (default: lines).",
+    )
+    _add_log_format_argument(parser)
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=None,
+        metavar="CACHE_FILE",
+        help="SQLite cache for incremental analysis: only newly appended data is parsed on the next run.",
+    )
+    parser.add_argument(
+        "--normalize",
+        action="store_true",
+        help="Collapse numeric IDs, UUIDs and hex hashes in paths into {id}, {uuid} and {hash}.",
+    )
+    parser.add_argument(
+        "--normalize-rule",
+        action="append",
+        default=[],
+        metavar="REGEX=REPLACEMENT",
+        help="Extra path normalization rule applied with re.sub (can be repeated).",
+    )
+    parser.add_argument(
+        "--route-file",
+        type=Path,
+        default=None,
+        help="File with Django URLconf-style route templates (e.g. /api/users/<int:pk>/), one per line.",
+    )
+    parser.add_argument(
+        "--approx",
+        type=_positive_int,
+        default=None,
+        metavar="CAPACITY",
+        help="Approximate heavy hitters with a Space-Saving sketch of CAPACITY counters (bounded memory; "
+             "estimates overcount by at most N/CAPACITY). Also caps the signatures tracked by 'error_signatures'.",
+    )
+    parser.add_argument(
+        "--since",
+        type=_timestamp,
+        default=None,
+        metavar="TIME",
+        help="Only count records at or after TIME (e.g. '2024-05-01 14:00'; without an offset, log and "
+             "argument times are compared as UTC). Records without a timestamp are skipped.",
+    )
+    parser.add_argument(
+        "--until",
+        type=_timestamp,
+        default=None,
+        metavar="TIME",
+        help="Only count records before TIME. Uncompressed files are read only in the region located "
+             "through a sparse timestamp index.",
+    )
+    parser.add_argument(
+        "--bucket",
+        type=_bucket_width,
+        default=None,
+        metavar="WIDTH",
+        help="Bucket width for the 'timeline' report: 30s, 1m, 5m, 1h, 1d (default: 1m).",
+    )
+
+def _add_output_arguments(parser: argparse.ArgumentParser) -> None:
+    """Добавляет --format, --output и --no-progress (общие для анализа и reduce)."""
+    parser.add_argument(
+        "--format",
+        type=str,
+        default=DEFAULT_OUTPUT_FORMAT,
+        help="Report output format (default: table). Rows are streamed in report order.",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help="Write the reports to FILE instead of stdout.",
+    )
+    parser.add_argument(
+        "--no-progress",
+        action="store_true",
+        help="Do not print per-file progress messages (always off for --format csv/json/ndjson on stdout).",
+    )
 
 def parse_arguments(args: List[str] = None) -> argparse.Namespace:
     """Парсит аргументы командной строки."""
@@ -15,37 +227,522 @@ def parse_arguments(args: List[str] = None) -> argparse.Namespace:
         metavar="LOG_FILE",
         type=str,
         nargs='+',
-        help="Path(s) to log file(s).",
+        help="Path(s) to log file(s) or to columnar stores created by the 'ingest' command. Stream sources "
+             "are read concurrently: '-' (stdin), named pipes, tcp://HOST:PORT and unix://PATH (listening sockets "
+             "accepting any number of senders).",
     )
     parser.add_argument(
         "--report",
+        type=_report_names,
+        required=True,
+        metavar="NAME[,NAME...]",
+        help="Comma-separated report names, all computed in a single pass over the logs "
+             "(an unknown name lists the available reports).",
+    )
+    _add_analysis_arguments(parser)
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Follow the files like 'tail -F' and keep re-rendering the report as new lines arrive.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=_positive_float,
+        default=2.0,
+        help="Report refresh interval in seconds for --follow (default: 2).",
+    )
+    parser.add_argument(
+        "--from-end",
+        action="store_true",
+        help="With --follow, skip the existing contents of the files and count only new lines "
+             "(like 'tail -F -n 0').",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=_positive_float,
+        default=None,
+        metavar="SECONDS",
+        help="Stop listening on tcp:// and unix:// sources after SECONDS without new data "
+             "(default: until Ctrl+C or SIGTERM, then print the report).",
+    )
+    parser.add_argument(
+        "--top",
+        type=_positive_int,
+        default=None,
+        metavar="K",
+        help="Show only the K heaviest handlers instead of all handlers in alphabetical order.",
+    )
+    parser.add_argument(
+        "--sort-by",
+        type=str,
+        default="total",
+        help="Ranking key for --top and --approx: total number of records or a log level (default: total).",
+    )
+    _add_output_arguments(parser)
+    parser.add_argument(
+        "--stats",
         type=str,
+        default=None,
+        metavar="STATS_FILE",
+        help="Write a JSON summary of per-stage and per-file timings, bytes read, matched and rejected "
+             "lines and peak memory ('-' for stderr). Cheap enough to leave on.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        default=None,
+        metavar="PROFILE_FILE",
+        help="Run under cProfile and dump pstats data to this file (profiles the main process; "
+             "use --workers 1 to include parsing).",
+    )
+    return _check_choices(parser, parser.parse_args(args))
+
+def parse_ingest_arguments(args: List[str] = None) -> argparse.Namespace:
+    """Парсит аргументы подкоманды ingest."""
+    parser = argparse.ArgumentParser(
+        prog="log_analyzer ingest",
+        description="Parse logs once into a columnar store that reports can read without re-parsing.",
+    )
+    parser.add_argument("log_files", metavar="LOG_FILE", type=Path, nargs='+', help="Path(s) to log file(s).")
+    parser.add_argument(
+        "--output",
+        type=Path,
         required=True,
-        choices=['handlers'],  # В MVP жестко задаем единственный отчет
-        help="Report name (only 'handlers' supported in MVP).",
+        metavar="STORE_DIR",
+        help="Directory of the columnar store (an existing store there is replaced).",
+    )
+    _add_log_format_argument(parser)
+    parser.add_argument("--no-progress", action="store_true", help="Do not print per-file progress messages.")
+    return _check_choices(parser, parser.parse_args(args))
+
+def ingest_main(argv: List[str]) -> None:
+    """Подкоманда ingest: разбирает логи в колоночное хранилище."""
+    from log_analyzer.columnar import ingest_logs
+
+    args = parse_ingest_arguments(argv)
+    for path in args.log_files:
+        if not path.is_file():
+            print(f"Error: File not found: {path}", file=sys.stderr)
+            sys.exit(1)
+    try:
+        summary = ingest_logs(args.log_files, args.output, args.log_format, progress=not args.no_progress)
+    except OSError as e:
+        print(f"Error: Could not write columnar store {args.output}: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(
+        f"Ingested {summary.rows} records from {summary.files} file(s) "
+        f"({summary.bytes_read} bytes) in {summary.seconds:.2f}s into {args.output}"
+    )
+
+def parse_serve_arguments(args: List[str] = None) -> argparse.Namespace:
+    """Парсит аргументы подкоманды serve."""
+    from log_analyzer.client import default_socket_path
+
+    parser = argparse.ArgumentParser(
+        prog="log_analyzer serve",
+        description="Keep the analyzer loaded in a local daemon; run commands through "
+                    "'python -m log_analyzer.client' to skip interpreter startup and imports.",
+    )
+    parser.add_argument(
+        "--socket",
+        type=str,
+        default=default_socket_path(),
+        metavar="PATH",
+        help="Unix socket to listen on (default: $LOG_ANALYZER_SOCKET, log_analyzer-UID.sock "
+             "in $XDG_RUNTIME_DIR or server.sock in a private log_analyzer-UID directory "
+             "in the temporary directory).",
     )
     return parser.parse_args(args)
 
-def main() -> None:
-    """Основная функция MVP."""
-    args = parse_arguments()
+def serve_main(argv: List[str]) -> None:
+    """Подкоманда serve: прогретый сервер на Unix-сокете."""
+    from log_analyzer.server import serve
+
+    args = parse_serve_arguments(argv)
+    try:
+        serve(args.socket)
+    except (OSError, RuntimeError) as e:
+        print(f"Error: Could not start server on {args.socket}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+def parse_map_arguments(args: List[str] = None) -> argparse.Namespace:
+    """Парсит аргументы подкоманды map."""
+    parser = argparse.ArgumentParser(
+        prog="log_analyzer map",
+        description="Analyze local logs into a compact partial result that 'reduce' merges with the "
+                    "partial results of other hosts.",
+    )
+    parser.add_argument(
+        "log_files",
+        metavar="LOG_FILE",
+        type=Path,
+        nargs='+',
+        help="Path(s) to log file(s) or to columnar stores created by the 'ingest' command.",
+    )
+    parser.add_argument(
+        "--report",
+        type=_report_names,
+        required=True,
+        metavar="NAME[,NAME...]",
+        help="Comma-separated report names (see the analysis command's --report).",
+    )
+    _add_analysis_arguments(parser)
+    parser.add_argument(
+        "--sort-by",
+        type=str,
+        default="total",
+        help="Ranking key of the --approx sketch: total number of records or a log level (default: total).",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        required=True,
+        metavar="PARTIAL_FILE",
+        help="Partial result file to write (gzip-compressed JSON lines, replaced atomically).",
+    )
+    parser.add_argument("--no-progress", action="store_true", help="Do not print per-file progress messages.")
+    return _check_choices(parser, parser.parse_args(args))
+
+def map_main(argv: List[str]) -> None:
+    """Подкоманда map: анализирует локальные логи в частичный результат."""
+    from log_analyzer.analyzer import ScanOptions, analyze_logs
+    from log_analyzer.columnar import is_columnar_store
+    from log_analyzer.partial import describe_sources, partial_options, write_partial
+
+    args = parse_map_arguments(argv)
+    normalizer = _build_normalizer(args)
+    report_names: List[str] = args.report
+    _check_time_arguments(args, report_names)
+    for path in args.log_files:
+        if not path.is_file() and not is_columnar_store(path):
+            print(f"Error: File not found: {path}", file=sys.stderr)
+            sys.exit(1)
+
+    options = ScanOptions(
+        normalizer=normalizer,
+        sketch_capacity=args.approx,
+        sort_by=args.sort_by,
+        since=args.since,
+        until=args.until,
+        bucket=args.bucket,
+        log_format=args.log_format,
+    )
+    single_report = len(report_names) == 1
+    try:
+        aggregated_data = analyze_logs(
+            args.log_files,
+            report_names[0] if single_report else report_names,
+            workers=args.workers,
+            chunk_size=args.chunk_size * 1024 * 1024,
+            engine=args.engine,
+            cache_path=args.cache,
+            normalizer=normalizer,
+            sketch_capacity=args.approx,
+            sort_by=args.sort_by,
+            since=args.since,
+            until=args.until,
+            bucket=args.bucket,
+            progress=not args.no_progress,
+            log_format=args.log_format,
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    report_data = {report_names[0]: aggregated_data} if single_report else aggregated_data
+    try:
+        write_partial(args.output, report_data, partial_options(options), describe_sources(args.log_files))
+    except (OSError, ValueError) as e:
+        print(f"Error: Could not write partial result {args.output}: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Wrote partial result for '{', '.join(report_names)}' from {len(args.log_files)} file(s) to {args.output}")
+
+def parse_reduce_arguments(args: List[str] = None) -> argparse.Namespace:
+    """Парсит аргументы подкоманды reduce."""
+    parser = argparse.ArgumentParser(
+        prog="log_analyzer reduce",
+        description="Merge partial results written by 'map' (one file at a time) and render the reports, "
+                    "or write the merged partial result for the next level of a merge tree.",
+    )
+    parser.add_argument(
+        "partial_files",
+        metavar="PARTIAL_FILE",
+        type=Path,
+        nargs='+',
+        help="Partial result files written by 'map' or by 'reduce --partial-output'.",
+    )
+    parser.add_argument(
+        "--report",
+        type=_report_names,
+        default=None,
+        metavar="NAME[,NAME...]",
+        help="Render or keep only these reports (default: every report in the partial results).",
+    )
+    parser.add_argument(
+        "--partial-output",
+        type=Path,
+        default=None,
+        metavar="PARTIAL_FILE",
+        help="Write the merged partial result to PARTIAL_FILE instead of rendering the reports.",
+    )
+    parser.add_argument(
+        "--top",
+        type=_positive_int,
+        default=None,
+        metavar="K",
+        help="Show only the K heaviest handlers instead of all handlers in alphabetical order.",
+    )
+    parser.add_argument(
+        "--sort-by",
+        type=str,
+        default="total",
+        help="Ranking key for --top: total number of records or a log level (default: total).",
+    )
+    _add_output_arguments(parser)
+    return _check_choices(parser, parser.parse_args(args))
+
+def reduce_main(argv: List[str]) -> None:
+    """Подкоманда reduce: объединяет частичные результаты и выводит отчеты."""
+    from log_analyzer.compression import READ_ERRORS
+    from log_analyzer.partial import reduce_partials, write_partial
+
+    args = parse_reduce_arguments(argv)
+    for path in args.partial_files:
+        if not path.is_file():
+            print(f"Error: File not found: {path}", file=sys.stderr)
+            sys.exit(1)
+    writing_partial = args.partial_output is not None
+    progress = not args.no_progress and (writing_partial or args.format == DEFAULT_OUTPUT_FORMAT or args.output is not None)
+    try:
+        result = reduce_partials(args.partial_files, progress=progress)
+    except READ_ERRORS + (ValueError,) as e:
+        print(f"Error: Could not merge partial results: {e}", file=sys.stderr)
+        sys.exit(1)
+    report_names: List[str] = args.report or result.header.reports
+    missing = [name for name in report_names if name not in result.reports]
+    if missing:
+        print(
+            f"Error: Report {', '.join(missing)} is not in the partial results "
+            f"(available: {', '.join(result.header.reports)}).",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    if writing_partial:
+        try:
+            write_partial(
+                args.partial_output,
+                {name: result.reports[name] for name in report_names},
+                result.header.options,
+                result.header.sources,
+            )
+        except OSError as e:
+            print(f"Error: Could not write partial result {args.partial_output}: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(
+            f"Merged {result.files} partial result(s) covering {len(result.header.sources)} file(s) "
+            f"into {args.partial_output}"
+        )
+        return
+
+    output_stream, writer = _open_writer(args)
+    try:
+        _render_reports(writer, report_names, result.reports, args.top, args.sort_by)
+    finally:
+        if output_stream is not sys.stdout:
+            output_stream.close()
+
+def _build_normalizer(args: argparse.Namespace) -> Optional["PathNormalizer"]:
+    """Нормализатор путей по --normalize, --normalize-rule и --route-file; при ошибке - выход."""
+    from log_analyzer.normalize import build_normalizer
+
+    try:
+        return build_normalizer(args.normalize, args.normalize_rule, args.route_file)
+    except (OSError, ValueError, re.error) as e:
+        print(f"Error: Invalid path normalization settings: {e}", file=sys.stderr)
+        sys.exit(1)
+
+def _check_time_arguments(args: argparse.Namespace, report_names: List[str]) -> None:
+    """Проверяет --since, --until и --bucket; при ошибке - выход."""
+    if args.since is not None and args.until is not None and args.since >= args.until:
+        print("Error: --since must be earlier than --until.", file=sys.stderr)
+        sys.exit(1)
+    if args.bucket is not None and "timeline" not in report_names:
+        print("Error: --bucket applies only to the 'timeline' report.", file=sys.stderr)
+        sys.exit(1)
+
+def _open_writer(args: argparse.Namespace) -> Tuple[TextIO, "ReportWriter"]:
+    """Открывает вывод --output (или stdout) и создает writer формата --format; при ошибке - выход."""
+    from log_analyzer.output import create_writer
+
+    output_stream = sys.stdout
+    if args.output is not None:
+        try:
+            output_stream = open(args.output, 'w', encoding='utf-8', newline='')
+        except OSError as e:
+            print(f"Error: Could not open output file {args.output}: {e}", file=sys.stderr)
+            sys.exit(1)
+    return output_stream, create_writer(args.format, output_stream)
+
+def _render_reports(
+    writer: "ReportWriter", report_names: List[str], report_data: Dict[str, Any], top: Optional[int], sort_by: str
+) -> None:
+    """Выводит отчеты report_names по их данным и закрывает writer."""
+    from log_analyzer.reporting import get_report_generator
+
+    for report_name in report_names:
+        report_generator = get_report_generator(report_name)
+        with writer.report(report_name):
+            report_generator.generate(report_data[report_name], top=top, sort_by=sort_by, writer=writer)
+    writer.close()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Основная функция MVP. argv - аргументы без имени программы
+    (по умолчанию sys.argv[1:]; сервер передает аргументы клиента).
+    """
+    command_args = sys.argv[1:] if argv is None else argv
+    if command_args[:1] == ["ingest"]:
+        ingest_main(command_args[1:])
+        return
+    if command_args[:1] == ["serve"]:
+        serve_main(command_args[1:])
+        return
+    if command_args[:1] == ["map"]:
+        map_main(command_args[1:])
+        return
+    if command_args[:1] == ["reduce"]:
+        reduce_main(command_args[1:])
+        return
+    args = parse_arguments(argv)
+    from log_analyzer.analyzer import HANDLERS_REPORT, analyze_logs
+
+    normalizer = _build_normalizer(args)
+
+    if args.approx is not None and args.cache is not None:
+        print("Error: --approx cannot be combined with --cache.", file=sys.stderr)
+        sys.exit(1)
+    if args.from_end and not args.follow:
+        print("Error: --from-end requires --follow.", file=sys.stderr)
+        sys.exit(1)
+    if args.follow and (args.stats is not None or args.profile is not None):
+        print("Error: --stats and --profile cannot be combined with --follow.", file=sys.stderr)
+        sys.exit(1)
+    report_names: List[str] = args.report
+    if (args.follow or args.cache is not None) and report_names != [HANDLERS_REPORT]:
+        print(f"Error: --follow and --cache support only the '{HANDLERS_REPORT}' report.", file=sys.stderr)
+        sys.exit(1)
+    time_filtered = args.since is not None or args.until is not None
+    if time_filtered and (args.follow or args.cache is not None):
+        print("Error: --since and --until cannot be combined with --follow or --cache.", file=sys.stderr)
+        sys.exit(1)
+    _check_time_arguments(args, report_names)
+    if args.follow and (args.format != DEFAULT_OUTPUT_FORMAT or args.output is not None):
+        print("Error: --format and --output cannot be combined with --follow.", file=sys.stderr)
+        sys.exit(1)
+    streaming = any(is_stream_source(file_str) for file_str in args.log_files)
+    if streaming and (args.follow or args.cache is not None):
+        print("Error: stream sources cannot be combined with --follow or --cache.", file=sys.stderr)
+        sys.exit(1)
+
+    if args.follow:
+        # В режиме слежения файлы могут появиться позже (как у tail -F)
+        from log_analyzer.follow import follow_logs
+        follow_logs(
+            [Path(file_str) for file_str in args.log_files],
+            interval=args.interval,
+            from_end=args.from_end,
+            normalizer=normalizer,
+            top=args.top,
+            sort_by=args.sort_by,
+            log_format=args.log_format,
+            sketch_capacity=args.approx,
+        )
+        return
+
+    from log_analyzer.columnar import is_columnar_store
 
     log_file_paths: List[Path] = []
     for file_str in args.log_files:
+        if is_stream_source(file_str):
+            try:
+                parse_source(file_str)
+            except ValueError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
+            continue
         path = Path(file_str)
-        if not path.is_file():
+        if streaming and is_columnar_store(path):
+            print(f"Error: Columnar store {path} cannot be combined with stream sources.", file=sys.stderr)
+            sys.exit(1)
+        if not path.is_file() and not is_columnar_store(path):
             print(f"Error: File not found: {path}", file=sys.stderr)
             sys.exit(1)
         log_file_paths.append(path)
 
+    # Машиночитаемый вывод в stdout нельзя перемежать строками индикации
+    progress = not args.no_progress and (args.format == DEFAULT_OUTPUT_FORMAT or args.output is not None)
+    output_stream, writer = _open_writer(args)
+
+    stats = RunStats() if args.stats is not None else None
+    profiler = None
+    if args.profile is not None:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
     try:
-        aggregated_data = analyze_logs(log_file_paths, args.report)
-        report_generator = get_report_generator(args.report)
-        report_generator.generate(aggregated_data)
+        # Один отчет - его данные, несколько - словарь имя -> данные за один проход
+        single_report = len(report_names) == 1
+        if streaming:
+            # Потоки и файлы рядом с ними читаются конкурентно в одном цикле asyncio
+            from log_analyzer.streams import analyze_streams
+            aggregated_data = analyze_streams(
+                args.log_files,
+                report_names[0] if single_report else report_names,
+                normalizer=normalizer,
+                sketch_capacity=args.approx,
+                sort_by=args.sort_by,
+                stats=stats,
+                since=args.since,
+                until=args.until,
+                bucket=args.bucket,
+                progress=progress,
+                idle_timeout=args.idle_timeout,
+                log_format=args.log_format,
+            )
+        else:
+            aggregated_data = analyze_logs(
+                log_file_paths,
+                report_names[0] if single_report else report_names,
+                workers=args.workers,
+                chunk_size=args.chunk_size * 1024 * 1024,
+                engine=args.engine,
+                cache_path=args.cache,
+                normalizer=normalizer,
+                sketch_capacity=args.approx,
+                sort_by=args.sort_by,
+                stats=stats,
+                since=args.since,
+                until=args.until,
+                bucket=args.bucket,
+                progress=progress,
+                log_format=args.log_format,
+            )
+        report_data = {report_names[0]: aggregated_data} if single_report else aggregated_data
+        with measure_stage(stats, "report"):
+            _render_reports(writer, report_names, report_data, args.top, args.sort_by)
+        if stats is not None:
+            stats.write(args.stats)
 
     except Exception as e:
         print(f"An unexpected error occurred: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if output_stream is not sys.stdout:
+            output_stream.close()
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,149 @@
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, List, Optional, Pattern, Sequence, Tuple
+
+# Встроенные правила: применяются к каждому сегменту пути целиком, первое совпадение побеждает.
+# Hex-хэшем считается сегмент не короче 16 символов, чтобы не задеть слова вроде "cafe".
+BUILTIN_SEGMENT_RULES: List[Tuple[str, str]] = [
+    (r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}", "{uuid}"),
+    (r"\d+", "{id}"),
+    (r"[0-9a-fA-F]{16,}", "{hash}"),
+]
+
+# Регулярные выражения конвертеров Django URLconf (<int:pk>, <slug:name>, ...)
+DJANGO_CONVERTERS = {
+    "int": r"[0-9]+",
+    "str": r"[^/]+",
+    "slug": r"[-a-zA-Z0-9_]+",
+    "uuid": r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}",
+    "path": r".+",
+}
+_ROUTE_PARAM_RE = re.compile(r"<(?:(?P<converter>[^>:]+):)?(?P<name>[^>]+)>")
+
+DEFAULT_MEMO_SIZE = 65536
+
+
+def compile_route_template(template: str) -> Pattern[str]:
+    """
+    Компилирует шаблон маршрута в стиле Django (/api/users/<int:user_id>/)
+    в регулярное выражение для полного совпадения с путем.
+    """
+    parts: List[str] = []
+    position = 0
+    for match in _ROUTE_PARAM_RE.finditer(template):
+        parts.append(re.escape(template[position:match.start()]))
+        converter = match.group("converter") or "str"
+        if converter not in DJANGO_CONVERTERS:
+            raise ValueError(f"Unknown route converter '{converter}' in template: {template}")
+        parts.append(f"(?:{DJANGO_CONVERTERS[converter]})")
+        position = match.end()
+    parts.append(re.escape(template[position:]))
+    return re.compile("".join(parts))
+
+
+def load_route_templates(route_file: Path) -> List[str]:
+    """Читает шаблоны маршрутов из файла: по одному на строку, '#' - комментарий."""
+    templates = []
+    with route_file.open('r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                templates.append(line)
+    return templates
+
+
+def parse_rule(rule: str) -> Tuple[str, str]:
+    """Разбирает пользовательское правило 'REGEX=REPLACEMENT'."""
+    pattern, separator, replacement = rule.rpartition('=')
+    if not separator or not pattern:
+        raise ValueError(f"Normalization rule must look like REGEX=REPLACEMENT, got: {rule}")
+    re.compile(pattern)  # Проверяем синтаксис заранее
+    return pattern, replacement
+
+
+class PathNormalizer:
+    """
+    Сводит конкретные пути к шаблонам, чтобы уменьшить число различных хэндлеров.
+
+    Порядок применения: первый подходящий шаблон маршрута (возвращается как есть),
+    затем пользовательские правила (re.sub по всему пути), затем встроенные
+    правила для сегментов (UUID, hex-хэши, числовые ID). Результат запоминается
+    в LRU-кэше, поэтому правила выполняются один раз на каждый различный путь.
+    """
+
+    def __init__(
+        self,
+        builtin: bool = True,
+        rules: Sequence[Tuple[str, str]] = (),
+        templates: Sequence[str] = (),
+        memo_size: int = DEFAULT_MEMO_SIZE,
+    ):
+        self.builtin = builtin
+        self.rules = [(pattern, replacement) for pattern, replacement in rules]
+        self.templates = list(templates)
+        self.memo_size = memo_size
+        self._compile()
+
+    def _compile(self) -> None:
+        self._template_res = [(compile_route_template(t), t) for t in self.templates]
+        self._rule_res = [(re.compile(p), r) for p, r in self.rules]
+        self._segment_res = [(re.compile(p), r) for p, r in BUILTIN_SEGMENT_RULES] if self.builtin else []
+        self._memo: Callable[[str], str] = lru_cache(maxsize=self.memo_size)(self._normalize_uncached)
+
+    # lru_cache-обертка не сериализуется pickle: передаем в процессы только конфигурацию
+    def __getstate__(self) -> dict:
+        return {
+            "builtin": self.builtin,
+            "rules": self.rules,
+            "templates": self.templates,
+            "memo_size": self.memo_size,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._compile()
+
+    def _normalize_segment(self, segment: str) -> str:
+        for pattern, replacement in self._segment_res:
+            if pattern.fullmatch(segment):
+                return replacement
+        return segment
+
+    def _normalize_uncached(self, path: str) -> str:
+        for pattern, template in self._template_res:
+            if pattern.fullmatch(path):
+                return template
+        for pattern, replacement in self._rule_res:
+            path = pattern.sub(replacement, path)
+        if self._segment_res:
+            path = "/".join(self._normalize_segment(segment) for segment in path.split("/"))
+        return path
+
+    def __call__(self, path: str) -> str:
+        """Возвращает нормализованный путь (с мемоизацией)."""
+        return self._memo(path)
+
+    def fingerprint(self) -> str:
+        """Отпечаток конфигурации: результаты с разной нормализацией несовместимы."""
+        import hashlib  # Нужен только кэшу; не замедляет запуск без --cache
+
+        description = repr((self.builtin, BUILTIN_SEGMENT_RULES, self.rules, self.templates))
+        return hashlib.blake2b(description.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def build_normalizer(
+    builtin: bool = False,
+    rules: Sequence[str] = (),
+    route_file: Optional[Path] = None,
+    memo_size: int = DEFAULT_MEMO_SIZE,
+) -> Optional[PathNormalizer]:
+    """
+    Создает нормализатор из параметров командной строки.
+    Возвращает None, если нормализация не запрошена.
+    """
+    templates = load_route_templates(route_file) if route_file is not None else []
+    parsed_rules = [parse_rule(rule) for rule in rules]
+    if not builtin and not parsed_rules and not templates:
+        return None
+    return PathNormalizer(builtin=builtin, rules=parsed_rules, templates=templates, memo_size=memo_size)
@@ -0,0 +1,345 @@
+"""
+Вывод отчетов в разных форматах.
+
+Отчет описывает результат через ReportWriter: итоговые значения
+(summary), таблицы 'ключ x столбцы' (table) и рейтинги 'число - ключ'
+(ranking). Строки таблиц передаются итератором и форматируются по одной;
+готовый текст копится пачками по WRITE_BATCH_ROWS строк и пишется в поток
+одним вызовом write, а не print на каждую строку. Модули csv и json
+импортируются только при создании вывода соответствующего формата.
+"""
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Type, Union
+
+# Ключ строки: одна колонка (str) или несколько (tuple), как заголовок key_title
+RowKey = Union[str, Tuple[str, ...]]
+Row = Tuple[RowKey, Sequence[Any]]
+
+OUTPUT_FORMATS: Tuple[str, ...] = ("table", "csv", "json", "ndjson")
+DEFAULT_OUTPUT_FORMAT = "table"
+# Сколько строк текста копится перед одной записью в поток
+WRITE_BATCH_ROWS = 4096
+# Ширина числовых столбцов текстовой таблицы
+COLUMN_WIDTH = 8
+# Ширина столбца ключа, если строк нет
+DEFAULT_KEY_WIDTH = 10
+
+
+def _field_names(key_title: Union[str, Tuple[str, ...]]) -> List[str]:
+    """Имена полей ключа для машиночитаемых форматов: заголовки в нижнем регистре."""
+    titles = key_title if isinstance(key_title, tuple) else (key_title,)
+    return [title.lower() for title in titles]
+
+
+class ReportWriter(ABC):
+    """
+    Базовый класс вывода. Вызывающий код открывает каждый отчет через
+    report(name), отчет внутри вызывает summary/table/ranking/empty.
+    По окончании нужно вызвать close(), чтобы записать накопленное.
+    """
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self._pending: List[str] = []
+        self._reports = 0
+        self.report_name = ""
+
+    def _emit(self, text: str) -> None:
+        pending = self._pending
+        pending.append(text)
+        if len(pending) >= WRITE_BATCH_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        """Записывает накопленный текст в поток одним вызовом."""
+        if self._pending:
+            self.stream.write("".join(self._pending))
+            self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self.stream.flush()
+
+    @contextmanager
+    def report(self, name: str) -> Iterator[None]:
+        """Обрамляет вывод одного отчета."""
+        self._begin_report(name)
+        yield
+        self._end_report()
+        self._reports += 1
+
+    def _begin_report(self, name: str) -> None:
+        self.report_name = name
+
+    def _end_report(self) -> None:
+        pass
+
+    @abstractmethod
+    def summary(self, text: str, **values: Any) -> None:
+        """Итог отчета: text - строка для таблицы, values - те же данные для машиночитаемых форматов."""
+
+    @abstractmethod
+    def table(
+        self,
+        name: str,
+        key_title: Union[str, Tuple[str, ...]],
+        columns: Sequence[str],
+        rows: Iterable[Row],
+        totals: Optional[Sequence[int]] = None,
+        title: Optional[str] = None,
+        key_width: Optional[int] = None,
+    ) -> None:
+        """
+        Таблица name: ключ (одна или несколько колонок key_title) и столбцы
+        columns. rows может быть итератором; key_width - наибольшая длина
+        ключа, если вызывающий знает ее заранее (иначе строки собираются в
+        список, чтобы ее найти).
+        """
+
+    @abstractmethod
+    def ranking(self, name: str, title: str, key_title: str, rows: Iterable[Tuple[str, int]]) -> None:
+        """Рейтинг name: пары (ключ, число) в порядке вывода."""
+
+    def empty(self, report_name: str) -> None:
+        """Отчету нечего выводить (в машиночитаемых форматах - пустой результат)."""
+
+
+class TableWriter(ReportWriter):
+    """Текстовые таблицы для терминала (формат 'table')."""
+
+    def _begin_report(self, name: str) -> None:
+        super()._begin_report(name)
+        if self._reports:
+            self._emit("\n")
+
+    def summary(self, text: str, **values: Any) -> None:
+        self._emit(f"{text}\n\n")
+
+    def table(
+        self,
+        name: str,
+        key_title: Union[str, Tuple[str, ...]],
+        columns: Sequence[str],
+        rows: Iterable[Row],
+        totals: Optional[Sequence[int]] = None,
+        title: Optional[str] = None,
+        key_width: Optional[int] = None,
+    ) -> None:
+        multi_key = isinstance(key_title, tuple)
+        if multi_key:
+            key_title = "  ".join(key_title)
+            rows = (("  ".join(key), values) for key, values in rows)
+        if key_width is None or multi_key:
+            rows = list(rows)
+            key_width = max((len(key) for key, _ in rows), default=DEFAULT_KEY_WIDTH)
+        key_width = max(len(key_title), key_width)
+        # Одна строка формата на таблицу: строка вывода собирается одной операцией %
+        # (заметно быстрее str.format и посимвольного +=)
+        row_format = f"%-{key_width}s " + f"\t%{COLUMN_WIDTH}s" * len(columns) + "\n"
+
+        if title is not None:
+            self._emit(f"\n{title}\n")
+        header = row_format % (key_title, *columns)
+        rule = "-" * len(header[:-1].expandtabs(COLUMN_WIDTH)) + "\n"
+        self._emit(header)
+        self._emit(rule)
+        emit = self._emit
+        for key, values in rows:
+            emit(row_format % (key, *values))
+        self._emit(rule)
+        if totals is not None:
+            totals_format = f"%-{key_width}s " + f"\t%{COLUMN_WIDTH}s" * len(totals) + "\n"
+            self._emit(totals_format % ("", *totals))
+
+    def ranking(self, name: str, title: str, key_title: str, rows: Iterable[Tuple[str, int]]) -> None:
+        self._emit(f"\n{title}\n")
+        emit = self._emit
+        for key, count in rows:
+            emit(f"{count:>{COLUMN_WIDTH}}  {key}\n")
+
+    def empty(self, report_name: str) -> None:
+        self._emit(f"No relevant log data found for '{report_name}' report.\n")
+
+
+class CsvWriter(ReportWriter):
+    """
+    CSV: заголовок и строки каждой таблицы, без итоговых значений
+    (они выводятся из строк); таблицы разделены пустой строкой.
+    """
+
+    def __init__(self, stream: TextIO):
+        import csv
+
+        super().__init__(stream)
+        self._csv = csv.writer(self, lineterminator="\n")
+        self._tables = 0
+
+    def write(self, text: str) -> None:
+        """Прием строк от csv.writer (накапливаются пачками)."""
+        self._emit(text)
+
+    def _start_table(self) -> None:
+        if self._tables:
+            self._emit("\n")
+        self._tables += 1
+
+    def summary(self, text: str, **values: Any) -> None:
+        pass
+
+    def table(
+        self,
+        name: str,
+        key_title: Union[str, Tuple[str, ...]],
+        columns: Sequence[str],
+        rows: Iterable[Row],
+        totals: Optional[Sequence[int]] = None,
+        title: Optional[str] = None,
+        key_width: Optional[int] = None,
+    ) -> None:
+        self._start_table()
+        writerow = self._csv.writerow
+        if isinstance(key_title, tuple):
+            writerow([*key_title, *columns])
+            for key, values in rows:
+                writerow([*key, *values])
+        else:
+            writerow([key_title, *columns])
+            for key, values in rows:
+                writerow([key, *values])
+
+    def ranking(self, name: str, title: str, key_title: str, rows: Iterable[Tuple[str, int]]) -> None:
+        self._start_table()
+        writerow = self._csv.writerow
+        writerow([key_title, "COUNT"])
+        for key, count in rows:
+            writerow([key, count])
+
+
+class JsonWriter(ReportWriter):
+    """
+    Один JSON-объект: имя отчета -> {итоговые значения..., имя таблицы ->
+    {"rows": [...], "totals": {...}}}. Документ пишется по частям, строки
+    таблиц не собираются в памяти целиком.
+    """
+
+    def __init__(self, stream: TextIO):
+        from json import dumps
+
+        super().__init__(stream)
+        self._dumps = dumps
+        self._members = 0
+
+    def _begin_report(self, name: str) -> None:
+        super()._begin_report(name)
+        self._emit(("," if self._reports else "{") + self._dumps(name) + ":{")
+        self._members = 0
+
+    def _end_report(self) -> None:
+        self._emit("}")
+
+    def close(self) -> None:
+        self._emit("}\n" if self._reports else "{}\n")
+        super().close()
+
+    def _member(self, name: str) -> None:
+        self._emit(("," if self._members else "") + self._dumps(name) + ":")
+        self._members += 1
+
+    def summary(self, text: str, **values: Any) -> None:
+        for name, value in values.items():
+            self._member(name)
+            self._emit(self._dumps(value))
+
+    def _rows(self, fields: Sequence[str], rows: Iterable[Tuple[Sequence[Any], Sequence[Any]]]) -> None:
+        emit = self._emit
+        dumps = self._dumps
+        separator = ""
+        for keys, values in rows:
+            emit(separator + dumps(dict(zip(fields, (*keys, *values)))))
+            separator = ","
+
+    def table(
+        self,
+        name: str,
+        key_title: Union[str, Tuple[str, ...]],
+        columns: Sequence[str],
+        rows: Iterable[Row],
+        totals: Optional[Sequence[int]] = None,
+        title: Optional[str] = None,
+        key_width: Optional[int] = None,
+    ) -> None:
+        self._member(name)
+        self._emit('{"rows":[')
+        fields = _field_names(key_title) + list(columns)
+        if isinstance(key_title, tuple):
+            self._rows(fields, rows)
+        else:
+            self._rows(fields, (((key,), values) for key, values in rows))
+        self._emit("]")
+        if totals is not None:
+            self._emit(',"totals":' + self._dumps(dict(zip(columns, totals))))
+        self._emit("}")
+
+    def ranking(self, name: str, title: str, key_title: str, rows: Iterable[Tuple[str, int]]) -> None:
+        self._member(name)
+        self._emit('{"rows":[')
+        self._rows(_field_names(key_title) + ["count"], (((key,), (count,)) for key, count in rows))
+        self._emit("]}")
+
+
+class NdjsonWriter(ReportWriter):
+    """
+    JSON Lines: по объекту на строку таблицы ('report', 'table', поля
+    ключа и столбцов), на итоговые значения и на итоги таблицы.
+    """
+
+    def __init__(self, stream: TextIO):
+        from json import dumps
+
+        super().__init__(stream)
+        self._dumps = dumps
+
+    def _line(self, fields: Dict[str, Any]) -> None:
+        self._emit(self._dumps(fields) + "\n")
+
+    def summary(self, text: str, **values: Any) -> None:
+        self._line({"report": self.report_name, **values})
+
+    def table(
+        self,
+        name: str,
+        key_title: Union[str, Tuple[str, ...]],
+        columns: Sequence[str],
+        rows: Iterable[Row],
+        totals: Optional[Sequence[int]] = None,
+        title: Optional[str] = None,
+        key_width: Optional[int] = None,
+    ) -> None:
+        multi_key = isinstance(key_title, tuple)
+        fields = ["report", "table"] + _field_names(key_title) + list(columns)
+        prefix = (self.report_name, name)
+        line = self._line
+        for key, values in rows:
+            line(dict(zip(fields, (*prefix, *(key if multi_key else (key,)), *values))))
+        if totals is not None:
+            line({"report": self.report_name, "table": name, "totals": dict(zip(columns, totals))})
+
+    def ranking(self, name: str, title: str, key_title: str, rows: Iterable[Tuple[str, int]]) -> None:
+        field = _field_names(key_title)[0]
+        line = self._line
+        for key, count in rows:
+            line({"report": self.report_name, "table": name, field: key, "count": count})
+
+
+WRITERS: Dict[str, Type[ReportWriter]] = {
+    "table": TableWriter,
+    "csv": CsvWriter,
+    "json": JsonWriter,
+    "ndjson": NdjsonWriter,
+}
+
+
+def create_writer(output_format: str, stream: TextIO) -> ReportWriter:
+    """Создает вывод в формате из OUTPUT_FORMATS."""
+    return WRITERS[output_format](stream)
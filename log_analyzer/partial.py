@@ -0,0 +1,272 @@
+"""
+Частичные результаты для распределенного анализа (map/reduce).
+
+Подкоманда map анализирует логи на своем хосте и записывает частичный
+результат: данные каждого отчета (см. Aggregator.dump_partial) и
+метаданные. Подкоманда reduce объединяет любое число таких файлов и
+выводит отчеты или записывает объединенный частичный результат, который
+снова можно передать reduce (слияние деревом).
+
+Формат файла: gzip-сжатый текст UTF-8, по JSON-объекту на строку.
+Первая строка - заголовок:
+
+    {"format": "log_analyzer.partial", "version": 1, "reports": [...],
+     "options": {...}, "sources": [...], "created": ..., "host": ...}
+
+Далее по строке {"report": имя, "state": состояние} на каждый отчет
+заголовка в том же порядке. reduce читает файлы по одному, а строки
+отчетов по одной, так что в памяти находятся только объединенные
+агрегаторы и состояние одного отчета одного файла. Файлы читаются только
+как JSON (не pickle), поэтому их можно принимать с других хостов.
+"""
+import gzip
+import json
+import os
+import platform
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .analyzer import ScanOptions
+from .compression import open_log_binary
+from .reporting import Aggregator, BaseReport, get_report_generator
+
+PARTIAL_FORMAT = "log_analyzer.partial"
+# Версия формата: меняется при любом несовместимом изменении заголовка или состояний отчетов
+PARTIAL_FORMAT_VERSION = 1
+# Уровень сжатия gzip: частичные результаты пишутся один раз и передаются по сети
+COMPRESS_LEVEL = 6
+
+# Настройки, которые должны совпадать у объединяемых результатов: от них
+# зависят ключи и смысл счетчиков. Формат строк (log_format) может
+# отличаться от хоста к хосту и в сравнение не входит.
+COMPATIBLE_OPTIONS: Tuple[str, ...] = ("normalizer", "sketch_capacity", "sort_by", "since", "until", "bucket")
+
+
+class PartialHeader(NamedTuple):
+    """Заголовок частичного результата."""
+    reports: List[str]
+    # Настройки анализа (см. partial_options)
+    options: Dict[str, Any]
+    # Проанализированные файлы: {"host", "path", "size"}; у объединенного результата - всех частей
+    sources: List[Dict[str, Any]]
+    # Время создания (секунды POSIX) и хост, записавший файл
+    created: float
+    host: str
+
+    def scan_options(self) -> ScanOptions:
+        """Настройки для агрегаторов reduce (нормализация уже применена на хостах)."""
+        options = self.options
+        return ScanOptions(
+            sketch_capacity=options["sketch_capacity"],
+            sort_by=options["sort_by"],
+            since=options["since"],
+            until=options["until"],
+            bucket=options["bucket"],
+            progress=False,
+        )
+
+    def compatibility_key(self) -> Tuple[Any, ...]:
+        """Значения COMPATIBLE_OPTIONS и список отчетов."""
+        return (tuple(self.reports), *(self.options.get(name) for name in COMPATIBLE_OPTIONS))
+
+
+def partial_options(options: ScanOptions) -> Dict[str, Any]:
+    """Настройки анализа для заголовка частичного результата."""
+    return {
+        "normalizer": options.normalizer.fingerprint() if options.normalizer is not None else "",
+        "sketch_capacity": options.sketch_capacity,
+        # Ключ ранжирования влияет на данные только приближенной сводки
+        "sort_by": options.sort_by if options.sketch_capacity is not None else "total",
+        "since": options.since,
+        "until": options.until,
+        "bucket": options.bucket,
+        "log_format": options.log_format,
+    }
+
+def describe_sources(log_files: Iterable[Path]) -> List[Dict[str, Any]]:
+    """Описания проанализированных файлов для заголовка (размер каталога хранилища - 0)."""
+    host = platform.node()
+    return [
+        {"host": host, "path": str(path), "size": path.stat().st_size if path.is_file() else 0}
+        for path in log_files
+    ]
+
+
+def _get_report(name: str) -> BaseReport:
+    """Отчет из реестра по имени из частичного результата."""
+    report = get_report_generator(name)
+    if report is None:
+        raise ValueError(f"unknown report {name!r}")
+    return report
+
+
+def write_partial(
+    path: Path,
+    report_data: Dict[str, Any],
+    options: Dict[str, Any],
+    sources: List[Dict[str, Any]],
+) -> None:
+    """
+    Записывает частичный результат: report_data - имя отчета -> результат
+    finalize(). Файл заменяется атомарно, так что reduce не увидит
+    недописанный результат.
+
+    Raises:
+        ValueError: если отчет не поддерживает частичные результаты.
+        OSError: при ошибке записи.
+    """
+    states = []
+    for name, data in report_data.items():
+        aggregator: Any = _get_report(name).aggregator
+        try:
+            states.append({"report": name, "state": aggregator.dump_partial(data)})
+        except NotImplementedError:
+            raise ValueError(f"Report '{name}' does not support partial results") from None
+    header = {
+        "format": PARTIAL_FORMAT,
+        "version": PARTIAL_FORMAT_VERSION,
+        "reports": list(report_data),
+        "options": options,
+        "sources": sources,
+        "created": time.time(),
+        "host": platform.node(),
+    }
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=COMPRESS_LEVEL) as f:
+            for item in (header, *states):
+                f.write(json.dumps(item, separators=(',', ':')))
+                f.write("\n")
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _parse_header(line: str, path: Path) -> PartialHeader:
+    """Проверяет формат и версию заголовка."""
+    try:
+        header = json.loads(line)
+    except ValueError:
+        header = None
+    if not isinstance(header, dict) or header.get("format") != PARTIAL_FORMAT:
+        raise ValueError(f"{path} is not a partial result file")
+    version = header.get("version")
+    if version != PARTIAL_FORMAT_VERSION:
+        raise ValueError(
+            f"{path} has partial result format version {version}, this version reads {PARTIAL_FORMAT_VERSION}"
+        )
+    try:
+        return PartialHeader(
+            list(header["reports"]), dict(header["options"]), list(header["sources"]),
+            header["created"], header["host"],
+        )
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"{path} has a malformed header: {e}") from None
+
+
+class PartialReader:
+    """
+    Чтение частичного результата: заголовок при открытии, состояния
+    отчетов - по одному через states().
+
+        with PartialReader(path) as reader:
+            for name, state in reader.states():
+                ...
+
+    Raises:
+        ValueError: если файл не является частичным результатом этой версии
+            (строки отчетов проверяются при чтении states()).
+        OSError и другие ошибки чтения (см. compression.READ_ERRORS).
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._stream = open_log_binary(path)
+        try:
+            self.header = _parse_header(self._stream.readline().decode('utf-8'), path)
+        except BaseException:
+            self._stream.close()
+            raise
+
+    def __enter__(self) -> "PartialReader":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._stream.close()
+
+    def states(self) -> Iterator[Tuple[str, Any]]:
+        """Пары (отчет, состояние) в порядке заголовка."""
+        path = self.path
+        names = iter(self.header.reports)
+        for line in self._stream:
+            try:
+                item = json.loads(line)
+                name, state = item["report"], item["state"]
+            except (ValueError, KeyError, TypeError):
+                raise ValueError(f"{path} has a malformed report record") from None
+            if name != next(names, None):
+                raise ValueError(f"{path} has an unexpected report record {name!r}")
+            yield name, state
+        if next(names, None) is not None:
+            raise ValueError(f"{path} is truncated")
+
+
+class ReduceResult(NamedTuple):
+    """Результат reduce: объединенные данные отчетов и описание частей."""
+    # имя отчета -> результат finalize()
+    reports: Dict[str, Any]
+    # Заголовок первого файла с объединенным списком источников
+    header: PartialHeader
+    files: int
+
+
+def reduce_partials(paths: Sequence[Path], progress: bool = False) -> ReduceResult:
+    """
+    Объединяет частичные результаты paths по одному файлу за раз.
+
+    Все файлы должны содержать одни и те же отчеты с совместимыми
+    настройками (COMPATIBLE_OPTIONS).
+
+    Raises:
+        ValueError: если файл поврежден, другой версии или несовместим с первым.
+        OSError и другие ошибки чтения (см. compression.READ_ERRORS).
+    """
+    if not paths:
+        raise ValueError("no partial results to reduce")
+    first: Optional[PartialHeader] = None
+    merged: Dict[str, Aggregator] = {}
+    sources: List[Dict[str, Any]] = []
+    for path in paths:
+        if progress:
+            print(f"Merging partial result: {path}...") # Индикация
+        with PartialReader(path) as reader:
+            header = reader.header
+            if first is None:
+                first = header
+                options = header.scan_options()
+                merged = {name: _get_report(name).create_aggregator(options) for name in header.reports}
+            elif header.compatibility_key() != first.compatibility_key():
+                raise ValueError(f"{path} was produced with different reports or options than {paths[0]}")
+            for name, state in reader.states():
+                aggregator_class: Any = _get_report(name).aggregator
+                try:
+                    part = aggregator_class.load_partial(state, options)
+                except (KeyError, TypeError, AttributeError) as e:
+                    raise ValueError(f"{path} has a malformed '{name}' state: {e}") from None
+                merged[name].merge(part)
+            sources.extend(header.sources)
+    assert first is not None
+    return ReduceResult(
+        {name: aggregator.finalize() for name, aggregator in merged.items()},
+        first._replace(sources=sources),
+        len(paths),
+    )
+
@@ -1,70 +1,767 @@
+import heapq
+import sys
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, DefaultDict, Optional
-from collections import defaultdict
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Any, Callable, NamedTuple, Optional, Sequence, Tuple, Type
 from .utils import LOG_LEVELS
-from .analyzer import HandlerData # Импортируем тип данных от анализатора
+from .analyzer import HandlerData, ScanOptions # Импортируем типы данных от анализатора
+from .log_parser import LogRecord, parse_timestamp, record_handler, record_request_metrics
+from .output import DEFAULT_KEY_WIDTH, ReportWriter, TableWriter
+from .sketch import DEFAULT_RELATIVE_ACCURACY, DDSketch, SpaceSaving
+from .store import LEVEL_INDEX, HandlerStore
+
+if TYPE_CHECKING:
+    from .columnar import ColumnarStore
+    from .signatures import SignatureSummary
+
+# Уровни, которые считаются ошибками в отчете 'error_summary'
+ERROR_LEVELS: Tuple[str, ...] = ("ERROR", "CRITICAL")
+# Сообщения длиннее этого обрезаются, чтобы ключи сводки ошибок оставались компактными
+MAX_MESSAGE_LENGTH = 200
+# Сколько сообщений выводит 'error_summary', если --top не задан
+DEFAULT_TOP_MESSAGES = 10
+# Ширина интервала 'timeline' (секунды), если --bucket не задан
+DEFAULT_BUCKET_SECONDS = 60
+# Сколько хэндлеров на интервал выводит 'timeline', если --top не задан
+DEFAULT_TOP_PER_BUCKET = 5
+# Сколько сигнатур ошибок отслеживает 'error_signatures', если --approx не задан
+DEFAULT_SIGNATURE_CAPACITY = 10000
+# Квантили отчета 'latency'
+LATENCY_QUANTILES: Tuple[float, ...] = (0.5, 0.95, 0.99)
+
+
+class Aggregator(ABC):
+    """
+    Агрегатор отчета: накапливает данные за один проход по строкам.
+
+    Жизненный цикл: __init__(options) - пустое состояние; update(record) -
+    на каждую разобранную строку; merge(other) - объединение результатов
+    участков файлов (в том числе из других процессов, поэтому агрегатор
+    должен сериализоваться pickle); finalize() - данные для generate().
+    Необязательный from_columnar() строит состояние по колоночному
+    хранилищу (см. log_analyzer.columnar) без разбора текста.
+    Необязательные dump_partial()/load_partial() переводят результат в
+    JSON-совместимое состояние и обратно для частичных результатов
+    map/reduce (см. log_analyzer.partial).
+    """
+
+    def __init__(self, options: ScanOptions):
+        self.options = options
+
+    @abstractmethod
+    def update(self, record: LogRecord) -> None:
+        """Учитывает одну разобранную строку лога."""
+
+    @abstractmethod
+    def merge(self, other: "Aggregator") -> "Aggregator":
+        """Добавляет состояние другого агрегатора того же типа и возвращает self."""
+
+    def finalize(self) -> Any:
+        """Возвращает итоговые данные для генератора отчета."""
+        return self
+
+    @classmethod
+    def from_columnar(cls, store: "ColumnarStore", options: ScanOptions) -> "Aggregator":
+        """Строит агрегатор по колоночному хранилищу; по умолчанию не поддерживается."""
+        raise NotImplementedError(f"{cls.__name__} cannot be computed from a columnar store")
+
+    @classmethod
+    def dump_partial(cls, data: Any) -> Any:
+        """JSON-совместимое состояние по результату finalize(); по умолчанию не поддерживается."""
+        raise NotImplementedError(f"{cls.__name__} cannot be saved as a partial result")
+
+    @classmethod
+    def load_partial(cls, state: Any, options: ScanOptions) -> "Aggregator":
+        """
+        Восстанавливает агрегатор из результата dump_partial() для merge().
+
+        Raises:
+            ValueError: если состояние повреждено.
+        """
+        raise NotImplementedError(f"{cls.__name__} cannot be loaded from a partial result")
 
 
 class BaseReport(ABC):
     """Абстрактный базовый класс для генераторов отчетов."""
 
+    # Имя в реестре (заполняется register_report)
+    name: str = ""
+    # Класс агрегатора, собирающего данные отчета
+    aggregator: Type[Aggregator]
+
+    def create_aggregator(self, options: ScanOptions) -> Aggregator:
+        """Создает пустой агрегатор для одного участка данных."""
+        return self.aggregator(options)
+
     @abstractmethod
-    def generate(self, data: Any) -> None:
+    def generate(
+        self, data: Any, top: Optional[int] = None, sort_by: str = "total", writer: Optional[ReportWriter] = None
+    ) -> None:
         """
         Метод для генерации и вывода отчета.
-        Тип 'data' может отличаться для разных отчетов.
+        Тип 'data' может отличаться для разных отчетов (результат finalize()).
+        Вывод идет в writer (см. log_analyzer.output), по умолчанию - таблицей в stdout.
         """
         pass
 
+
+AVAILABLE_REPORTS: Dict[str, BaseReport] = {}
+
+def register_report(name: str) -> Callable[[Type[BaseReport]], Type[BaseReport]]:
+    """
+    Декоратор класса отчета: регистрирует его экземпляр в AVAILABLE_REPORTS
+    под именем name. Так же подключаются отчеты из сторонних модулей.
+    """
+    def decorator(report_class: Type[BaseReport]) -> Type[BaseReport]:
+        report = report_class()
+        report.name = name
+        AVAILABLE_REPORTS[name] = report
+        return report_class
+    return decorator
+
+
+@contextmanager
+def _output(writer: Optional[ReportWriter]) -> Iterator[ReportWriter]:
+    """Переданный вывод или таблица в stdout, которая записывается по окончании отчета."""
+    if writer is not None:
+        yield writer
+        return
+    writer = TableWriter(sys.stdout)
+    try:
+        yield writer
+    finally:
+        writer.close()
+
+def _select_rows(data: HandlerStore, top: Optional[int], sort_by: str) -> Iterable[Tuple[str, Sequence[int]]]:
+    """
+    Выбирает строки отчета: все по алфавиту либо по убыванию ключа sort_by
+    (при равенстве - по алфавиту), при заданном top - только первые top.
+    Все строки по алфавиту отдаются итератором (см. HandlerStore.sorted_rows).
+    """
+    if top is None and sort_by == "total":
+        return data.sorted_rows()
+    if sort_by == "total":
+        weight = sum
+    else:
+        level_index = LEVEL_INDEX[sort_by]
+        weight = lambda counts: counts[level_index]
+    key = lambda row: (-weight(row[1]), row[0])
+    if top is None:
+        return sorted(data.rows(), key=key)
+    return heapq.nsmallest(top, data.rows(), key=key)
+
+def _write_level_table(
+    writer: ReportWriter, name: str, key_title: str, data: HandlerStore, top: Optional[int], sort_by: str
+) -> None:
+    """
+    Выводит таблицу 'ключ x уровни' с итоговой строкой. Без top ширина
+    столбца ключа находится одним проходом по ключам хранилища, а строки
+    идут потоком без промежуточного списка.
+    """
+    key_width = max(map(len, data), default=DEFAULT_KEY_WIDTH) if top is None else None
+    writer.table(name, key_title, LOG_LEVELS, _select_rows(data, top, sort_by), data.level_totals(), key_width=key_width)
+
+
+class HandlersAggregator(Aggregator):
+    """Счетчики путей запросов по уровням (точные или Space-Saving), см. record_handler."""
+
+    def __init__(self, options: ScanOptions):
+        super().__init__(options)
+        if options.sketch_capacity is not None:
+            self.counts = SpaceSaving(options.sketch_capacity, options.sort_by)
+        else:
+            self.counts = HandlerStore()
+
+    def update(self, record: LogRecord) -> None:
+        handler = record_handler(record)
+        if handler is None:
+            return
+        if self.options.normalizer is not None:
+            handler = self.options.normalizer(handler)
+        self.counts.add(handler, record.level)
+
+    def merge(self, other: "HandlersAggregator") -> "HandlersAggregator":
+        self.counts.merge(other.counts)
+        return self
+
+    def finalize(self) -> HandlerData:
+        return self.counts
+
+    @classmethod
+    def from_columnar(cls, store: "ColumnarStore", options: ScanOptions) -> "HandlersAggregator":
+        aggregator = cls(options)
+        counts = store.count_handlers(options.normalizer, options.since, options.until)
+        if isinstance(aggregator.counts, SpaceSaving):
+            for handler, row in counts.rows():
+                for level, count in zip(LOG_LEVELS, row):
+                    if count:
+                        aggregator.counts.add(handler, level, count)
+        else:
+            aggregator.counts = counts
+        return aggregator
+
+    @classmethod
+    def dump_partial(cls, data: HandlerData) -> Any:
+        return data.to_compact()
+
+    @classmethod
+    def load_partial(cls, state: Any, options: ScanOptions) -> "HandlersAggregator":
+        aggregator = cls(options)
+        if isinstance(aggregator.counts, SpaceSaving):
+            aggregator.counts = SpaceSaving.from_compact(state)
+        else:
+            aggregator.counts = HandlerStore.from_compact(state)
+        return aggregator
+
+
+@register_report("handlers")
 class HandlersReport(BaseReport):
     """Генерирует отчет о состоянии ручек API по уровням логирования."""
 
-    def generate(self, data: HandlerData) -> None:
+    aggregator = HandlersAggregator
+
+    def generate(
+        self,
+        data: HandlerData,
+        top: Optional[int] = None,
+        sort_by: str = "total",
+        writer: Optional[ReportWriter] = None,
+    ) -> None:
         """
-        Форматирует и выводит отчет 'handlers' в консоль.
-        Принимает данные типа HandlerData.
+        Форматирует и выводит отчет 'handlers'.
+        Принимает HandlerStore (вложенные словари преобразуются в него)
+        или приближенную сводку SpaceSaving.
+
+        Без top и sort_by хэндлеры выводятся по алфавиту. С top выводятся
+        только top самых тяжелых хэндлеров по ключу sort_by ('total' или
+        уровень логирования) - выбор через кучу, без сортировки всех ключей.
         """
-        if not data:
-            print("No relevant log data found for 'handlers' report.")
+        with _output(writer) as out:
+            if not data:
+                out.empty("handlers")
+                return
+            if not isinstance(data, SpaceSaving):
+                data = HandlerStore.from_mapping(data)
+                out.summary(f"Total requests: {data.total()}", total_requests=data.total())
+                _write_level_table(out, "handlers", "HANDLER", data, top, sort_by)
+                return
+
+            selected = data.top(top if top is not None else len(data))
+            out.summary(f"Total requests: {data.total()}", total_requests=data.total())
+            out.summary(
+                f"Approximate top handlers by '{data.sort_by}' (Space-Saving, {data.capacity} counters): "
+                f"estimates overcount by at most {data.error_bound():.1f}; per-level counts are lower bounds.",
+                approximate={"sort_by": data.sort_by, "capacity": data.capacity, "error_bound": data.error_bound()},
+            )
+            out.table(
+                "handlers",
+                "HANDLER",
+                LOG_LEVELS + ["ESTIMATE", "ERROR"],
+                [(handler, (*counts, estimate, error)) for handler, estimate, error, counts in selected],
+                data.level_totals(),
+            )
+
+
+class LevelsByLoggerAggregator(Aggregator):
+    """Счетчики записей каждого логгера по уровням."""
+
+    def __init__(self, options: ScanOptions):
+        super().__init__(options)
+        self.counts = HandlerStore()
+
+    def update(self, record: LogRecord) -> None:
+        self.counts.add(record.logger, record.level)
+
+    def merge(self, other: "LevelsByLoggerAggregator") -> "LevelsByLoggerAggregator":
+        self.counts.merge(other.counts)
+        return self
+
+    def finalize(self) -> HandlerStore:
+        return self.counts
+
+    @classmethod
+    def from_columnar(cls, store: "ColumnarStore", options: ScanOptions) -> "LevelsByLoggerAggregator":
+        aggregator = cls(options)
+        aggregator.counts = store.count_by_logger(options.since, options.until)
+        return aggregator
+
+    @classmethod
+    def dump_partial(cls, data: HandlerStore) -> Any:
+        return data.to_compact()
+
+    @classmethod
+    def load_partial(cls, state: Any, options: ScanOptions) -> "LevelsByLoggerAggregator":
+        aggregator = cls(options)
+        aggregator.counts = HandlerStore.from_compact(state)
+        return aggregator
+
+
+@register_report("status_by_logger")
+class StatusByLoggerReport(BaseReport):
+    """Распределение записей по уровням для каждого логгера (не только django.request)."""
+
+    aggregator = LevelsByLoggerAggregator
+
+    def generate(
+        self,
+        data: HandlerStore,
+        top: Optional[int] = None,
+        sort_by: str = "total",
+        writer: Optional[ReportWriter] = None,
+    ) -> None:
+        with _output(writer) as out:
+            if not data:
+                out.empty("status_by_logger")
+                return
+            out.summary(f"Total records: {data.total()}", total_records=data.total())
+            _write_level_table(out, "loggers", "LOGGER", data, top, sort_by)
+
+
+class ErrorSummary(NamedTuple):
+    """Данные отчета 'error_summary'."""
+    # логгер -> счетчики по уровням (учитываются только ERROR_LEVELS)
+    by_logger: HandlerStore
+    # 'логгер: сообщение' -> счетчики по уровням
+    messages: HandlerStore
+
+
+class ErrorSummaryAggregator(Aggregator):
+    """Считает записи уровней ERROR и CRITICAL по логгерам и по тексту сообщения."""
+
+    def __init__(self, options: ScanOptions):
+        super().__init__(options)
+        self.by_logger = HandlerStore()
+        self.messages = HandlerStore()
+
+    def update(self, record: LogRecord) -> None:
+        if record.level not in ERROR_LEVELS:
             return
+        self.by_logger.add(record.logger, record.level)
+        self.messages.add(f"{record.logger}: {record.message[:MAX_MESSAGE_LENGTH]}", record.level)
+
+    def merge(self, other: "ErrorSummaryAggregator") -> "ErrorSummaryAggregator":
+        self.by_logger.merge(other.by_logger)
+        self.messages.merge(other.messages)
+        return self
+
+    def finalize(self) -> ErrorSummary:
+        return ErrorSummary(self.by_logger, self.messages)
+
+    @classmethod
+    def dump_partial(cls, data: ErrorSummary) -> Any:
+        return {"by_logger": data.by_logger.to_compact(), "messages": data.messages.to_compact()}
+
+    @classmethod
+    def load_partial(cls, state: Any, options: ScanOptions) -> "ErrorSummaryAggregator":
+        aggregator = cls(options)
+        aggregator.by_logger = HandlerStore.from_compact(state["by_logger"])
+        aggregator.messages = HandlerStore.from_compact(state["messages"])
+        return aggregator
 
-        total_requests = sum(sum(levels.values()) for levels in data.values())
-        print(f"Total requests: {total_requests}\n")
 
-        max_handler_len = max(len(h) for h in data.keys()) if data else 10
-        header_len = max(len("HANDLER"), max_handler_len)
-        level_width = 8 # Фиксированная ширина для уровней
+@register_report("error_summary")
+class ErrorSummaryReport(BaseReport):
+    """Сводка ошибок: число ERROR/CRITICAL по логгерам и самые частые сообщения."""
 
-        header = f"{'HANDLER'.ljust(header_len)} "
-        for level in LOG_LEVELS:
-            header += f"\t{level.rjust(level_width)}"
-        print(header)
-        print("-" * len(header.expandtabs(level_width)))
+    aggregator = ErrorSummaryAggregator
 
-        level_totals: Dict[str, int] = defaultdict(int)
-        sorted_handlers = sorted(data.keys())
+    def generate(
+        self,
+        data: ErrorSummary,
+        top: Optional[int] = None,
+        sort_by: str = "total",
+        writer: Optional[ReportWriter] = None,
+    ) -> None:
+        with _output(writer) as out:
+            if not data or not data.by_logger:
+                out.empty("error_summary")
+                return
+            level_indexes = [LEVEL_INDEX[level] for level in ERROR_LEVELS]
+            level_totals = data.by_logger.level_totals()
+            error_totals = [level_totals[i] for i in level_indexes]
+            out.summary(f"Total errors: {sum(error_totals)}", total_errors=sum(error_totals))
 
-        for handler in sorted_handlers:
-            row = f"{handler.ljust(header_len)} "
-            level_counts = data[handler]
-            for level in LOG_LEVELS:
-                count = level_counts.get(level, 0)
-                row += f"\t{str(count).rjust(level_width)}"
-                level_totals[level] += count
-            print(row)
+            logger_rows = [
+                (logger, [counts[i] for i in level_indexes])
+                for logger, counts in _select_rows(data.by_logger, len(data.by_logger), sort_by)
+            ]
+            out.table("loggers", "LOGGER", ERROR_LEVELS, logger_rows, error_totals)
 
-        print("-" * len(header.expandtabs(level_width)))
-        totals_row = f"{''.ljust(header_len)} "
-        for level in LOG_LEVELS:
-            totals_row += f"\t{str(level_totals[level]).rjust(level_width)}"
-        print(totals_row)
+            limit = top if top is not None else DEFAULT_TOP_MESSAGES
+            out.ranking(
+                "messages",
+                f"Most frequent error messages (top {limit}):",
+                "MESSAGE",
+                ((message, sum(counts)) for message, counts in _select_rows(data.messages, limit, sort_by)),
+            )
 
 
+def format_bucket(start: int) -> str:
+    """Начало интервала 'timeline' в UTC, как метки времени без смещения в логах."""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(start))
+
+
+class Timeline(NamedTuple):
+    """Данные отчета 'timeline'."""
+    # Ширина интервала в секундах
+    bucket: int
+    # начало интервала (секунды POSIX) -> хэндлер -> счетчики по уровням
+    buckets: Dict[int, HandlerStore]
+
+
+class TimelineAggregator(Aggregator):
+    """Счетчики путей запросов по уровням для каждого интервала времени."""
+
+    def __init__(self, options: ScanOptions):
+        super().__init__(options)
+        self.bucket = options.bucket or DEFAULT_BUCKET_SECONDS
+        self.buckets: Dict[int, HandlerStore] = {}
+
+    def update(self, record: LogRecord) -> None:
+        if record.timestamp is None:
+            return
+        handler = record_handler(record)
+        if handler is None:
+            return
+        moment = parse_timestamp(record.timestamp)
+        if moment is None:
+            return
+        if self.options.normalizer is not None:
+            handler = self.options.normalizer(handler)
+        start = int(moment // self.bucket) * self.bucket
+        counts = self.buckets.get(start)
+        if counts is None:
+            counts = self.buckets[start] = HandlerStore()
+        counts.add(handler, record.level)
+
+    def merge(self, other: "TimelineAggregator") -> "TimelineAggregator":
+        for start, counts in other.buckets.items():
+            if start in self.buckets:
+                self.buckets[start].merge(counts)
+            else:
+                self.buckets[start] = counts
+        return self
+
+    def finalize(self) -> Timeline:
+        return Timeline(self.bucket, self.buckets)
+
+    @classmethod
+    def dump_partial(cls, data: Timeline) -> Any:
+        # Ключи объектов JSON - строки
+        return {"bucket": data.bucket, "buckets": {str(start): counts.to_compact() for start, counts in data.buckets.items()}}
+
+    @classmethod
+    def load_partial(cls, state: Any, options: ScanOptions) -> "TimelineAggregator":
+        aggregator = cls(options)
+        if state["bucket"] != aggregator.bucket:
+            raise ValueError(f"timeline bucket {state['bucket']}s does not match {aggregator.bucket}s")
+        aggregator.buckets = {int(start): HandlerStore.from_compact(counts) for start, counts in state["buckets"].items()}
+        return aggregator
+
+
+@register_report("timeline")
+class TimelineReport(BaseReport):
+    """Временной ряд: запросы по уровням в каждом интервале и самые тяжелые хэндлеры интервала."""
+
+    aggregator = TimelineAggregator
+
+    def generate(
+        self,
+        data: Timeline,
+        top: Optional[int] = None,
+        sort_by: str = "total",
+        writer: Optional[ReportWriter] = None,
+    ) -> None:
+        with _output(writer) as out:
+            if not data or not data.buckets:
+                out.empty("timeline")
+                return
+            starts = sorted(data.buckets)
+            bucket_rows = [(format_bucket(start), data.buckets[start].level_totals()) for start in starts]
+            level_totals = [sum(column) for column in zip(*(counts for _, counts in bucket_rows))]
+            out.summary(
+                f"Total requests: {sum(level_totals)} in {len(starts)} buckets of {data.bucket}s (UTC)",
+                total_requests=sum(level_totals),
+                buckets=len(starts),
+                bucket_seconds=data.bucket,
+            )
+            out.table("buckets", "BUCKET", LOG_LEVELS, bucket_rows, level_totals)
+
+            limit = top if top is not None else DEFAULT_TOP_PER_BUCKET
+            handler_rows = [
+                ((label, handler), counts)
+                for start, (label, _) in zip(starts, bucket_rows)
+                for handler, counts in _select_rows(data.buckets[start], limit, sort_by)
+            ]
+            out.table(
+                "bucket_handlers",
+                ("BUCKET", "HANDLER"),
+                LOG_LEVELS,
+                handler_rows,
+                level_totals,
+                title=f"Top {limit} handlers per bucket by '{sort_by}':",
+            )
+
+
+class RequestLatency(NamedTuple):
+    """Данные отчета 'latency'."""
+    # хэндлер -> распределение длительности запросов (мс)
+    durations: Dict[str, DDSketch]
+    # хэндлер -> распределение размера ответа (байты)
+    sizes: Dict[str, DDSketch]
+
+
+def _add_sample(sketches: Dict[str, DDSketch], handler: str, value: float) -> None:
+    sketch = sketches.get(handler)
+    if sketch is None:
+        sketch = sketches[handler] = DDSketch()
+    sketch.add(value)
+
+def _merge_sketches(target: Dict[str, DDSketch], other: Dict[str, DDSketch]) -> None:
+    for handler, sketch in other.items():
+        if handler in target:
+            target[handler].merge(sketch)
+        else:
+            target[handler] = sketch
+
+
+class LatencyAggregator(Aggregator):
+    """
+    Распределения длительности запросов и размера ответов по хэндлерам
+    (см. record_request_metrics) в сводках DDSketch: память на хэндлер
+    ограничена числом корзин и не растет с числом запросов.
+    """
+
+    def __init__(self, options: ScanOptions):
+        super().__init__(options)
+        self.durations: Dict[str, DDSketch] = {}
+        self.sizes: Dict[str, DDSketch] = {}
+
+    def update(self, record: LogRecord) -> None:
+        _, duration, size = record_request_metrics(record)
+        if duration is None and size is None:
+            return
+        handler = record_handler(record)
+        if handler is None:
+            return
+        if self.options.normalizer is not None:
+            handler = self.options.normalizer(handler)
+        if duration is not None:
+            _add_sample(self.durations, handler, duration)
+        if size is not None:
+            _add_sample(self.sizes, handler, size)
+
+    def merge(self, other: "LatencyAggregator") -> "LatencyAggregator":
+        _merge_sketches(self.durations, other.durations)
+        _merge_sketches(self.sizes, other.sizes)
+        return self
+
+    def finalize(self) -> RequestLatency:
+        return RequestLatency(self.durations, self.sizes)
+
+    @classmethod
+    def dump_partial(cls, data: RequestLatency) -> Any:
+        return {
+            "durations": {handler: sketch.to_compact() for handler, sketch in data.durations.items()},
+            "sizes": {handler: sketch.to_compact() for handler, sketch in data.sizes.items()},
+        }
+
+    @classmethod
+    def load_partial(cls, state: Any, options: ScanOptions) -> "LatencyAggregator":
+        aggregator = cls(options)
+        aggregator.durations = {handler: DDSketch.from_compact(sketch) for handler, sketch in state["durations"].items()}
+        aggregator.sizes = {handler: DDSketch.from_compact(sketch) for handler, sketch in state["sizes"].items()}
+        return aggregator
+
+
+def _quantile_names() -> List[str]:
+    """Заголовки квантилей LATENCY_QUANTILES: P50, P95, P99."""
+    return [f"P{round(q * 100)}" for q in LATENCY_QUANTILES]
+
+def _distribution_row(sketch: DDSketch, digits: Optional[int]) -> List[Any]:
+    """Число значений, среднее, квантили LATENCY_QUANTILES и максимум, округленные до digits знаков."""
+    values = [sketch.mean(), *sketch.quantiles(LATENCY_QUANTILES), sketch.max]
+    return [sketch.count, *(round(value, digits) for value in values)]
+
+
+@register_report("latency")
+class LatencyReport(BaseReport):
+    """
+    Длительность запросов (мс) и размер ответов (байты) по хэндлерам:
+    среднее, p50/p95/p99 и максимум. Квантили берутся из сводок DDSketch
+    с относительной ошибкой не больше DEFAULT_RELATIVE_ACCURACY.
+    """
+
+    aggregator = LatencyAggregator
+
+    def generate(
+        self,
+        data: RequestLatency,
+        top: Optional[int] = None,
+        sort_by: str = "total",
+        writer: Optional[ReportWriter] = None,
+    ) -> None:
+        """
+        Выводит таблицы 'durations' (мс) и 'sizes' (байты), каждую - только
+        если в логах есть такие значения. Без top хэндлеры идут по
+        алфавиту, с top - top хэндлеров с наибольшим числом значений.
+        """
+        with _output(writer) as out:
+            if not data or not (data.durations or data.sizes):
+                out.empty("latency")
+                return
+            timed = sum(sketch.count for sketch in data.durations.values())
+            sized = sum(sketch.count for sketch in data.sizes.values())
+            out.summary(
+                f"Timed requests: {timed}, responses with size: {sized} "
+                f"(quantiles within {DEFAULT_RELATIVE_ACCURACY:.0%} relative error)",
+                timed_requests=timed,
+                sized_responses=sized,
+                relative_accuracy=DEFAULT_RELATIVE_ACCURACY,
+            )
+            tables = (("durations", "MS", data.durations, 1), ("sizes", "B", data.sizes, None))
+            title = None
+            for name, unit, sketches, digits in tables:
+                if not sketches:
+                    continue
+                overall = DDSketch()
+                for sketch in sketches.values():
+                    overall.merge(sketch)
+                if top is None:
+                    handlers = sorted(sketches)
+                else:
+                    handlers = heapq.nsmallest(top, sketches, key=lambda handler: (-sketches[handler].count, handler))
+                columns = ["COUNT", *(f"{stat}_{unit}" for stat in ("MEAN", *_quantile_names(), "MAX"))]
+                out.table(
+                    name,
+                    "HANDLER",
+                    columns,
+                    ((handler, _distribution_row(sketches[handler], digits)) for handler in handlers),
+                    _distribution_row(overall, digits),
+                    title=title,
+                )
+                title = "Response sizes per handler:"
+
+
+class ErrorSignaturesAggregator(Aggregator):
+    """
+    Сигнатуры сообщений ERROR и CRITICAL (см. log_analyzer.signatures):
+    число записей, первое и последнее появление и пример записи. Память
+    ограничена --approx N сигнатурами (по умолчанию DEFAULT_SIGNATURE_CAPACITY).
+    """
+
+    def __init__(self, options: ScanOptions):
+        # Шаблоны сообщений нужны только этому отчету: модуль импортируется с первым агрегатором
+        from .signatures import SignatureSummary, message_signature
+
+        super().__init__(options)
+        self.signatures = SignatureSummary(options.sketch_capacity or DEFAULT_SIGNATURE_CAPACITY)
+        self._message_signature = message_signature
+
+    def update(self, record: LogRecord) -> None:
+        if record.level not in ERROR_LEVELS:
+            return
+        signature, template = self._message_signature(record.logger, record.message)
+        # Агрегатор получает разобранную запись, а не строку: пример собирается из
+        # полей и для журналов доступа и JSON не совпадает с исходной строкой
+        timestamp = record.timestamp
+        if timestamp is None:
+            moment = None
+            sample = f"{record.level}:{record.logger}:{record.message}"
+        else:
+            moment = parse_timestamp(timestamp)
+            sample = f"[{timestamp}] {record.level}:{record.logger}:{record.message}"
+        self.signatures.add(signature, template, record.level, moment, sample)
+
+    def merge(self, other: "ErrorSignaturesAggregator") -> "ErrorSignaturesAggregator":
+        self.signatures.merge(other.signatures)
+        return self
+
+    def finalize(self) -> "SignatureSummary":
+        return self.signatures
+
+    @classmethod
+    def dump_partial(cls, data: "SignatureSummary") -> Any:
+        return data.to_compact()
+
+    @classmethod
+    def load_partial(cls, state: Any, options: ScanOptions) -> "ErrorSignaturesAggregator":
+        from .signatures import SignatureSummary
+
+        aggregator = cls(options)
+        aggregator.signatures = SignatureSummary.from_compact(state)
+        return aggregator
+
+
+def _format_moment(moment: Optional[float]) -> str:
+    """Время первого или последнего появления сигнатуры в UTC; '-', если у строк нет меток времени."""
+    return "-" if moment is None else format_bucket(int(moment))
+
+
+@register_report("error_signatures")
+class ErrorSignaturesReport(BaseReport):
+    """
+    Кластеры ошибок: сообщения ERROR/CRITICAL, сведенные к шаблонам
+    (числа, ID, строки в кавычках замаскированы), с числом записей,
+    первым и последним появлением и примером записи.
+    """
+
+    aggregator = ErrorSignaturesAggregator
+
+    def generate(
+        self,
+        data: "SignatureSummary",
+        top: Optional[int] = None,
+        sort_by: str = "total",
+        writer: Optional[ReportWriter] = None,
+    ) -> None:
+        """
+        Выводит таблицу 'signatures' с самыми частыми сигнатурами (top,
+        по умолчанию DEFAULT_TOP_MESSAGES) и таблицу 'samples' с примерами
+        записей тех же сигнатур, собранными из разобранных полей.
+        """
+        with _output(writer) as out:
+            if not data:
+                out.empty("error_signatures")
+                return
+            level_indexes = [LEVEL_INDEX[level] for level in ERROR_LEVELS]
+            level_totals = data.level_totals()
+            error_totals = [level_totals[i] for i in level_indexes]
+            approximate = data.approximate()
+            text = f"Total errors: {sum(error_totals)} in {len(data)} signatures"
+            if approximate:
+                text += f" (approximate: tracking the top {data.capacity})"
+            out.summary(text, total_errors=sum(error_totals), distinct_signatures=len(data), approximate=approximate)
+
+            limit = top if top is not None else DEFAULT_TOP_MESSAGES
+            if sort_by == "total":
+                rank_key = lambda row: (-row[1], row[0])
+            else:
+                sort_index = LEVEL_INDEX[sort_by]
+                rank_key = lambda row: (-row[2][sort_index], -row[1], row[0])
+            rows = heapq.nsmallest(limit, data.rows(), key=rank_key)
+            out.table(
+                "signatures",
+                ("SIGNATURE", "FIRST_SEEN", "LAST_SEEN"),
+                ["COUNT", *ERROR_LEVELS, "TEMPLATE"],
+                (
+                    (
+                        (signature, _format_moment(details[0]), _format_moment(details[1])),
+                        [count, *(levels[i] for i in level_indexes), details[2]],
+                    )
+                    for signature, count, levels, details in rows
+                ),
+                [sum(error_totals), *error_totals],
+            )
+            out.table(
+                "samples",
+                "SIGNATURE",
+                ["SAMPLE_RECORD"],
+                ((signature, [details[3]]) for signature, _, _, details in rows),
+                title="Sample records (rebuilt from parsed fields as [TIME] LEVEL:logger:message):",
+            )
 
-AVAILABLE_REPORTS: Dict[str, BaseReport] = {
-    "handlers": HandlersReport(),
-    # "error_summary": ErrorSummaryReport(), # Пример добавления нового
-}
 
 def get_report_generator(report_name: str) -> Optional[BaseReport]:
     """
@@ -74,4 +771,4 @@ def get_report_generator(report_name: str) -> Optional[BaseReport]:
 
 def get_available_report_names() -> List[str]:
     """Возвращает список имен доступных отчетов."""
-    return list(AVAILABLE_REPORTS.keys())
\ No newline at end of file
+    return list(AVAILABLE_REPORTS.keys())
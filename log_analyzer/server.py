@@ -0,0 +1,234 @@
+"""
+Прогретый сервер для частых коротких запусков (cron, хуки мониторинга).
+
+Процесс один раз импортирует модули анализатора (PRELOAD_MODULES) и
+слушает Unix-сокет. На каждый запрос клиента (см. client.py) он делает
+fork: дочерний процесс получает уже загруженные модули и
+скомпилированные регулярные выражения, подставляет переданные клиентом
+stdin/stdout/stderr, переходит в его рабочий каталог и выполняет
+log_analyzer.main.main с его аргументами. Запросы изолированы друг от
+друга и выполняются параллельно; состояние сервера между ними не
+меняется.
+"""
+import importlib
+import os
+import signal
+import socket
+import sys
+import threading
+from typing import List, Optional, Set, Tuple
+
+from .client import REPLY_SIZE, trusted_directory
+
+# Модули, загружаемые до приема запросов: все, что импортирует обычный запуск,
+# включая импортируемые лениво
+PRELOAD_MODULES: Tuple[str, ...] = (
+    "log_analyzer.main",
+    "log_analyzer.analyzer",
+    "log_analyzer.formats",
+    "log_analyzer.normalize",
+    "log_analyzer.output",
+    "log_analyzer.reporting",
+    "log_analyzer.signatures",
+    "log_analyzer.cache",
+    "log_analyzer.columnar",
+    "log_analyzer.follow",
+    "log_analyzer.partial",
+    "log_analyzer.streams",
+    "log_analyzer.timeindex",
+    "bz2",
+    "calendar",
+    "concurrent.futures",
+    "csv",
+    "hashlib",
+    "json",
+    "lzma",
+    "mmap",
+    "platform",
+)
+# Сигналы остановки сервера; на время fork они блокируются
+STOP_SIGNALS = {signal.SIGINT, signal.SIGTERM}
+# Очередь ожидающих подключений
+LISTEN_BACKLOG = 64
+# Наибольший размер запроса (рабочий каталог и аргументы)
+MAX_REQUEST_SIZE = 1024 * 1024
+
+
+def preload() -> None:
+    """Импортирует PRELOAD_MODULES."""
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+
+
+def decode_request(data: bytes) -> Tuple[str, List[str]]:
+    """Разбирает запрос, закодированный encode_request: (рабочий каталог, аргументы)."""
+    cwd, *argv = data.decode('utf-8', errors='surrogateescape').split("\0")
+    return cwd, argv
+
+
+def _receive_request(conn: socket.socket) -> Optional[Tuple[str, List[str], List[int]]]:
+    """
+    Читает запрос и дескрипторы клиента. None - соединение закрыто без
+    запроса (так проверяет сокет второй запускаемый сервер).
+    """
+    data, fds, _, _ = socket.recv_fds(conn, MAX_REQUEST_SIZE, 3)
+    if not data and not fds:
+        return None
+    if len(data) < 4 or len(fds) != 3:
+        raise ValueError("malformed request")
+    size = int.from_bytes(data[:4], 'big')
+    if size > MAX_REQUEST_SIZE:
+        raise ValueError("request too large")
+    payload = data[4:]
+    while len(payload) < size:
+        chunk = conn.recv(size - len(payload))
+        if not chunk:
+            raise ValueError("truncated request")
+        payload += chunk
+    cwd, argv = decode_request(payload)
+    return cwd, argv, fds
+
+
+def _watch_client(conn: socket.socket) -> None:
+    """Прерывает команду (как Ctrl+C), если клиент закрыл соединение."""
+    try:
+        while conn.recv(REPLY_SIZE):
+            pass
+    except OSError:
+        pass
+    os.kill(os.getpid(), signal.SIGINT)
+
+
+def _run_command(argv: List[str]) -> int:
+    """Выполняет команду CLI и возвращает ее код выхода."""
+    from .main import main
+
+    try:
+        main(argv)
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print("\nExecution interrupted by user.", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _handle_request(conn: socket.socket, signal_mask: Set[int]) -> None:
+    """
+    Выполняется в дочернем процессе: обслуживает запрос и завершает процесс.
+    signal_mask - маска сигналов сервера до fork, восстанавливается после
+    установки обработчиков дочернего процесса.
+    """
+    code = 1
+    try:
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.pthread_sigmask(signal.SIG_SETMASK, signal_mask)
+        request = _receive_request(conn)
+        if request is None:
+            os._exit(0)
+        cwd, argv, fds = request
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        os.chdir(cwd)
+        sys.argv = ["log_analyzer", *argv]
+        threading.Thread(target=_watch_client, args=(conn,), daemon=True).start()
+        code = _run_command(argv)
+    except BaseException as e:  # Дочерний процесс не должен вернуться в цикл сервера
+        print(f"Error: Could not handle request: {e}", file=sys.stderr)
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except (OSError, ValueError):
+                pass
+        try:
+            conn.sendall(str(code).encode('ascii'))
+        except OSError:
+            pass
+        os._exit(code)
+
+
+def _stop(signum: int, frame: object) -> None:
+    raise KeyboardInterrupt
+
+
+def _prepare_directory(socket_path: str) -> None:
+    """
+    Создает каталог сокета с доступом только для владельца, если его нет.
+
+    Raises:
+        RuntimeError: если каталог принадлежит другому пользователю.
+    """
+    directory = os.path.dirname(os.path.abspath(socket_path))
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    if not trusted_directory(directory):
+        raise RuntimeError(f"socket directory {directory} belongs to another user")
+
+
+def serve(socket_path: str) -> None:
+    """
+    Загружает модули и обслуживает запросы на Unix-сокете socket_path до
+    SIGINT/SIGTERM. Сокет доступен только владельцу.
+
+    Raises:
+        RuntimeError: если на socket_path уже отвечает сервер, его каталог
+            принадлежит другому пользователю или fork недоступен.
+        OSError: если сокет не удалось создать.
+    """
+    if not hasattr(os, "fork"):
+        raise RuntimeError("server mode requires os.fork")
+    preload()
+    _prepare_directory(socket_path)
+    if os.path.exists(socket_path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+        except OSError:
+            os.unlink(socket_path)  # Сокет остался от завершившегося сервера
+        else:
+            raise RuntimeError("another server is already listening")
+        finally:
+            probe.close()
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        listener.bind(socket_path)
+    finally:
+        os.umask(old_umask)
+    listener.listen(LISTEN_BACKLOG)
+    # Завершившиеся дочерние процессы убирает ядро; код выхода клиент получает через сокет
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, _stop)
+    try:
+        # Внутри try: сигнал остановки сразу после этого сообщения тоже удаляет сокет
+        print(f"Serving on {socket_path} (pid {os.getpid()})", flush=True)
+        while True:
+            conn, _ = listener.accept()
+            sys.stdout.flush()
+            sys.stderr.flush()
+            # Сигнал во время fork мог бы прервать обработчики at-fork (исключение
+            # в них теряется, и сервер не останавливается): он доставляется после fork
+            signal_mask = signal.pthread_sigmask(signal.SIG_BLOCK, STOP_SIGNALS)
+            if os.fork() == 0:
+                listener.close()
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                _handle_request(conn, signal_mask)
+            conn.close()
+            signal.pthread_sigmask(signal.SIG_SETMASK, signal_mask)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
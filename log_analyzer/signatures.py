@@ -0,0 +1,194 @@
+"""
+Сигнатуры сообщений об ошибках для отчета 'error_signatures'.
+
+Сообщение сводится к шаблону: строки в кавычках, UUID, IP-адреса,
+hex-значения и числа заменяются метками (<str>, <uuid>, <ip>, <hex>,
+<num>), так что 'Order 1234 not found' и 'Order 98 not found' дают один
+шаблон. Сигнатура - короткий хэш шаблона вместе с логгером. Шаблон
+вычисляется одним проходом комбинированного regex и запоминается в
+LRU-кэше по тексту сообщения: повторяющиеся сообщения (обычный случай при
+лавине одинаковых ошибок) не разбираются повторно.
+
+SignatureSummary считает сигнатуры в сводке Space-Saving (см.
+log_analyzer.sketch) с памятью O(capacity) при любом числе различных
+сигнатур и хранит для каждой отслеживаемой сигнатуры шаблон, первое и
+последнее появление и пример записи.
+"""
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .sketch import SpaceSaving
+
+# Маскируемые фрагменты сообщения (группа -> метка); порядок альтернатив важен:
+# строки в кавычках маскируются целиком, UUID и IP - раньше чисел внутри них.
+# Hex-значением считается 0x... или слово не короче 16 символов (как в log_analyzer.normalize).
+TEMPLATE_RULES: List[Tuple[str, str, str]] = [
+    ("str", r"\"[^\"]*\"|'[^']*'", "<str>"),
+    ("uuid", r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b", "<uuid>"),
+    ("ip", r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b", "<ip>"),
+    ("hex", r"\b0[xX][0-9a-fA-F]+\b|\b[0-9a-fA-F]{16,}\b", "<hex>"),
+    ("num", r"\d+(?:\.\d+)?", "<num>"),
+]
+_TEMPLATE_RE = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern, _ in TEMPLATE_RULES))
+_PLACEHOLDERS: Dict[str, str] = {name: placeholder for name, _, placeholder in TEMPLATE_RULES}
+
+# Сообщение обрезается до этой длины перед построением шаблона: различия
+# дальше (хвосты трассировок) не разделяют сигнатуры, а ключи кэша компактны
+MAX_TEMPLATE_INPUT = 1000
+# Размер LRU-кэша сообщение -> сигнатура
+SIGNATURE_MEMO_SIZE = 16384
+# Длина хэша сигнатуры в байтах (16 hex-символов)
+SIGNATURE_DIGEST_SIZE = 8
+# Шаблоны и примеры записей хранятся обрезанными до этой длины
+MAX_SAMPLE_LENGTH = 200
+# Поля сведений о сигнатуре
+_ENTRY_FIRST, _ENTRY_LAST, _ENTRY_TEMPLATE, _ENTRY_SAMPLE = range(4)
+
+
+def _placeholder(match: "re.Match[str]") -> str:
+    return _PLACEHOLDERS[match.lastgroup or "num"]
+
+def template_message(message: str) -> str:
+    """Шаблон сообщения: переменные части заменены метками TEMPLATE_RULES."""
+    return _TEMPLATE_RE.sub(_placeholder, message[:MAX_TEMPLATE_INPUT])
+
+def message_signature(logger: str, message: str) -> Tuple[str, str]:
+    """
+    Сигнатура и шаблон сообщения логгера (с мемоизацией).
+
+    Returns:
+        (сигнатура - hex-хэш 'логгер: шаблон', 'логгер: шаблон' обрезанный до MAX_SAMPLE_LENGTH).
+    """
+    # Ключ кэша - обрезанное сообщение: память кэша ограничена и для многомегабайтных сообщений
+    return _cached_signature(logger, message[:MAX_TEMPLATE_INPUT])
+
+@lru_cache(maxsize=SIGNATURE_MEMO_SIZE)
+def _cached_signature(logger: str, message: str) -> Tuple[str, str]:
+    from hashlib import blake2b  # Нужен только этому отчету; не замедляет запуск остальных
+
+    template = f"{logger}: {template_message(message)}"
+    signature = blake2b(template.encode('utf-8', errors='surrogateescape'), digest_size=SIGNATURE_DIGEST_SIZE)
+    return signature.hexdigest(), template[:MAX_SAMPLE_LENGTH]
+
+
+def _earliest(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    return b if a is None or (b is not None and b < a) else a
+
+def _latest(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    return b if a is None or (b is not None and b > a) else a
+
+
+class SignatureSummary:
+    """
+    Счетчики сигнатур ошибок с ограниченной памятью.
+
+    Число записей по сигнатурам ведет SpaceSaving(capacity): пока различных
+    сигнатур не больше capacity, счетчики точные; дальше это оценки с
+    ошибкой не больше N / capacity, а редкие сигнатуры вытесняются.
+    Сведения о сигнатуре (шаблон, первое и последнее время, пример записи)
+    хранятся, пока она отслеживается; вытесненные удаляются пачками, когда
+    их набирается capacity.
+
+    Пример записи - первая учтенная запись сигнатуры: merge() сохраняет
+    пример своей части, поэтому части нужно объединять в порядке входа.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts = SpaceSaving(capacity)
+        # сигнатура -> [первое время, последнее время, шаблон, пример записи]
+        self._details: Dict[str, List[Any]] = {}
+
+    def add(self, signature: str, template: str, level: str, moment: Optional[float], sample: str) -> None:
+        """Учитывает одну запись уровня level с сигнатурой signature."""
+        self.counts.add(signature, level)
+        details = self._details.get(signature)
+        if details is None:
+            self._details[signature] = [moment, moment, template, sample[:MAX_SAMPLE_LENGTH]]
+            if len(self._details) > 2 * self.capacity:
+                self._prune()
+        elif moment is not None:
+            details[_ENTRY_FIRST] = _earliest(details[_ENTRY_FIRST], moment)
+            details[_ENTRY_LAST] = _latest(details[_ENTRY_LAST], moment)
+
+    def _prune(self) -> None:
+        """Удаляет сведения вытесненных из сводки сигнатур."""
+        counts = self.counts
+        self._details = {signature: details for signature, details in self._details.items() if signature in counts}
+
+    def merge(self, other: "SignatureSummary") -> "SignatureSummary":
+        """Добавляет сводку следующей части входа и возвращает self."""
+        self.counts.merge(other.counts)
+        self.capacity = self.counts.capacity
+        details = self._details
+        for signature, theirs in other._details.items():
+            own = details.get(signature)
+            if own is None:
+                details[signature] = list(theirs)
+            else:
+                own[_ENTRY_FIRST] = _earliest(own[_ENTRY_FIRST], theirs[_ENTRY_FIRST])
+                own[_ENTRY_LAST] = _latest(own[_ENTRY_LAST], theirs[_ENTRY_LAST])
+        self._prune()
+        return self
+
+    def to_compact(self) -> Dict[str, Any]:
+        """JSON-совместимое состояние сводки (см. log_analyzer.partial)."""
+        self._prune()
+        return {"counts": self.counts.to_compact(), "details": self._details}
+
+    @classmethod
+    def from_compact(cls, data: Dict[str, Any]) -> "SignatureSummary":
+        """
+        Восстанавливает сводку из результата to_compact().
+
+        Raises:
+            ValueError: если состояние повреждено.
+        """
+        counts = SpaceSaving.from_compact(data["counts"])
+        summary = cls(counts.capacity)
+        summary.counts = counts
+        summary._details = {signature: list(details) for signature, details in data["details"].items()}
+        if any(len(details) != 4 or signature not in counts for signature, details in summary._details.items()):
+            raise ValueError("malformed error signature state")
+        if any(signature not in summary._details for signature in counts):
+            raise ValueError("error signature state has counts without details")
+        return summary
+
+    def level_totals(self) -> List[int]:
+        """Точные суммы по уровням (в порядке LOG_LEVELS) для всех учтенных записей."""
+        return self.counts.level_totals()
+
+    def total(self) -> int:
+        """Общее число учтенных записей."""
+        return self.counts.total()
+
+    def approximate(self) -> bool:
+        """True, если часть записей пришлась на вытесненные сигнатуры и счетчики стали оценками."""
+        counts = self.counts
+        return sum(sum(levels) for _, levels in counts.rows()) != counts.total()
+
+    def rows(self) -> Iterator[Tuple[str, int, Sequence[int], Sequence[Any]]]:
+        """
+        Отслеживаемые сигнатуры: (сигнатура, оценка числа записей, счетчики
+        по уровням, [первое время, последнее время, шаблон, пример записи]).
+        """
+        counts = self.counts
+        details = self._details
+        for signature, levels in counts.rows():
+            yield signature, counts.estimate(signature)[0], levels, details[signature]
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def __bool__(self) -> bool:
+        return bool(self.counts)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SignatureSummary):
+            return NotImplemented
+        return self.to_compact() == other.to_compact()
+
+    def __repr__(self) -> str:
+        return f"SignatureSummary(capacity={self.capacity}, tracked={len(self.counts)}, total={self.total()})"
+
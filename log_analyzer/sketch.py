@@ -0,0 +1,384 @@
+import heapq
+import math
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .store import LEVEL_COUNT, LEVEL_INDEX
+from .utils import LOG_LEVELS
+
+# Ключи сортировки для top-K: общее число записей или конкретный уровень
+SORT_KEYS: List[str] = ["total"] + LOG_LEVELS
+
+# Относительная точность квантилей DDSketch по умолчанию (1%)
+DEFAULT_RELATIVE_ACCURACY = 0.01
+# Наибольшее число корзин DDSketch: при 1% этого хватает на диапазон значений
+# больше 10^17 раз, так что младшие корзины сливаются лишь в вырожденных случаях
+DEFAULT_MAX_BUCKETS = 2048
+# Значения не больше этого попадают в отдельный счетчик нулей
+MIN_INDEXABLE_VALUE = 1e-9
+
+_ceil = math.ceil
+_log = math.log
+
+
+def _rank_key(item: Tuple[str, List[int]]) -> Tuple[int, int, str]:
+    """Порядок ранжирования: большая оценка, затем меньшая ошибка, затем имя хэндлера."""
+    handler, entry = item
+    return -entry[0], entry[1], handler
+
+
+class SpaceSaving:
+    """
+    Приближенный поиск самых частых хэндлеров (алгоритм Space-Saving,
+    Metwally et al., 2005) с памятью O(capacity) независимо от числа ключей.
+
+    Вес записи определяется ключом сортировки: при sort_by='total' каждая
+    запись весит 1, при sort_by='ERROR' учитываются только записи ERROR.
+    Гарантии для N учтенных единиц веса:
+      * оценка count никогда не меньше истинного значения;
+      * count - error <= истинное значение, где error <= N / capacity;
+      * любой хэндлер с истинным весом > N / capacity присутствует в сводке.
+    Счетчики по уровням собираются с момента, когда хэндлер попал в сводку,
+    поэтому они являются нижними оценками. Суммы по уровням для всего
+    потока (level_totals) точные.
+
+    Сводки объединяются (mergeable summaries, Agarwal et al., 2012) с
+    сохранением той же границы ошибки для суммарного N.
+    """
+
+    def __init__(self, capacity: int, sort_by: str = "total"):
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort_by}")
+        self.capacity = capacity
+        self.sort_by = sort_by
+        self._weight_level = None if sort_by == "total" else LEVEL_INDEX[sort_by]
+        self.total_weight = 0
+        self._level_totals = [0] * LEVEL_COUNT
+        # хэндлер -> [оценка, ошибка, счетчики по уровням...]
+        self._entries: Dict[str, List[int]] = {}
+        # Куча (оценка, хэндлер): по элементу на хэндлер сводки. Рост оценки
+        # в куче не отражается сразу: ключ элемента - нижняя граница оценки,
+        # он обновляется, когда элемент оказывается на вершине (см. _pop_min)
+        self._heap: List[Tuple[int, str]] = []
+
+    def _rebuild_heap(self) -> None:
+        self._heap = [(entry[0], handler) for handler, entry in self._entries.items()]
+        heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[str, int]:
+        """Удаляет из сводки хэндлер с минимальной оценкой и возвращает (хэндлер, оценка)."""
+        heap = self._heap
+        entries = self._entries
+        while True:
+            count, handler = heap[0]
+            current = entries[handler][0]
+            if current == count:
+                heapq.heappop(heap)
+                del entries[handler]
+                return handler, count
+            # Устаревший ключ: остальные ключи не больше своих оценок, так что
+            # минимум найден, только когда на вершине окажется актуальный
+            heapq.heapreplace(heap, (current, handler))
+
+    def add(self, handler: str, level: str, count: int = 1) -> None:
+        """Учитывает count записей уровня level для хэндлера."""
+        level_index = LEVEL_INDEX[level]
+        self._level_totals[level_index] += count
+        weight = count if self._weight_level is None or level_index == self._weight_level else 0
+        self.total_weight += weight
+        entries = self._entries
+        entry = entries.get(handler)
+        if entry is None:
+            if weight == 0:
+                return  # Запись не влияет на ранжирование и не вытесняет другие хэндлеры
+            if len(entries) < self.capacity:
+                entry = [0, 0] + [0] * LEVEL_COUNT
+            else:
+                _, min_count = self._pop_min()
+                entry = [min_count, min_count] + [0] * LEVEL_COUNT
+            entries[handler] = entry
+            entry[0] += weight
+            heapq.heappush(self._heap, (entry[0], handler))
+        else:
+            entry[0] += weight
+        entry[2 + level_index] += count
+
+    def min_count(self) -> int:
+        """Минимальная оценка в заполненной сводке (0, если место еще есть)."""
+        if len(self._entries) < self.capacity:
+            return 0
+        return min(entry[0] for entry in self._entries.values())
+
+    def error_bound(self) -> float:
+        """Максимальная ошибка оценки: N / capacity."""
+        return self.total_weight / self.capacity
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        """
+        Объединяет другую сводку с текущей и возвращает self.
+        Хэндлер, отсутствующий в заполненной сводке, получает ее минимум
+        как оценку сверху (и как ошибку); затем остаются capacity крупнейших.
+        """
+        if other.sort_by != self.sort_by:
+            raise ValueError("Cannot merge Space-Saving summaries with different sort keys")
+        own_min = self.min_count()
+        other_min = other.min_count()
+        merged: Dict[str, List[int]] = {}
+        for handler in set(self._entries) | set(other._entries):
+            own = self._entries.get(handler)
+            theirs = other._entries.get(handler)
+            entry = [0, 0] + [0] * LEVEL_COUNT
+            for source, fallback in ((own, own_min), (theirs, other_min)):
+                if source is None:
+                    entry[0] += fallback
+                    entry[1] += fallback
+                else:
+                    for i, value in enumerate(source):
+                        entry[i] += value
+            merged[handler] = entry
+        if len(merged) > self.capacity:
+            kept = heapq.nsmallest(self.capacity, merged.items(), key=_rank_key)
+            merged = dict(kept)
+        self._entries = merged
+        self.total_weight += other.total_weight
+        for i, total in enumerate(other._level_totals):
+            self._level_totals[i] += total
+        self.capacity = max(self.capacity, other.capacity)
+        self._rebuild_heap()
+        return self
+
+    def to_compact(self) -> Dict[str, Any]:
+        """JSON-совместимое состояние сводки (см. log_analyzer.partial)."""
+        return {
+            "capacity": self.capacity,
+            "sort_by": self.sort_by,
+            "total_weight": self.total_weight,
+            "level_totals": list(self._level_totals),
+            "entries": self._entries,
+        }
+
+    @classmethod
+    def from_compact(cls, data: Dict[str, Any]) -> "SpaceSaving":
+        """
+        Восстанавливает сводку из результата to_compact().
+
+        Raises:
+            ValueError: если состояние повреждено.
+        """
+        sketch = cls(data["capacity"], data["sort_by"])
+        sketch.total_weight = data["total_weight"]
+        sketch._level_totals = list(data["level_totals"])
+        entries = {handler: list(entry) for handler, entry in data["entries"].items()}
+        if len(sketch._level_totals) != LEVEL_COUNT or any(len(entry) != 2 + LEVEL_COUNT for entry in entries.values()):
+            raise ValueError("malformed Space-Saving state")
+        sketch._entries = entries
+        sketch._rebuild_heap()
+        return sketch
+
+    def level_totals(self) -> List[int]:
+        """Точные суммы по каждому уровню (в порядке LOG_LEVELS) для всего потока."""
+        return list(self._level_totals)
+
+    def total(self) -> int:
+        """Общее число учтенных записей."""
+        return sum(self._level_totals)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __bool__(self) -> bool:
+        return bool(self._entries)
+
+    def __contains__(self, handler: object) -> bool:
+        return handler in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def estimate(self, handler: str) -> Tuple[int, int]:
+        """Возвращает (оценка, ошибка) для хэндлера; (0, 0), если его нет в сводке."""
+        entry = self._entries.get(handler)
+        return (entry[0], entry[1]) if entry else (0, 0)
+
+    def rows(self) -> Iterator[Tuple[str, Sequence[int]]]:
+        """Пары (хэндлер, счетчики по уровням) для хэндлеров в сводке."""
+        for handler, entry in self._entries.items():
+            yield handler, entry[2:]
+
+    def top(self, k: int) -> List[Tuple[str, int, int, Sequence[int]]]:
+        """k хэндлеров с наибольшей оценкой: (хэндлер, оценка, ошибка, счетчики по уровням)."""
+        best = heapq.nsmallest(k, self._entries.items(), key=_rank_key)
+        return [(handler, entry[0], entry[1], entry[2:]) for handler, entry in best]
+
+    def __repr__(self) -> str:
+        return f"SpaceSaving(capacity={self.capacity}, sort_by={self.sort_by!r}, tracked={len(self._entries)})"
+
+
+class DDSketch:
+    """
+    Приближенное распределение неотрицательных значений (длительности,
+    размеры) для квантилей - DDSketch (Masson et al., 2019).
+
+    Значение x попадает в корзину ceil(log_gamma(x)), gamma =
+    (1 + a) / (1 - a); квантиль возвращается как середина корзины, поэтому
+    его относительная ошибка не больше a (relative_accuracy) при любом
+    распределении. Память - не больше max_buckets корзин независимо от
+    числа значений: при переполнении сливаются младшие корзины (точность
+    сохраняется для верхних квантилей). Сводки с одинаковой точностью
+    объединяются без потерь сложением корзин, как при одном проходе.
+    """
+
+    __slots__ = ("relative_accuracy", "max_buckets", "_gamma", "_index_scale", "_bins", "zero_count", "count", "sum",
+                 "min", "max")
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY, max_buckets: int = DEFAULT_MAX_BUCKETS):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        if max_buckets < 1:
+            raise ValueError("max_buckets must be positive")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        # 1 / ln(gamma): индекс корзины - ceil(ln(x) * _index_scale)
+        self._index_scale = 1 / math.log(self._gamma)
+        # индекс корзины -> число значений
+        self._bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, count: int = 1) -> None:
+        """Учитывает count значений value (value >= 0)."""
+        self.count += count
+        self.sum += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if value <= MIN_INDEXABLE_VALUE:
+            self.zero_count += count
+            return
+        bins = self._bins
+        index = _ceil(_log(value) * self._index_scale)
+        bins[index] = bins.get(index, 0) + count
+        if len(bins) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self) -> None:
+        """Сливает младшие корзины, пока их не останется max_buckets."""
+        indexes = sorted(self._bins)
+        excess = len(indexes) - self.max_buckets
+        target = indexes[excess]
+        bins = self._bins
+        for index in indexes[:excess]:
+            bins[target] += bins.pop(index)
+
+    def _value(self, index: int) -> float:
+        """Представитель корзины с относительной ошибкой не больше relative_accuracy."""
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def quantiles(self, qs: Sequence[float]) -> List[Optional[float]]:
+        """
+        Квантили qs (от 0 до 1) за один проход по корзинам, в пределах
+        [min, max]; для пустой сводки - None.
+        """
+        if not self.count:
+            return [None] * len(qs)
+        ranks = sorted((q * (self.count - 1), i) for i, q in enumerate(qs))
+        result: List[Optional[float]] = [None] * len(qs)
+        position = 0
+        cumulative = self.zero_count
+        while position < len(ranks) and ranks[position][0] < cumulative:
+            result[ranks[position][1]] = self.min
+            position += 1
+        for index in sorted(self._bins):
+            if position == len(ranks):
+                break
+            cumulative += self._bins[index]
+            value = min(max(self._value(index), self.min), self.max)
+            while position < len(ranks) and ranks[position][0] < cumulative:
+                result[ranks[position][1]] = value
+                position += 1
+        for _, i in ranks[position:]:
+            result[i] = self.max
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Квантиль q (от 0 до 1); None для пустой сводки."""
+        return self.quantiles([q])[0]
+
+    def mean(self) -> Optional[float]:
+        """Точное среднее значение; None для пустой сводки."""
+        return self.sum / self.count if self.count else None
+
+    def merge(self, other: "DDSketch") -> "DDSketch":
+        """Объединяет другую сводку с текущей и возвращает self."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge DDSketch summaries with different relative accuracy")
+        bins = self._bins
+        for index, count in other._bins.items():
+            bins[index] = bins.get(index, 0) + count
+        self.max_buckets = max(self.max_buckets, other.max_buckets)
+        if len(bins) > self.max_buckets:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def to_compact(self) -> Dict[str, Any]:
+        """JSON-совместимое состояние сводки (см. log_analyzer.partial)."""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_buckets": self.max_buckets,
+            "bins": [[index, count] for index, count in self._bins.items()],
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_compact(cls, data: Dict[str, Any]) -> "DDSketch":
+        """
+        Восстанавливает сводку из результата to_compact().
+
+        Raises:
+            ValueError: если состояние повреждено.
+        """
+        sketch = cls(data["relative_accuracy"], data["max_buckets"])
+        sketch._bins = {int(index): int(count) for index, count in data["bins"]}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        if sketch.count:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        if sketch.count != sketch.zero_count + sum(sketch._bins.values()) or len(sketch._bins) > sketch.max_buckets:
+            raise ValueError("malformed DDSketch state")
+        return sketch
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, DDSketch):
+            return NotImplemented
+        # Сумма сравнивается приближенно: порядок сложения при слиянии меняет младшие разряды
+        return (
+            (self.relative_accuracy, self._bins, self.zero_count, self.count, self.min, self.max)
+            == (other.relative_accuracy, other._bins, other.zero_count, other.count, other.min, other.max)
+            and math.isclose(self.sum, other.sum)
+        )
+
+    def __repr__(self) -> str:
+        return f"DDSketch(relative_accuracy={self.relative_accuracy}, count={self.count}, buckets={len(self._bins)})"
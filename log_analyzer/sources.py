@@ -0,0 +1,70 @@
+"""
+Потоковые источники логов: stdin ('-'), именованные каналы (FIFO),
+tcp://HOST:PORT и unix://PATH.
+
+Модуль только распознает и разбирает аргументы командной строки и не
+импортирует asyncio; чтение источников - в streams.py.
+"""
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+STDIN_SOURCE = "-"
+TCP_PREFIX = "tcp://"
+UNIX_PREFIX = "unix://"
+
+
+class SourceSpec(NamedTuple):
+    """Разобранный источник: вид ('stdin', 'fifo', 'file', 'tcp', 'unix'), путь или хост, порт."""
+    kind: str
+    target: str = ""
+    port: Optional[int] = None
+
+    @property
+    def label(self) -> str:
+        """Имя источника для индикации и --stats."""
+        if self.kind == "stdin":
+            return STDIN_SOURCE
+        if self.kind == "tcp":
+            return f"{TCP_PREFIX}{self.target}:{self.port}"
+        if self.kind == "unix":
+            return f"{UNIX_PREFIX}{self.target}"
+        return self.target
+
+    @property
+    def listening(self) -> bool:
+        """Принимает ли источник подключения (и поэтому не заканчивается сам)."""
+        return self.kind in ("tcp", "unix")
+
+
+def is_stream_source(value: str) -> bool:
+    """Является ли аргумент потоковым источником: '-', tcp://, unix:// или FIFO."""
+    return (
+        value == STDIN_SOURCE
+        or value.startswith(TCP_PREFIX)
+        or value.startswith(UNIX_PREFIX)
+        or Path(value).is_fifo()
+    )
+
+
+def parse_source(value: str) -> SourceSpec:
+    """
+    Разбирает аргумент командной строки в SourceSpec.
+
+    Raises:
+        ValueError: если адрес tcp:// или unix:// задан неверно.
+    """
+    if value == STDIN_SOURCE:
+        return SourceSpec("stdin")
+    if value.startswith(TCP_PREFIX):
+        host, sep, port = value[len(TCP_PREFIX):].rpartition(":")
+        if not sep or not port.isdigit() or int(port) > 65535:
+            raise ValueError(f"invalid TCP source {value!r} (expected tcp://HOST:PORT)")
+        return SourceSpec("tcp", host.strip("[]") or "127.0.0.1", int(port))
+    if value.startswith(UNIX_PREFIX):
+        path = value[len(UNIX_PREFIX):]
+        if not path:
+            raise ValueError(f"invalid Unix socket source {value!r} (expected unix://PATH)")
+        return SourceSpec("unix", path)
+    if Path(value).is_fifo():
+        return SourceSpec("fifo", value)
+    return SourceSpec("file", value)
@@ -0,0 +1,135 @@
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import ContextManager, Dict, Iterator, Optional, Union
+
+# Причины, по которым строка не попала в отчет 'handlers'
+REJECT_NO_LEVEL_PREFIX = "no_level_prefix"  # Нет префикса 'УРОВЕНЬ:логгер:'
+REJECT_OTHER_LOGGER = "other_logger"  # Логгер не django.request
+REJECT_NO_PATH = "no_path"  # В сообщении django.request нет пути
+# Движок 'mmap' не декодирует строки других логгеров и не различает причины
+REJECT_UNCLASSIFIED = "unclassified"
+# Отбор по --since/--until: у записи нет метки времени или она вне интервала
+REJECT_NO_TIMESTAMP = "no_timestamp"
+REJECT_OUT_OF_RANGE = "out_of_range"
+REJECT_REASONS = (
+    REJECT_NO_LEVEL_PREFIX,
+    REJECT_OTHER_LOGGER,
+    REJECT_NO_PATH,
+    REJECT_UNCLASSIFIED,
+    REJECT_NO_TIMESTAMP,
+    REJECT_OUT_OF_RANGE,
+)
+
+# Версия формата JSON-сводки (меняется при несовместимых изменениях полей)
+STATS_FORMAT_VERSION = 1
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Пиковый RSS процесса в байтах (None, если модуль resource недоступен)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает килобайты, macOS - байты
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class ScanStats:
+    """
+    Счетчики разбора одного файла или участка файла.
+
+    Сканеры копят счетчики в локальных переменных и добавляют их сюда один
+    раз за участок, поэтому сбор статистики не добавляет таймеров на строку.
+    Объект сериализуется pickle и возвращается из рабочих процессов.
+    """
+
+    __slots__ = ("bytes_read", "lines_seen", "lines_matched", "rejected", "seconds")
+
+    def __init__(self) -> None:
+        self.bytes_read = 0
+        self.lines_seen = 0
+        self.lines_matched = 0
+        self.rejected: Dict[str, int] = dict.fromkeys(REJECT_REASONS, 0)
+        self.seconds = 0.0
+
+    def add_rejected(self, rejected: Dict[str, int]) -> None:
+        for reason, count in rejected.items():
+            self.rejected[reason] += count
+
+    def merge(self, other: "ScanStats") -> "ScanStats":
+        """Добавляет счетчики другого объекта к текущему и возвращает self."""
+        self.bytes_read += other.bytes_read
+        self.lines_seen += other.lines_seen
+        self.lines_matched += other.lines_matched
+        self.add_rejected(other.rejected)
+        self.seconds += other.seconds
+        return self
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "bytes_read": self.bytes_read,
+            "lines_seen": self.lines_seen,
+            "lines_matched": self.lines_matched,
+            "lines_rejected": {reason: count for reason, count in self.rejected.items() if count},
+            "seconds": round(self.seconds, 6),
+            "mb_per_s": round(self.bytes_read / (1024 * 1024) / self.seconds, 2) if self.seconds else 0.0,
+        }
+
+
+class RunStats:
+    """
+    Сводка запуска: время этапов, счетчики по файлам и пиковая память.
+    Время по файлам - сумма времени их участков во всех процессах.
+    """
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+        self.files: Dict[str, ScanStats] = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Добавляет время выполнения блока к этапу name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def add_file(self, file_path: Union[Path, str], scan_stats: ScanStats) -> None:
+        """Учитывает счетчики участка файла."""
+        self.files.setdefault(str(file_path), ScanStats()).merge(scan_stats)
+
+    def totals(self) -> ScanStats:
+        total = ScanStats()
+        for scan_stats in self.files.values():
+            total.merge(scan_stats)
+        return total
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "format_version": STATS_FORMAT_VERSION,
+            "wall_seconds": round(time.perf_counter() - self._started, 6),
+            "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            "totals": self.totals().to_dict(),
+            "files": {path: scan_stats.to_dict() for path, scan_stats in self.files.items()},
+            "peak_rss_bytes": peak_rss_bytes(),
+        }
+
+    def write(self, destination: str) -> None:
+        """Записывает JSON-сводку в файл или в stderr, если destination равен '-'."""
+        import json
+        if destination == "-":
+            json.dump(self.to_dict(), sys.stderr, indent=2)
+            print(file=sys.stderr)
+            return
+        with open(destination, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def measure_stage(stats: Optional[RunStats], name: str) -> ContextManager[None]:
+    """Замер этапа name, если статистика собирается (иначе пустой контекст)."""
+    return stats.stage(name) if stats is not None else nullcontext()
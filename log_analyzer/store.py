@@ -0,0 +1,188 @@
+from array import array
+from collections import defaultdict
+from typing import DefaultDict, Dict, Iterator, List, Mapping, Sequence, Tuple
+
+from .utils import LOG_LEVELS
+
+LEVEL_COUNT = len(LOG_LEVELS)
+LEVEL_INDEX: Dict[str, int] = {level: i for i, level in enumerate(LOG_LEVELS)}
+_ZERO_ROW = array('q', [0] * LEVEL_COUNT)
+
+# Компактный JSON-совместимый вид: хэндлер -> счетчики в порядке LOG_LEVELS
+CompactHandlerData = Dict[str, List[int]]
+
+
+class HandlerStore:
+    """
+    Компактное хранилище счетчиков хэндлеров по уровням логирования.
+
+    Каждая строка хэндлера хранится один раз и получает целочисленный id;
+    счетчики лежат в одном плоском массиве int64 по LEVEL_COUNT ячеек на
+    хэндлер. Объект сериализуется pickle и передается между процессами
+    без преобразований.
+    """
+
+    __slots__ = ("_index", "_handlers", "_counts")
+
+    def __init__(self) -> None:
+        self._index: Dict[str, int] = {}
+        self._handlers: List[str] = []
+        self._counts = array('q')
+
+    def _handler_id(self, handler: str) -> int:
+        """Возвращает id хэндлера, регистрируя его при первом появлении."""
+        handler_id = self._index.get(handler)
+        if handler_id is None:
+            handler_id = len(self._handlers)
+            self._index[handler] = handler_id
+            self._handlers.append(handler)
+            self._counts.extend(_ZERO_ROW)
+        return handler_id
+
+    def add(self, handler: str, level: str, count: int = 1) -> None:
+        """Увеличивает счетчик уровня level для хэндлера."""
+        self._counts[self._handler_id(handler) * LEVEL_COUNT + LEVEL_INDEX[level]] += count
+
+    def add_counts(self, handler: str, counts: Sequence[int]) -> None:
+        """Прибавляет строку счетчиков (в порядке LOG_LEVELS) к хэндлеру."""
+        base = self._handler_id(handler) * LEVEL_COUNT
+        store_counts = self._counts
+        for offset, count in enumerate(counts):
+            store_counts[base + offset] += count
+
+    def merge(self, other: "HandlerStore") -> "HandlerStore":
+        """
+        Добавляет счетчики другого хранилища к текущему и возвращает self.
+
+        Хэндлеры other один раз переводятся в id текущего хранилища; строки
+        новых хэндлеров копируются срезами массива, у существующих
+        складываются LEVEL_COUNT ячеек.
+        """
+        if not self._handlers:
+            self._index = dict(other._index)
+            self._handlers = list(other._handlers)
+            self._counts = array('q', other._counts)
+            return self
+
+        index = self._index
+        handlers = self._handlers
+        counts = self._counts
+        other_counts = other._counts
+        for other_id, handler in enumerate(other._handlers):
+            other_base = other_id * LEVEL_COUNT
+            handler_id = index.get(handler)
+            if handler_id is None:
+                index[handler] = len(handlers)
+                handlers.append(handler)
+                counts.extend(other_counts[other_base:other_base + LEVEL_COUNT])
+            else:
+                base = handler_id * LEVEL_COUNT
+                for offset in range(LEVEL_COUNT):
+                    counts[base + offset] += other_counts[other_base + offset]
+        return self
+
+    def counts(self, handler: str) -> Tuple[int, ...]:
+        """Счетчики хэндлера в порядке LOG_LEVELS (нули для неизвестного хэндлера)."""
+        handler_id = self._index.get(handler)
+        if handler_id is None:
+            return tuple(_ZERO_ROW)
+        base = handler_id * LEVEL_COUNT
+        return tuple(self._counts[base:base + LEVEL_COUNT])
+
+    def rows(self) -> Iterator[Tuple[str, Sequence[int]]]:
+        """Итерирует пары (хэндлер, счетчики в порядке LOG_LEVELS) в порядке добавления."""
+        counts = self._counts
+        for handler_id, handler in enumerate(self._handlers):
+            base = handler_id * LEVEL_COUNT
+            yield handler, counts[base:base + LEVEL_COUNT]
+
+    def sorted_rows(self) -> Iterator[Tuple[str, Sequence[int]]]:
+        """
+        Итерирует пары (хэндлер, счетчики) по алфавиту хэндлеров. Сортируются
+        только id, строки счетчиков берутся срезами массива по мере вывода.
+        """
+        counts = self._counts
+        handlers = self._handlers
+        for handler_id in sorted(range(len(handlers)), key=handlers.__getitem__):
+            base = handler_id * LEVEL_COUNT
+            yield handlers[handler_id], counts[base:base + LEVEL_COUNT]
+
+    def level_totals(self) -> List[int]:
+        """Суммы по каждому уровню (в порядке LOG_LEVELS) за один проход по массиву."""
+        counts = self._counts
+        return [sum(counts[offset::LEVEL_COUNT]) for offset in range(LEVEL_COUNT)]
+
+    def total(self) -> int:
+        """Общее число учтенных записей."""
+        return sum(self._counts)
+
+    # Совместимость с прежним HandlerData (вложенные defaultdict)
+    def __len__(self) -> int:
+        return len(self._handlers)
+
+    def __bool__(self) -> bool:
+        return bool(self._handlers)
+
+    def __contains__(self, handler: object) -> bool:
+        return handler in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._handlers)
+
+    def keys(self) -> List[str]:
+        return list(self._handlers)
+
+    def __getitem__(self, handler: str) -> DefaultDict[str, int]:
+        """Ненулевые счетчики хэндлера в виде defaultdict(int), как в прежнем HandlerData."""
+        level_counts: DefaultDict[str, int] = defaultdict(int)
+        for level, count in zip(LOG_LEVELS, self.counts(handler)):
+            if count:
+                level_counts[level] = count
+        return level_counts
+
+    def values(self) -> Iterator[DefaultDict[str, int]]:
+        for handler in self._handlers:
+            yield self[handler]
+
+    def items(self) -> Iterator[Tuple[str, DefaultDict[str, int]]]:
+        for handler in self._handlers:
+            yield handler, self[handler]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, HandlerStore):
+            return NotImplemented
+        return self.to_compact() == other.to_compact()
+
+    def __repr__(self) -> str:
+        return f"HandlerStore(handlers={len(self._handlers)}, total={self.total()})"
+
+    # Сериализация и преобразования
+    def to_compact(self) -> CompactHandlerData:
+        """JSON-совместимый словарь хэндлер -> список счетчиков."""
+        return {handler: list(row) for handler, row in self.rows()}
+
+    @classmethod
+    def from_compact(cls, data: CompactHandlerData) -> "HandlerStore":
+        """
+        Создает хранилище из результата to_compact().
+
+        Raises:
+            ValueError: если число счетчиков хэндлера не равно LEVEL_COUNT.
+        """
+        store = cls()
+        for handler, counts in data.items():
+            if len(counts) != LEVEL_COUNT:
+                raise ValueError(f"expected {LEVEL_COUNT} counters for {handler!r}, got {len(counts)}")
+            store.add_counts(handler, counts)
+        return store
+
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, Mapping[str, int]]) -> "HandlerStore":
+        """Создает хранилище из вложенного словаря хэндлер -> уровень -> счетчик."""
+        if isinstance(data, cls):
+            return data
+        store = cls()
+        for handler, level_counts in data.items():
+            for level, count in level_counts.items():
+                store.add(handler, level, count)
+        return store
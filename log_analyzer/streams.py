@@ -0,0 +1,356 @@
+"""
+Асинхронный прием логов из потоковых источников (см. sources.py):
+stdin, именованные каналы (FIFO), TCP- и Unix-сокеты, а вместе с ними
+и обычные файлы.
+
+Каждый источник читается своей задачей asyncio блоками до READ_SIZE
+байт; завершенные строки блока уходят одной пачкой в общую ограниченную
+очередь. Единственный потребитель разбирает пачки тем же
+_update_aggregators, что и analyze_logs, и передает записи агрегаторам
+отчетов. Если разбор не успевает, очередь заполняется, задачи источников
+ждут на put и перестают читать: для сокетов и каналов давление доходит
+до отправителя через буферы ядра. Медленный источник просто реже кладет
+пачки и остальные не задерживает.
+"""
+import asyncio
+import os
+import signal
+import stat
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from .analyzer import ScanOptions, _progress, _update_aggregators
+from .compression import open_log_binary
+from .formats import AUTO_FORMAT, get_scanner
+from .log_parser import LogRecord
+from .normalize import PathNormalizer
+from .sources import SourceSpec, parse_source
+from .stats import RunStats, ScanStats, measure_stage
+
+# Сколько байт читается из источника за раз (строки блока уходят одной пачкой)
+READ_SIZE = 64 * 1024
+# Сколько пачек может ждать разбора; дальше источники приостанавливаются
+MAX_QUEUED_BATCHES = 64
+# Буфер asyncio.StreamReader: при его заполнении чтение из сокета или канала приостанавливается
+STREAM_LIMIT = 256 * 1024
+# Незавершенная строка длиннее этого предела отбрасывается, чтобы буфер не рос бесконечно
+MAX_PARTIAL_LINE = 1024 * 1024
+
+# Чтение блока из источника: возвращает b"" в конце потока
+BlockReader = Callable[[int], Awaitable[bytes]]
+# Пачка строк и имя источника, из которого она прочитана
+Batch = Tuple[str, List[str]]
+
+
+def _split_block(block: bytes, label: str) -> Tuple[List[str], bytes]:
+    """
+    Делит блок на завершенные строки и незавершенный хвост. Декодируется
+    сразу вся завершенная часть (UTF-8 с errors='ignore', '\\r' - конец
+    строки, как в _decode_raw_line), а не каждая строка отдельно.
+    """
+    cut = block.rfind(b"\n") + 1
+    partial = block[cut:]
+    if len(partial) > MAX_PARTIAL_LINE:
+        print(f"Warning: Dropping over-long line in {label}", file=sys.stderr)
+        partial = b""
+    if not cut:
+        return [], partial
+    text = block[:cut].decode('utf-8', errors='ignore')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    lines = text.split('\n')
+    lines.pop()  # Пустая строка после последнего '\n'
+    return lines, partial
+
+
+def _is_pollable(fd: int) -> bool:
+    """
+    Можно ли ждать дескриптор через цикл событий (канал или сокет).
+    Терминал читается в потоке: переводить его в неблокирующий режим нельзя,
+    режим общий с оболочкой.
+    """
+    mode = os.fstat(fd).st_mode
+    return stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode)
+
+
+async def _pipe_reader(pipe: Any) -> BlockReader:
+    """Подключает канал к циклу событий и возвращает чтение блоков."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=STREAM_LIMIT)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+    return reader.read
+
+
+def _blocking_reader(stream: Any) -> BlockReader:
+    """Чтение блоков обычного файла в пуле потоков, чтобы не блокировать цикл событий."""
+    loop = asyncio.get_running_loop()
+    read = getattr(stream, 'read1', stream.read)
+    return lambda size: loop.run_in_executor(None, read, size)
+
+
+def _unblock_fifo_open(path: str) -> None:
+    """Будит поток, ждущий открытия FIFO на чтение, открывая его на запись."""
+    try:
+        os.close(os.open(path, os.O_WRONLY | os.O_NONBLOCK))
+    except OSError:
+        pass
+
+
+class StreamIngest:
+    """
+    Читает источники конкурентно и передает строки функциям updates
+    (обычно Aggregator.update отчетов).
+
+    Конечные источники (stdin, FIFO, файлы) читаются до конца потока.
+    Сокеты принимают подключения, пока не вызван stop(), не пришел
+    SIGINT/SIGTERM или, если задан idle_timeout, ни один источник не
+    присылал данных столько секунд. Без сокетов прием заканчивается,
+    когда прочитаны все конечные источники.
+    """
+
+    def __init__(
+        self,
+        sources: Sequence[Union[str, SourceSpec]],
+        updates: Sequence[Callable[[LogRecord], None]],
+        options: ScanOptions = ScanOptions(),
+        stats: Optional[RunStats] = None,
+        idle_timeout: Optional[float] = None,
+        max_queued_batches: int = MAX_QUEUED_BATCHES,
+    ):
+        self.specs = [source if isinstance(source, SourceSpec) else parse_source(source) for source in sources]
+        self.updates = list(updates)
+        self.options = options
+        self.stats = stats
+        self.idle_timeout = idle_timeout
+        self.max_queued_batches = max_queued_batches
+        self.servers: List[asyncio.AbstractServer] = []
+        self._source_stats: Dict[str, ScanStats] = {}
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        self._queue: Optional["asyncio.Queue[Optional[Batch]]"] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._last_data = 0.0
+
+    @property
+    def addresses(self) -> List[Any]:
+        """Адреса, на которых слушают сокеты (после start(); для порта 0 - выбранный порт)."""
+        return [sock.getsockname() for server in self.servers for sock in server.sockets]
+
+    def stop(self) -> None:
+        """Прекращает прием: уже прочитанные пачки будут разобраны."""
+        if self._stopped is not None:
+            self._stopped.set()
+
+    def _scan_stats(self, label: str) -> Optional[ScanStats]:
+        if self.stats is None:
+            return None
+        return self._source_stats.setdefault(label, ScanStats())
+
+    def _spawn(self, coroutine: Awaitable[None]) -> None:
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _pump(self, label: str, read: BlockReader) -> None:
+        """Читает источник до конца потока и кладет завершенные строки пачками в очередь."""
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        scan_stats = self._scan_stats(label)
+        partial = b""
+        while True:
+            data = await read(READ_SIZE)
+            if not data:
+                break
+            self._last_data = loop.time()
+            if scan_stats is not None:
+                scan_stats.bytes_read += len(data)
+            lines, partial = _split_block(partial + data if partial else data, label)
+            if lines:
+                await queue.put((label, lines))
+        if partial:
+            await queue.put((label, [partial.decode('utf-8', errors='ignore')]))
+
+    async def _read_source(self, spec: SourceSpec) -> None:
+        """Задача конечного источника: открывает его и читает до конца."""
+        loop = asyncio.get_running_loop()
+        stream: Any = None
+        try:
+            if spec.kind == "stdin":
+                stream = sys.stdin.buffer
+                read = await _pipe_reader(stream) if _is_pollable(stream.fileno()) else _blocking_reader(stream)
+            elif spec.kind == "fifo":
+                # open блокируется, пока в канал не начнет писать отправитель
+                try:
+                    stream = await loop.run_in_executor(None, open, spec.target, 'rb', 0)
+                except asyncio.CancelledError:
+                    _unblock_fifo_open(spec.target)
+                    raise
+                read = await _pipe_reader(stream)
+            else:
+                stream = open_log_binary(Path(spec.target))
+                read = _blocking_reader(stream)
+            await self._pump(spec.label, read)
+        except OSError as e:
+            print(f"Warning: Could not read source {spec.label}: {e}", file=sys.stderr)
+        finally:
+            if stream is not None and spec.kind == "file":
+                stream.close()
+
+    async def _serve(self, spec: SourceSpec) -> asyncio.AbstractServer:
+        """Начинает принимать подключения; каждое читается своей задачей."""
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            task = asyncio.current_task()
+            self._tasks.add(task)
+            try:
+                await self._pump(spec.label, reader.read)
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+            finally:
+                self._tasks.discard(task)
+                writer.close()
+
+        if spec.kind == "tcp":
+            return await asyncio.start_server(handle, spec.target, spec.port, limit=STREAM_LIMIT)
+        return await asyncio.start_unix_server(handle, spec.target, limit=STREAM_LIMIT)
+
+    async def _consume(self) -> None:
+        """Разбирает пачки по мере поступления, пока не получит None."""
+        queue = self._queue
+        updates = self.updates
+        options = self.options
+        # У потоков нет начала для определения формата: при 'auto' - сканер всех форматов
+        scan = get_scanner(options.log_format)
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            label, lines = batch
+            scan_stats = self._scan_stats(label)
+            started = time.perf_counter()
+            _update_aggregators(updates, lines, scan_stats, options, scan)
+            if scan_stats is not None:
+                scan_stats.seconds += time.perf_counter() - started
+
+    async def _watch_idle(self) -> None:
+        """Останавливает прием, если данных не было idle_timeout секунд."""
+        loop = asyncio.get_running_loop()
+        while True:
+            remaining = self._last_data + self.idle_timeout - loop.time()
+            if remaining <= 0:
+                self.stop()
+                return
+            await asyncio.sleep(remaining)
+
+    async def _wait_finite(self, tasks: List["asyncio.Task[None]"]) -> None:
+        await asyncio.gather(*tasks)
+        self.stop()
+
+    async def start(self) -> None:
+        """Открывает сокеты и запускает чтение конечных источников."""
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_queued_batches)
+        self._stopped = asyncio.Event()
+        self._last_data = loop.time()
+        for spec in self.specs:
+            if spec.listening:
+                self.servers.append(await self._serve(spec))
+        finite = [asyncio.ensure_future(self._read_source(spec)) for spec in self.specs if not spec.listening]
+        for task in finite:
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if not self.servers:
+            self._spawn(self._wait_finite(finite))
+        elif self.idle_timeout is not None:
+            self._spawn(self._watch_idle())
+
+    async def wait(self) -> None:
+        """Ждет окончания приема, закрывает сокеты и дожидается разбора прочитанного."""
+        consumer = asyncio.ensure_future(self._consume())
+        await self._stopped.wait()
+        for server in self.servers:
+            server.close()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for spec in self.specs:
+            if spec.kind == "unix":
+                try:
+                    os.unlink(spec.target)
+                except OSError:
+                    pass
+        await self._queue.put(None)
+        await consumer
+        if self.stats is not None:
+            for label, scan_stats in self._source_stats.items():
+                self.stats.add_file(label, scan_stats)
+
+    async def run(self) -> None:
+        """start() и wait(); в главном потоке SIGINT/SIGTERM завершают прием, а не программу."""
+        await self.start()
+        loop = asyncio.get_running_loop()
+        signals = (signal.SIGINT, signal.SIGTERM) if threading.current_thread() is threading.main_thread() else ()
+        for signum in signals:
+            loop.add_signal_handler(signum, self.stop)
+        try:
+            await self.wait()
+        finally:
+            for signum in signals:
+                loop.remove_signal_handler(signum)
+
+
+def analyze_streams(
+    sources: Sequence[str],
+    report_type: Union[str, Sequence[str]],
+    normalizer: Optional[PathNormalizer] = None,
+    sketch_capacity: Optional[int] = None,
+    sort_by: str = "total",
+    stats: Optional[RunStats] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    bucket: Optional[int] = None,
+    progress: bool = True,
+    idle_timeout: Optional[float] = None,
+    log_format: str = AUTO_FORMAT,
+) -> Any:
+    """
+    Анализирует потоковые источники (см. parse_source) для одного или
+    нескольких отчетов. Записи получают те же агрегаторы отчетов, что и
+    в однопроходном конвейере analyze_logs; результат имеет ту же форму:
+    данные отчета для одного имени, словарь имя -> данные для списка.
+
+    Args:
+        sources: '-', пути к FIFO или файлам, tcp://HOST:PORT, unix://PATH.
+        idle_timeout: Для сокетов: закончить прием, если столько секунд не
+            было данных (None - до SIGINT/SIGTERM).
+        Остальные аргументы - как у analyze_logs.
+    """
+    from .reporting import get_report_generator
+
+    options = ScanOptions(
+        normalizer=normalizer,
+        sketch_capacity=sketch_capacity,
+        sort_by=sort_by,
+        since=since,
+        until=until,
+        bucket=bucket,
+        progress=progress,
+        log_format=log_format,
+    )
+    report_names = [report_type] if isinstance(report_type, str) else list(dict.fromkeys(report_type))
+    reports = [get_report_generator(name) for name in report_names]
+    aggregators = [report.create_aggregator(options) for report in reports]
+    ingest = StreamIngest(sources, [aggregator.update for aggregator in aggregators], options, stats, idle_timeout)
+    names = ", ".join(report_names)
+    for spec in ingest.specs:
+        verb = "Listening" if spec.listening else "Reading"
+        _progress(options, f"{verb} for '{names}': {spec.label}...") # Индикация
+    with measure_stage(stats, "scan"):
+        asyncio.run(ingest.run())
+    _progress(options, "Analysis complete.")
+    merged = {name: aggregator.finalize() for name, aggregator in zip(report_names, aggregators)}
+    if isinstance(report_type, str):
+        return merged[report_type]
+    return merged
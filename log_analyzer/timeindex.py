@@ -0,0 +1,111 @@
+"""
+Разреженный индекс времени для несжатых логов.
+
+Через каждые step байт файла берется первая строка с меткой времени:
+получается список (время, смещение начала строки). Шаг выбирается так,
+чтобы точек было около INDEX_POINTS (в пределах MIN_INDEX_STEP и
+MAX_INDEX_STEP). Построение стоит одного seek и нескольких прочитанных
+строк на точку, поэтому индекс строится при каждом запуске и не хранится.
+Запрос --since/--until ищет по индексу бинарным поиском участок файла,
+где могут быть записи из интервала, и читает только его.
+"""
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from .log_parser import LogRecord, parse_log_record, parse_timestamp
+
+# Разборщик строки (например, сканер log_analyzer.formats)
+RecordParser = Callable[[str], Optional[LogRecord]]
+
+# Желаемое число точек индекса на файл и допустимое расстояние между ними
+INDEX_POINTS = 1024
+MIN_INDEX_STEP = 64 * 1024
+MAX_INDEX_STEP = 4 * 1024 * 1024
+# Сколько строк без метки времени (трейсбеки и т.п.) просматривается от точки индекса
+MAX_PROBE_LINES = 1000
+# Запас в точках индекса с каждой стороны участка на случай слегка
+# неупорядоченных меток (несколько процессов пишут в один файл)
+INDEX_SLACK = 1
+
+
+class IndexEntry(NamedTuple):
+    """Точка индекса: время первой записи с меткой и смещение начала ее строки."""
+    timestamp: float
+    offset: int
+
+
+def _line_timestamp(raw_line: bytes, scan: RecordParser = parse_log_record) -> Optional[float]:
+    """Время записи в сырой строке или None, если метки нет."""
+    record = scan(raw_line.decode('utf-8', errors='ignore'))
+    if record is None or record.timestamp is None:
+        return None
+    return parse_timestamp(record.timestamp)
+
+
+def index_step(size: int) -> int:
+    """Расстояние между точками индекса для файла размером size байт."""
+    return min(MAX_INDEX_STEP, max(MIN_INDEX_STEP, size // INDEX_POINTS))
+
+
+def build_time_index(
+    file_path: Path, step: Optional[int] = None, scan: RecordParser = parse_log_record
+) -> List[IndexEntry]:
+    """
+    Строит индекс несжатого файла: не больше одной точки на каждые step
+    байт (по умолчанию index_step). Строки разбираются scan. Точки идут в
+    порядке смещений; времена упорядочены, если упорядочен лог.
+    """
+    entries: List[IndexEntry] = []
+    size = file_path.stat().st_size
+    if step is None:
+        step = index_step(size)
+    with file_path.open('rb') as f:
+        for target in range(0, size, step):
+            if entries and entries[-1].offset >= target:
+                continue  # Предыдущая точка уже найдена за этой границей
+            if target:
+                # Начинаем с предыдущего байта: если он '\n', target уже начало строки
+                f.seek(target - 1)
+                f.readline()
+            for _ in range(MAX_PROBE_LINES):
+                offset = f.tell()
+                raw_line = f.readline()
+                if not raw_line:
+                    break
+                timestamp = _line_timestamp(raw_line, scan)
+                if timestamp is not None:
+                    entries.append(IndexEntry(timestamp, offset))
+                    break
+    return entries
+
+
+def time_range_offsets(
+    file_path: Path,
+    since: Optional[float],
+    until: Optional[float],
+    step: Optional[int] = None,
+    scan: RecordParser = parse_log_record,
+) -> Tuple[int, int]:
+    """
+    Возвращает участок [start, end) файла, вне которого нет записей из
+    интервала [since, until). Границы - начала строк. Если в файле нет
+    меток времени, возвращается весь файл.
+    """
+    size = file_path.stat().st_size
+    entries = build_time_index(file_path, step, scan)
+    if not entries:
+        return 0, size
+    times = [entry.timestamp for entry in entries]
+    start, end = 0, size
+    if since is not None:
+        # Точка перед первой точкой с временем >= since: записи интервала начинаются не раньше нее
+        first = bisect_left(times, since) - 1 - INDEX_SLACK
+        if first > 0:
+            start = entries[first].offset
+    if until is not None:
+        # Первая точка с временем >= until: после нее записей интервала нет
+        last = bisect_left(times, until) + INDEX_SLACK
+        if last < len(entries):
+            end = entries[last].offset
+    return start, max(start, end)
@@ -1,7 +1,16 @@
 import pytest
 from pathlib import Path
 from collections import defaultdict
-from log_analyzer.analyzer import analyze_logs, _process_file_for_handlers, _merge_handler_results, HandlerData
+from log_analyzer.analyzer import (
+    analyze_logs,
+    _process_file_for_handlers,
+    _merge_handler_results,
+    _split_file_ranges,
+    _scan_range_for_handlers,
+    HandlerData,
+)
+from log_analyzer.sketch import SpaceSaving
+from log_analyzer.store import HandlerStore
 
 
 def test_process_file_for_handlers_ok(tmp_path):
@@ -25,7 +34,7 @@ INFO:django.db.backends:Connection timed out
 
     result = _process_file_for_handlers(file_path)
 
-    assert isinstance(result, defaultdict)
+    assert isinstance(result, HandlerStore)
     assert result["/api/v1/users/"]["INFO"] == 1
     assert result["/api/v1/users/"]["DEBUG"] == 1 
     assert result["/api/v1/users/"]["ERROR"] == 1
@@ -42,7 +51,7 @@ def test_process_file_for_handlers_empty(tmp_path):
     file_path = tmp_path / "empty.log"
     file_path.touch() 
     result = _process_file_for_handlers(file_path)
-    assert isinstance(result, defaultdict)
+    assert isinstance(result, HandlerStore)
     assert not result
 
 def test_process_file_for_handlers_malformed(tmp_path):
@@ -55,7 +64,7 @@ WARNING:some_logger:Some random message
     file_path = tmp_path / "malformed.log"
     file_path.write_text(log_content)
     result = _process_file_for_handlers(file_path)
-    assert isinstance(result, defaultdict)
+    assert isinstance(result, HandlerStore)
     assert not result
 
 def test_merge_handler_results():
@@ -129,4 +138,153 @@ def test_analyze_logs_unknown_report_type(tmp_path, capsys):
     captured = capsys.readouterr()
 
     assert result is None
-    assert "Warning: Analysis logic for report type 'unknown_report'" in captured.err
\ No newline at end of file
+    assert "Warning: Analysis logic for report type 'unknown_report'" in captured.err
+
+def test_analyze_logs_parallel_matches_serial(tmp_path, capsys, monkeypatch):
+    """Тестирует, что параллельный режим дает тот же результат, что и последовательный."""
+    monkeypatch.setattr("log_analyzer.analyzer.MIN_PARALLEL_BYTES", 0)
+    f1 = tmp_path / "par1.log"
+    f2 = tmp_path / "par2.log"
+    f1.write_text("INFO:django.request:GET /path1 1 1ms\nERROR:django.request:GET /path2 500 1ms\n")
+    f2.write_text("INFO:django.request:GET /path1 1 1ms\nGARBAGE LINE\n")
+    log_files = [f1, f2, f1]
+
+    serial = analyze_logs(log_files, "handlers", workers=1)
+    parallel = analyze_logs(log_files, "handlers", workers=2)
+    captured = capsys.readouterr()
+
+    assert captured.out.count("Analyzing for 'handlers':") == 6
+    assert {h: dict(l) for h, l in parallel.items()} == {h: dict(l) for h, l in serial.items()}
+    assert parallel["/path1"]["INFO"] == 3
+    assert "ERROR" not in parallel["/path1"]
+
+def test_parallel_results_are_handler_stores(tmp_path, capsys, monkeypatch):
+    """Тестирует, что рабочие процессы возвращают HandlerStore, которые объединяются без потерь."""
+    monkeypatch.setattr("log_analyzer.analyzer.MIN_PARALLEL_BYTES", 0)
+    f1 = tmp_path / "store1.log"
+    f1.write_text("INFO:django.request:GET /path1 1 1ms\nCRITICAL:django.request:GET /path1 1 1ms\n")
+
+    merged = analyze_logs([f1, f1], "handlers", workers=2)
+    assert isinstance(merged, HandlerStore)
+    assert merged.counts("/path1") == (0, 2, 0, 0, 2)
+
+def test_small_input_skips_process_pool(tmp_path, capsys, monkeypatch):
+    """Тестирует, что для небольших файлов пул процессов не создается даже при workers > 1."""
+    import concurrent.futures
+
+    def fail(*args, **kwargs):
+        raise AssertionError("process pool must not be created for small input")
+
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", fail)
+    file_path = tmp_path / "small.log"
+    file_path.write_text("INFO:django.request:GET /path1 1 1ms\n" * 10)
+
+    result = analyze_logs([file_path, file_path], "handlers", workers=4, chunk_size=64)
+    assert result["/path1"]["INFO"] == 20
+
+def test_split_file_ranges_aligned_to_lines(tmp_path):
+    """Тестирует, что границы участков совпадают с началами строк и покрывают весь файл."""
+    lines = [f"INFO:django.request:GET /path{i % 7} 200 {i}ms\n" for i in range(200)]
+    file_path = tmp_path / "chunks.log"
+    file_path.write_text("".join(lines) + "INFO:django.request:GET /tail 200 1ms")
+    raw = file_path.read_bytes()
+
+    ranges = _split_file_ranges(file_path, 100)
+
+    assert len(ranges) > 1
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(raw)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+        assert raw[start - 1:start] == b"\n"
+
+def test_scan_ranges_match_serial(tmp_path):
+    """Тестирует, что сумма по участкам совпадает с последовательным чтением, включая '\\r\\n' и битый UTF-8."""
+    content = (
+        b"INFO:django.request:GET /a 200 1ms\r\n"
+        b"ERROR:django.request:GET /b\xff\xfe/ 500 1ms\n"
+        b"INFO:django.request:GET /caf\xc3\xa9/ 200 1ms\n"
+        b"GARBAGE\n"
+    ) * 50
+    file_path = tmp_path / "mixed.log"
+    file_path.write_bytes(content)
+
+    serial = _process_file_for_handlers(file_path)
+    ranges = _split_file_ranges(file_path, 64)
+    merged = _merge_handler_results(
+        [_scan_range_for_handlers((file_path, start, end)) for start, end in ranges]
+    )
+
+    assert {h: dict(l) for h, l in merged.items()} == {h: dict(l) for h, l in serial.items()}
+    assert merged["/b/"]["ERROR"] == 50
+    assert merged["/café/"]["INFO"] == 50
+
+def test_analyze_logs_parallel_chunked_single_file(tmp_path, capsys):
+    """Тестирует распараллеливание одного файла по участкам."""
+    file_path = tmp_path / "big.log"
+    file_path.write_text("".join(f"WARNING:django.request:GET /p{i % 3} 200 1ms\n" for i in range(300)))
+
+    result = analyze_logs([file_path], "handlers", workers=2, chunk_size=512)
+    captured = capsys.readouterr()
+
+    assert captured.out.count("Analyzing for 'handlers':") == 1
+    assert sum(levels["WARNING"] for levels in result.values()) == 300
+    assert result["/p0"]["WARNING"] == 100
+
+def test_mmap_engine_matches_lines_engine(tmp_path, capsys):
+    """Тестирует, что движок 'mmap' дает тот же результат, что и построчный."""
+    content = (
+        "INFO:django.request:GET /a 200 1ms\r\n"
+        "INFO:django.server:GET /ignored 200 1ms\n"
+        "ERROR:django.request:GET /b/?x=1 500 1ms\n"
+        "DEBUG:django.request:GET /caf\u00e9/ 200 1ms\n"
+    ) * 20
+    file_path = tmp_path / "engines.log"
+    file_path.write_text(content, encoding="utf-8")
+    empty_path = tmp_path / "empty.log"
+    empty_path.touch()
+
+    lines_result = analyze_logs([file_path, empty_path], "handlers", engine="lines")
+    mmap_result = analyze_logs([file_path, empty_path], "handlers", engine="mmap")
+    chunked_result = analyze_logs([file_path], "handlers", workers=2, chunk_size=200, engine="mmap")
+
+    expected = {h: dict(l) for h, l in lines_result.items()}
+    assert {h: dict(l) for h, l in mmap_result.items()} == expected
+    assert {h: dict(l) for h, l in chunked_result.items()} == expected
+    assert expected["/caf\u00e9/"] == {"DEBUG": 20}
+
+def test_analyze_logs_approximate_merges_sketches(tmp_path, capsys):
+    """Тестирует приближенный режим: сводки участков и файлов объединяются в одну."""
+    file_path = tmp_path / "heavy.log"
+    lines = [f"INFO:django.request:GET /hot 200 1ms\n" for _ in range(300)]
+    lines += [f"ERROR:django.request:GET /cold/{i} 500 1ms\n" for i in range(100)]
+    file_path.write_text("".join(lines))
+
+    result = analyze_logs([file_path, file_path], "handlers", workers=2, chunk_size=1024, sketch_capacity=5)
+
+    assert isinstance(result, SpaceSaving)
+    assert result.top(1)[0][0] == "/hot"
+    assert result.estimate("/hot")[0] >= 600
+    assert result.total() == 800
+    with pytest.raises(ValueError):
+        analyze_logs([file_path], "handlers", cache_path=tmp_path / "c.db", sketch_capacity=5)
+
+def test_multi_report_pass_matches_handlers_pipeline(tmp_path, capsys):
+    """Тестирует, что 'handlers' в общем проходе совпадает со специализированным конвейером."""
+    file_path = tmp_path / "multi.log"
+    file_path.write_text((
+        "INFO:django.request:GET /a 200 1ms\r\n"
+        "ERROR:django.request:GET /b/?x=1 500 1ms\n"
+        "WARNING:django.server:GET /ignored 200 1ms\n"
+        "GARBAGE\n"
+    ) * 40)
+
+    expected = analyze_logs([file_path], "handlers")
+    serial = analyze_logs([file_path], ["handlers", "status_by_logger"])
+    parallel = analyze_logs([file_path], ["handlers", "status_by_logger"], workers=2, chunk_size=300)
+    captured = capsys.readouterr()
+
+    assert serial["handlers"] == expected
+    assert parallel["handlers"] == expected
+    assert parallel["status_by_logger"] == serial["status_by_logger"]
+    assert serial["status_by_logger"].counts("django.server") == (0, 0, 40, 0, 0)
+    assert "Analyzing for 'handlers, status_by_logger':" in captured.out
@@ -0,0 +1,36 @@
+import json
+
+from log_analyzer.bench import LogProfile, compare_results, generate_log_lines, main, write_synthetic_log
+from log_analyzer.log_parser import parse_log_line
+
+
+def test_generator_is_deterministic_and_configurable(tmp_path):
+    """Тестирует детерминированность генератора и соблюдение профиля."""
+    profile = LogProfile(request_ratio=1.0, handlers=3, level_weights=(0, 0, 0, 1, 0), malformed_ratio=0.0)
+    lines = generate_log_lines(200, seed=7, profile=profile)
+
+    assert lines == generate_log_lines(200, seed=7, profile=profile)
+    parsed = [parse_log_line(line) for line in lines]
+    assert all(p and p["level"] == "ERROR" for p in parsed)
+    assert len({p["handler"] for p in parsed}) == 3
+
+    path = write_synthetic_log(tmp_path / "sized.log", size_bytes=10_000, profile=LogProfile(malformed_ratio=0.5))
+    assert 10_000 <= path.stat().st_size < 10_200
+
+def test_throughput_results_and_compare(tmp_path, capsys):
+    """Тестирует JSON-результаты throughput и поиск регрессий в compare."""
+    output = tmp_path / "results.json"
+    main(["throughput", "--size-mb", "0.05", "--repeat", "1", "--output", str(output)])
+    result = json.loads(output.read_text(encoding="utf-8"))
+
+    assert set(result["stages"]) == {
+        "parse_log_line", "process_file_for_handlers", "merge_handler_results", "handlers_report_generate"
+    }
+    assert result["input"]["lines"] > 0
+    assert result["stages"]["parse_log_line"]["lines_per_s"] > 0
+
+    slower = json.loads(json.dumps(result))
+    slower["stages"]["parse_log_line"]["seconds"] *= 2
+    comparison = compare_results(result, slower)
+    assert comparison["regressions"] == ["parse_log_line"]
+    assert comparison["stages"]["parse_log_line"]["ratio"] == 2.0
@@ -0,0 +1,88 @@
+import os
+import pytest
+from pathlib import Path
+
+from log_analyzer.analyzer import analyze_logs
+from log_analyzer.cache import AnalysisCache, file_identity
+from log_analyzer.store import HandlerStore
+
+
+def _plain(result):
+    return {handler: dict(levels) for handler, levels in result.items()}
+
+def test_cache_parses_only_appended_tail(tmp_path, capsys):
+    """Тестирует, что повторный запуск разбирает только дописанные строки."""
+    log_path = tmp_path / "app.log"
+    cache_path = tmp_path / "cache.sqlite"
+    log_path.write_text("INFO:django.request:GET /a 200 1ms\nERROR:django.request:GET /b 500 1ms\n")
+
+    first = analyze_logs([log_path], "handlers", cache_path=cache_path)
+    assert _plain(first) == {"/a": {"INFO": 1}, "/b": {"ERROR": 1}}
+    with AnalysisCache(cache_path) as cache:
+        assert cache.get_offset(log_path) == log_path.stat().st_size
+
+    with log_path.open("a") as f:
+        f.write("INFO:django.request:GET /a 200 1ms\n")
+    second = analyze_logs([log_path], "handlers", cache_path=cache_path)
+
+    assert _plain(second) == _plain(analyze_logs([log_path], "handlers"))
+    assert second["/a"]["INFO"] == 2
+
+def test_cache_keeps_unfinished_line_out_of_cache(tmp_path, capsys):
+    """Тестирует, что незавершенная строка учитывается, но не фиксируется в кэше."""
+    log_path = tmp_path / "app.log"
+    cache_path = tmp_path / "cache.sqlite"
+    complete = "INFO:django.request:GET /a 200 1ms\n"
+    log_path.write_text(complete + "ERROR:django.request:GET /partial 500")
+
+    first = analyze_logs([log_path], "handlers", cache_path=cache_path)
+    assert first["/partial"]["ERROR"] == 1
+    with AnalysisCache(cache_path) as cache:
+        assert cache.get_offset(log_path) == len(complete)
+
+    with log_path.open("a") as f:
+        f.write("1ms\n")
+    second = analyze_logs([log_path], "handlers", cache_path=cache_path)
+    assert _plain(second) == {"/a": {"INFO": 1}, "/partial": {"ERROR": 1}}
+
+def test_cache_detects_truncation_and_rotation(tmp_path, capsys):
+    """Тестирует полный пересчет при усечении или подмене файла."""
+    log_path = tmp_path / "app.log"
+    cache_path = tmp_path / "cache.sqlite"
+    log_path.write_text("INFO:django.request:GET /old 200 1ms\n" * 3)
+    analyze_logs([log_path], "handlers", cache_path=cache_path)
+
+    log_path.write_text("INFO:django.request:GET /new 200 1ms\n")
+    truncated = analyze_logs([log_path], "handlers", cache_path=cache_path)
+    assert _plain(truncated) == {"/new": {"INFO": 1}}
+
+    rotated_path = tmp_path / "app.log.1"
+    os.replace(log_path, rotated_path)
+    log_path.write_text("ERROR:django.request:GET /fresh 500 1ms\n" * 2)
+    rotated = analyze_logs([log_path], "handlers", cache_path=cache_path)
+    assert _plain(rotated) == {"/fresh": {"ERROR": 2}}
+
+def test_cache_load_rejects_changed_head(tmp_path):
+    """Тестирует, что изменение начала файла того же размера инвалидирует запись."""
+    log_path = tmp_path / "app.log"
+    log_path.write_text("INFO:django.request:GET /a 200 1ms\n")
+    with AnalysisCache(tmp_path / "cache.sqlite") as cache:
+        identity = file_identity(log_path)
+        data = HandlerStore.from_compact({"/a": [0, 1, 0, 0, 0]})
+        cache.save(log_path, identity, identity.size, data)
+        assert cache.load(log_path, identity) == (identity.size, data)
+
+        log_path.write_text("INFO:django.request:GET /b 200 1ms\n")
+        assert cache.load(log_path, file_identity(log_path)) == (0, HandlerStore())
+
+def test_cache_with_parallel_workers(tmp_path, capsys):
+    """Тестирует инкрементальный режим вместе с параллельной обработкой участков."""
+    log_path = tmp_path / "app.log"
+    cache_path = tmp_path / "cache.sqlite"
+    log_path.write_text("WARNING:django.request:GET /p 200 1ms\n" * 100)
+    analyze_logs([log_path], "handlers", workers=2, chunk_size=256, cache_path=cache_path)
+    with log_path.open("a") as f:
+        f.write("WARNING:django.request:GET /p 200 1ms\n" * 50)
+
+    result = analyze_logs([log_path], "handlers", workers=2, chunk_size=256, cache_path=cache_path)
+    assert _plain(result) == {"/p": {"WARNING": 150}}
@@ -0,0 +1,117 @@
+import gzip
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from log_analyzer.analyzer import analyze_logs
+from log_analyzer.columnar import COLUMNAR_FORMAT_VERSION, ColumnarStore, ingest_logs, is_columnar_store
+from log_analyzer.log_parser import parse_timestamp
+from log_analyzer.main import main
+from log_analyzer.normalize import build_normalizer
+from log_analyzer.store import HandlerStore
+
+LOG_CONTENT = (
+    "INFO:django.request:GET /api/v1/users/1/ 200 1ms\n"
+    "INFO:django.db.backends:(0.001) SELECT 1\n"
+    "Traceback (most recent call last):\n"
+    "ERROR:django.request:Internal Server Error: /api/v1/users/2/\n"
+    "WARNING:django.request:GET /api/v1/orders/?page=2 404 1ms\n"
+    "CRITICAL:django.security:Suspicious operation\n"
+)
+
+
+@pytest.fixture
+def store_dir(tmp_path, capsys):
+    log_path = tmp_path / "app.log"
+    log_path.write_text(LOG_CONTENT * 3)
+    gz_path = tmp_path / "app.log.1.gz"
+    with gzip.open(gz_path, "wt") as f:
+        f.write(LOG_CONTENT)
+    store = tmp_path / "store"
+    summary = ingest_logs([log_path, gz_path], store)
+    assert summary.rows == 20 and summary.files == 2
+    capsys.readouterr()
+    return store
+
+
+def test_store_counts_match_text_analysis(tmp_path, store_dir, capsys):
+    """Тестирует совпадение группировки по колонкам с разбором исходного текста."""
+    log_files = [tmp_path / "app.log", tmp_path / "app.log.1.gz"]
+    store = ColumnarStore(store_dir)
+    normalizer = build_normalizer(builtin=True)
+
+    assert is_columnar_store(store_dir) and not is_columnar_store(tmp_path / "app.log")
+    assert store.count_handlers() == HandlerStore.from_mapping(analyze_logs(log_files, "handlers"))
+    assert store.count_handlers(normalizer) == HandlerStore.from_mapping(
+        analyze_logs(log_files, "handlers", normalizer=normalizer)
+    )
+    assert store.count_by_logger() == analyze_logs(log_files, "status_by_logger")
+
+
+def test_store_provenance_offsets(tmp_path, store_dir):
+    """Тестирует, что смещения указывают на начало исходной строки записи."""
+    provenance = list(ColumnarStore(store_dir).iter_provenance())
+    text = (tmp_path / "app.log").read_bytes()
+
+    assert len(provenance) == 20
+    path, offset = provenance[1]
+    assert path == str(tmp_path / "app.log")
+    assert text[offset:].startswith(b"INFO:django.db.backends:")
+    assert provenance[-1][0] == str(tmp_path / "app.log.1.gz")
+
+
+def test_analyze_logs_reads_store(tmp_path, store_dir, capsys):
+    """Тестирует отчеты по хранилищу вместе с обычным файлом и отказ для отчетов без from_columnar."""
+    log_path = tmp_path / "app.log"
+    combined = analyze_logs([store_dir, log_path], ["handlers", "status_by_logger"])
+    assert combined["handlers"].counts("/api/v1/users/1/") == (0, 7, 0, 0, 0)
+    assert combined["status_by_logger"].counts("django.security") == (0, 0, 0, 0, 7)
+
+    with pytest.raises(ValueError, match="columnar store"):
+        analyze_logs([store_dir], "error_summary")
+
+
+def test_store_rejects_unknown_format(store_dir):
+    manifest = store_dir / "manifest.json"
+    manifest.write_text(manifest.read_text().replace(f'"format_version": {COLUMNAR_FORMAT_VERSION}', '"format_version": 99'))
+    with pytest.raises(ValueError, match="Unsupported columnar store format"):
+        ColumnarStore(store_dir)
+
+
+def test_main_ingest_then_report(tmp_path, capsys):
+    """Тестирует подкоманду ingest и последующий отчет по созданному хранилищу."""
+    log_path = tmp_path / "app.log"
+    log_path.write_text(LOG_CONTENT)
+    store = tmp_path / "store"
+
+    with patch.object(sys, "argv", ["log_analyzer", "ingest", str(log_path), "--output", str(store)]):
+        main()
+    assert "Ingested 5 records from 1 file(s)" in capsys.readouterr().out
+
+    with patch.object(sys, "argv", ["log_analyzer", "ingest", str(log_path), "--output", str(store), "--no-progress"]):
+        main()
+    assert "Ingesting:" not in capsys.readouterr().out
+
+    with patch.object(sys, "argv", ["log_analyzer", str(store), "--report", "handlers"]):
+        main()
+    output = capsys.readouterr().out
+    assert "Total requests: 2" in output
+    assert "/api/v1/orders/" in output
+
+
+def test_store_time_window(tmp_path, capsys):
+    """Тестирует отбор по колонке времени; записи без метки в интервал не попадают."""
+    log_path = tmp_path / "timed.log"
+    log_path.write_text(
+        "2024-05-01 14:00:00,000 INFO:django.request:GET /a/ 200 1ms\n"
+        "2024-05-01 15:00:00,000 ERROR:django.request:GET /b/ 500 1ms\n"
+        "INFO:django.request:GET /c/ 200 1ms\n"
+    )
+    store_dir = tmp_path / "store"
+    ingest_logs([log_path], store_dir)
+    since = parse_timestamp("2024-05-01 14:30:00")
+
+    assert list(ColumnarStore(store_dir).count_handlers(since=since)) == ["/b/"]
+    assert analyze_logs([store_dir], "handlers", since=since) == analyze_logs([log_path], "handlers", since=since)
+    assert ColumnarStore(store_dir).count_by_logger(until=since).counts("django.request") == (0, 1, 0, 0, 0)
@@ -0,0 +1,99 @@
+import bz2
+import gzip
+import lzma
+import pytest
+from pathlib import Path
+
+from log_analyzer.analyzer import analyze_logs
+from log_analyzer.compression import detect_compression, iter_line_blocks, open_log_text
+
+LOG_CONTENT = (
+    "INFO:django.request:GET /api/v1/users/ 200 45ms\n"
+    "ERROR:django.request:PUT /api/v1/users/ 500 150ms\n"
+    "INFO:django.db.backends:SELECT 1\n"
+    "WARNING:django.request:GET /admin/?q=1 200 30ms\n"
+) * 10
+
+COMPRESSORS = {
+    "gzip": gzip.compress,
+    "bz2": bz2.compress,
+    "xz": lzma.compress,
+}
+
+
+def _plain(result):
+    return {handler: dict(levels) for handler, levels in result.items()}
+
+@pytest.mark.parametrize("name", sorted(COMPRESSORS))
+def test_detect_compression_by_magic_bytes(tmp_path, name):
+    """Тестирует определение формата по содержимому, а не по расширению."""
+    file_path = tmp_path / "django.log.1"
+    file_path.write_bytes(COMPRESSORS[name](LOG_CONTENT.encode()))
+    assert detect_compression(file_path) == name
+    with open_log_text(file_path) as f:
+        assert f.read() == LOG_CONTENT
+
+def test_detect_compression_plain_text(tmp_path):
+    file_path = tmp_path / "django.log.gz"
+    file_path.write_text(LOG_CONTENT)
+    assert detect_compression(file_path) is None
+
+@pytest.mark.parametrize("engine", ["lines", "mmap"])
+@pytest.mark.parametrize("name", sorted(COMPRESSORS))
+def test_analyze_compressed_logs_matches_plain(tmp_path, capsys, name, engine):
+    """Тестирует, что анализ архива совпадает с анализом исходного текста."""
+    plain_path = tmp_path / "django.log"
+    plain_path.write_text(LOG_CONTENT)
+    archive_path = tmp_path / f"django.log.1.{name}"
+    archive_path.write_bytes(COMPRESSORS[name](LOG_CONTENT.encode()))
+
+    expected = _plain(analyze_logs([plain_path], "handlers"))
+    assert _plain(analyze_logs([archive_path], "handlers", engine=engine)) == expected
+    assert expected["/api/v1/users/"] == {"INFO": 10, "ERROR": 10}
+
+def test_analyze_compressed_logs_parallel_and_cached(tmp_path, capsys):
+    """Тестирует архивы в параллельном и инкрементальном режимах."""
+    archives = []
+    for name, compress in COMPRESSORS.items():
+        archive_path = tmp_path / f"django.log.{name}"
+        archive_path.write_bytes(compress(LOG_CONTENT.encode()))
+        archives.append(archive_path)
+    cache_path = tmp_path / "cache.sqlite"
+
+    parallel = analyze_logs(archives, "handlers", workers=2, chunk_size=16)
+    cached_first = analyze_logs(archives, "handlers", cache_path=cache_path, chunk_size=16)
+    cached_second = analyze_logs(archives, "handlers", cache_path=cache_path, chunk_size=16)
+
+    assert _plain(parallel)["/api/v1/users/"] == {"INFO": 30, "ERROR": 30}
+    assert _plain(cached_first) == _plain(parallel)
+    assert _plain(cached_second) == _plain(parallel)
+
+def test_analyze_truncated_archive_warns(tmp_path, capsys):
+    """Тестирует, что поврежденный архив не прерывает анализ."""
+    archive_path = tmp_path / "broken.log.gz"
+    archive_path.write_bytes(gzip.compress(LOG_CONTENT.encode())[:-20])
+    analyze_logs([archive_path], "handlers")
+    assert "Warning: Could not read file" in capsys.readouterr().err
+
+@pytest.mark.parametrize("name", ["gzip", "xz"])
+def test_analyze_corrupt_archive_warns(tmp_path, capsys, name):
+    """Тестирует, что архив с поврежденным сжатым потоком пропускается с предупреждением."""
+    data = bytearray(COMPRESSORS[name](LOG_CONTENT.encode()))
+    data[len(data) // 2:len(data) // 2 + 16] = b"\xff" * 16
+    archive_path = tmp_path / f"broken.log.{name}"
+    archive_path.write_bytes(bytes(data))
+    plain_path = tmp_path / "django.log"
+    plain_path.write_text(LOG_CONTENT)
+
+    result = _plain(analyze_logs([archive_path, plain_path], "handlers"))
+
+    assert "Warning: Could not read file" in capsys.readouterr().err
+    assert result["/api/v1/users/"]["INFO"] >= 10
+
+def test_iter_line_blocks_keeps_lines_whole():
+    """Тестирует, что блоки режутся только по концам строк."""
+    import io
+    data = b"first line\nsecond line\nthird"
+    blocks = list(iter_line_blocks(io.BytesIO(data), block_size=4))
+    assert b"".join(blocks) == data
+    assert all(block.endswith(b"\n") for block in blocks[:-1])
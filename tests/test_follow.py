@@ -0,0 +1,122 @@
+import os
+import pytest
+from pathlib import Path
+
+from log_analyzer.follow import FileFollower, follow_logs
+
+
+def test_follower_reads_only_new_complete_lines(tmp_path):
+    """Тестирует чтение только дописанных завершенных строк."""
+    log_path = tmp_path / "app.log"
+    log_path.write_text("INFO:django.request:GET /a 200 1ms\n")
+    follower = FileFollower(log_path)
+
+    assert follower.poll() == ["INFO:django.request:GET /a 200 1ms\n"]
+    assert follower.poll() == []
+
+    with log_path.open("a") as f:
+        f.write("ERROR:django.request:GET /b")
+    assert follower.poll() == []
+    with log_path.open("a") as f:
+        f.write(" 500 1ms\n")
+    assert follower.poll() == ["ERROR:django.request:GET /b 500 1ms\n"]
+    follower.close()
+
+def test_follower_handles_rotation_and_truncation(tmp_path):
+    """Тестирует переключение на новый файл после ротации и чтение с начала после усечения."""
+    log_path = tmp_path / "app.log"
+    log_path.write_text("line1\n")
+    follower = FileFollower(log_path)
+    assert follower.poll() == ["line1\n"]
+
+    with log_path.open("a") as f:
+        f.write("line2\n")
+    os.replace(log_path, tmp_path / "app.log.1")
+    log_path.write_text("new1\n")
+    assert follower.poll() == ["line2\n", "new1\n"]
+
+    log_path.write_text("")
+    assert follower.poll() == []
+    with log_path.open("a") as f:
+        f.write("after_truncate\n")
+    assert follower.poll() == ["after_truncate\n"]
+    follower.close()
+
+def test_follower_waits_for_missing_file(tmp_path):
+    """Тестирует ожидание появления файла, как у tail -F."""
+    log_path = tmp_path / "later.log"
+    follower = FileFollower(log_path)
+    assert follower.poll() == []
+    log_path.write_text("hello\n")
+    assert follower.poll() == ["hello\n"]
+    follower.close()
+
+def test_follower_from_end_skips_existing_data(tmp_path):
+    """Тестирует старт с конца файла; файл, появившийся позже, читается с начала."""
+    log_path = tmp_path / "app.log"
+    log_path.write_text("old\n")
+    follower = FileFollower(log_path, from_end=True)
+    assert follower.poll() == []
+    with log_path.open("a") as f:
+        f.write("new\n")
+    assert follower.poll() == ["new\n"]
+    follower.close()
+
+    later_path = tmp_path / "later.log"
+    follower = FileFollower(later_path, from_end=True)
+    assert follower.poll() == []
+    later_path.write_text("first\n")
+    assert follower.poll() == ["first\n"]
+    follower.close()
+
+def test_follow_logs_from_end(tmp_path, capsys):
+    """Тестирует, что follow_logs(from_end=True) считает только дописанные строки."""
+    log_path = tmp_path / "app.log"
+    log_path.write_text("INFO:django.request:GET /a 200 1ms\n" * 100)
+
+    def append_line(_interval):
+        with log_path.open("a") as f:
+            f.write("ERROR:django.request:GET /a 500 1ms\n")
+
+    result = follow_logs([log_path], interval=0.1, from_end=True, max_iterations=2, sleep=append_line)
+
+    assert dict(result["/a"]) == {"ERROR": 1}
+
+def test_follow_logs_updates_report_incrementally(tmp_path, capsys):
+    """Тестирует накопление счетчиков между циклами опроса без повторного чтения."""
+    log_path = tmp_path / "app.log"
+    log_path.write_text("INFO:django.request:GET /a 200 1ms\n")
+
+    def append_line(_interval):
+        with log_path.open("a") as f:
+            f.write("ERROR:django.request:GET /a 500 1ms\n")
+
+    result = follow_logs([log_path], interval=0.1, max_iterations=3, sleep=append_line)
+    output = capsys.readouterr().out
+
+    assert dict(result["/a"]) == {"INFO": 1, "ERROR": 2}
+    assert output.count("Total requests:") == 3
+    assert "Total requests: 3" in output
+
+def test_follow_logs_catches_up_before_refresh(tmp_path, capsys, monkeypatch):
+    """Тестирует, что перед перерисовкой файл дочитывается до конца, а не на одну пачку."""
+    monkeypatch.setattr("log_analyzer.follow.MAX_READ_PER_POLL", 256)
+    log_path = tmp_path / "app.log"
+    log_path.write_text("INFO:django.request:GET /a 200 1ms\n" * 1000)
+
+    result = follow_logs([log_path], interval=60, max_iterations=1, sleep=lambda _interval: None)
+
+    assert dict(result["/a"]) == {"INFO": 1000}
+
+def test_follow_logs_with_approx_sketch(tmp_path, capsys):
+    """Тестирует ограниченную по памяти сводку в режиме слежения."""
+    log_path = tmp_path / "app.log"
+    log_path.write_text(
+        "INFO:django.request:GET /hot 200 1ms\n" * 50
+        + "".join(f"INFO:django.request:GET /cold/{i} 200 1ms\n" for i in range(100))
+    )
+
+    result = follow_logs([log_path], max_iterations=1, sleep=lambda _interval: None, sketch_capacity=10)
+
+    assert len(result) == 10 and result.total() == 150
+    assert result.top(1)[0][0] == "/hot"
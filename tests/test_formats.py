@@ -0,0 +1,167 @@
+import json
+
+import pytest
+
+from log_analyzer.analyzer import analyze_logs
+from log_analyzer.columnar import ColumnarStore, ingest_logs
+from log_analyzer.formats import (
+    AUTO_FORMAT,
+    LOG_FORMATS,
+    SNIFF_BYTES,
+    compile_scanner,
+    detect_formats,
+    get_format_names,
+    get_scanner,
+)
+from log_analyzer.log_parser import classify_record, parse_timestamp, record_request_metrics
+from log_analyzer.main import main
+from log_analyzer.stats import RunStats
+
+DJANGO_LINE = "2024-05-01 14:00:00,100 ERROR:django.request:GET /api/users/ 500 1ms"
+GUNICORN_LINE = (
+    '10.0.0.1 - - [01/May/2024:14:00:01 +0000] "GET /api/users/?page=2 HTTP/1.1" 500 12 "-" "curl/8.0"'
+)
+NGINX_LINE = (
+    '10.0.0.2 - bob [01/May/2024:16:00:02 +0200] "POST /api/orders/ HTTP/1.1" 404 0 "https://x/" '
+    '"Mozilla/5.0" rt=0.012 uct="0.000" uht="0.010" urt="0.010"'
+)
+JSON_LINE = json.dumps({
+    "event": "request_finished",
+    "level": "warning",
+    "logger": "django_structlog.middlewares.request",
+    "timestamp": "2024-05-01T14:00:03Z",
+    "request": "GET /api/users/?page=3",
+})
+
+@pytest.mark.parametrize(
+    "name, line, level, logger, path, seconds",
+    [
+        ("django", DJANGO_LINE, "ERROR", "django.request", None, 1714572000.1),
+        ("gunicorn", GUNICORN_LINE, "ERROR", "gunicorn.access", "/api/users/", 1714572001.0),
+        ("nginx", NGINX_LINE, "WARNING", "nginx.access", "/api/orders/", 1714572002.0),
+        ("json", JSON_LINE, "WARNING", "django_structlog.middlewares.request", "/api/users/", 1714572003.0),
+    ],
+)
+def test_format_parses_own_lines_only(name, line, level, logger, path, seconds):
+    """Тестирует, что каждый формат разбирает свои строки и не принимает строки других форматов."""
+    record = compile_scanner((name,))(line)
+    assert (record.level, record.logger, record.path) == (level, logger, path)
+    assert parse_timestamp(record.timestamp) == seconds
+    for other in LOG_FORMATS:
+        if other != name:
+            assert compile_scanner((other,))(line) is None
+
+def test_combined_scanner_dispatches_by_first_char():
+    """Тестирует сканер всех форматов на перемешанных строках, включая неподходящие."""
+    scan = get_scanner(AUTO_FORMAT)
+    records = [scan(line) for line in (DJANGO_LINE, GUNICORN_LINE, NGINX_LINE, JSON_LINE)]
+    assert [record.logger for record in records] == [
+        "django.request", "gunicorn.access", "nginx.access", "django_structlog.middlewares.request"
+    ]
+    assert classify_record(records[0]) == ("ERROR", "/api/users/")
+    for garbage in ("", "Traceback (most recent call last):", "{not json", "[1, 2]", '{"level": "verbose"}'):
+        assert scan(garbage) is None
+
+def test_json_format_variants():
+    """Тестирует поля python-json-logger, синонимы уровней и время в секундах POSIX."""
+    scan = compile_scanner(("json",))
+    record = scan('{"levelname": "WARN", "name": "app", "message": " slow ", "path": "/a/?x=1", "time": 1714572000}')
+    assert record[:5] == ("WARNING", "app", "slow", "2024-05-01T14:00:00Z", "/a/")
+    record = scan('{"level": "exception", "event": "boom"}')
+    assert (record.level, record.logger, record.path) == ("ERROR", "root", None)
+
+def test_request_metrics_of_every_format():
+    """Тестирует код ответа, длительность и размер ответа, извлеченные каждым форматом."""
+    scan = get_scanner(AUTO_FORMAT)
+    gunicorn_timed = GUNICORN_LINE + " 0.250"
+    json_timed = json.dumps({"level": "info", "event": "done", "status_code": "201", "duration": 0.5, "bytes": 7})
+    metrics = [
+        record_request_metrics(scan(line))
+        for line in (DJANGO_LINE, GUNICORN_LINE, gunicorn_timed, NGINX_LINE, JSON_LINE, json_timed)
+    ]
+    assert metrics == [
+        (500, 1.0, None),
+        (500, None, 12),
+        (500, 250.0, 12),
+        (404, 12.0, 0),
+        (None, None, None),
+        (201, 500.0, 7),
+    ]
+    assert record_request_metrics(scan('{"level": "info", "duration_ms": -1, "bytes": Infinity}')) == (None, None, None)
+
+def test_access_log_unusual_requests():
+    """Тестирует запросы без пути и экранированные кавычки в журнале доступа."""
+    scan = compile_scanner(("gunicorn",))
+    record = scan('::1 - - [01/May/2024:14:00:00 +0000] "-" 400 0 "-" "-"')
+    assert (record.level, record.path) == ("WARNING", None)
+    record = scan('10.0.0.1 - - [01/May/2024:14:00:00 +0000] "GET /a HTTP/1.1" 200 5 "-" "x \\"quoted\\" y" 0.003')
+    assert (record.level, record.path) == ("INFO", "/a")
+
+def test_detect_formats_orders_by_frequency():
+    """Тестирует распознавание: самый частый формат первым, обрезанная последняя строка не учитывается."""
+    head = "\n".join([JSON_LINE, GUNICORN_LINE, JSON_LINE, "garbage"]).encode()
+    assert detect_formats(head) == ("json", "gunicorn")
+    assert detect_formats(b"garbage\n\n") == ("django",)
+    truncated = (DJANGO_LINE + "\n") * (SNIFF_BYTES // len(DJANGO_LINE)) + GUNICORN_LINE
+    assert detect_formats(truncated.encode()[:SNIFF_BYTES]) == ("django",)
+    assert get_format_names() == ("auto", "django", "gunicorn", "nginx", "json")
+
+@pytest.mark.parametrize("engine", ["lines", "mmap"])
+def test_analyze_logs_auto_detects_each_file(tmp_path, capsys, engine):
+    """Тестирует --log-format auto на файлах разных форматов, в одном проходе и в отчете 'handlers'."""
+    files = []
+    for name, line in (("django", DJANGO_LINE), ("gunicorn", GUNICORN_LINE), ("nginx", NGINX_LINE), ("json", JSON_LINE)):
+        path = tmp_path / f"{name}.log"
+        path.write_text((line + "\n") * 3)
+        files.append(path)
+
+    stats = RunStats()
+    handlers = analyze_logs(files, "handlers", engine=engine, stats=stats)
+    assert handlers.counts("/api/users/") == (0, 0, 3, 6, 0)
+    assert handlers.counts("/api/orders/") == (0, 0, 3, 0, 0)
+    assert stats.totals().lines_matched == 12
+
+    reports = analyze_logs(files, ["handlers", "status_by_logger"], workers=2, chunk_size=64)
+    assert reports["handlers"].counts("/api/users/") == (0, 0, 3, 6, 0)
+    assert reports["status_by_logger"].counts("nginx.access") == (0, 0, 3, 0, 0)
+
+    explicit = analyze_logs(files, "handlers", log_format="gunicorn", engine=engine)
+    assert {handler: tuple(counts) for handler, counts in explicit.rows()} == {"/api/users/": (0, 0, 0, 3, 0)}
+
+def test_time_window_and_timeline_on_access_log(tmp_path, capsys):
+    """Тестирует --since/--until и 'timeline' на журнале nginx со смещением во времени."""
+    lines = [
+        f'10.0.0.1 - - [01/May/2024:16:0{minute}:00 +0200] "GET /p{minute % 2}/ HTTP/1.1" 200 1 "-" "-" rt=0.001'
+        for minute in range(6)
+    ]
+    path = tmp_path / "access.log"
+    path.write_text("\n".join(lines) + "\n")
+
+    since = parse_timestamp("2024-05-01 14:02:00")
+    until = parse_timestamp("2024-05-01 14:04:00")
+    result = analyze_logs([path], "handlers", since=since, until=until)
+    assert {handler: tuple(counts) for handler, counts in result.rows()} == {"/p0/": (0, 1, 0, 0, 0), "/p1/": (0, 1, 0, 0, 0)}
+
+    timeline = analyze_logs([path], "timeline", bucket=120)
+    assert sorted(timeline.buckets) == [1714572000, 1714572120, 1714572240]
+
+def test_ingest_access_log(tmp_path, capsys):
+    """Тестирует колоночное хранилище по журналу доступа: путь берется из строки запроса."""
+    path = tmp_path / "access.log"
+    path.write_text(f"{GUNICORN_LINE}\n{GUNICORN_LINE}\n")
+    store = tmp_path / "store"
+    summary = ingest_logs([path], store)
+    assert summary.rows == 2
+    assert ColumnarStore(store).count_handlers().counts("/api/users/") == (0, 0, 0, 2, 0)
+
+def test_main_log_format_option(tmp_path, capsys):
+    """Тестирует --log-format в командной строке."""
+    path = tmp_path / "app.log"
+    path.write_text(f"{JSON_LINE}\n{DJANGO_LINE}\n")
+
+    main([str(path), "--report", "handlers", "--log-format", "json", "--format", "json", "--workers", "1"])
+    payload = json.loads(capsys.readouterr().out)
+    assert payload["handlers"]["total_requests"] == 1
+
+    with pytest.raises(SystemExit):
+        main([str(path), "--report", "handlers", "--log-format", "apache"])
@@ -1,5 +1,5 @@
 import pytest
-from log_analyzer.log_parser import parse_log_line
+from log_analyzer.log_parser import parse_log_line, parse_log_record, parse_timestamp, scan_request_lines
 
 @pytest.mark.parametrize(
     "line, expected",
@@ -30,4 +30,61 @@ def test_parse_log_line_valid(line, expected):
 )
 def test_parse_log_line_invalid_or_irrelevant(line):
     """Тестирует строки, которые не должны парситься как валидный запрос."""
-    assert parse_log_line(line) is None
\ No newline at end of file
+    assert parse_log_line(line) is None
+
+
+def test_scan_request_lines_matches_parse_log_line():
+    """Тестирует, что байтовый сканер дает те же результаты, что и parse_log_line."""
+    lines = [
+        "INFO:django.request:GET /api/v1/users/ 123 45ms",
+        "INFO:django.request:GET /api/v1/items/?active=true 200 25ms",
+        "INFO:django.server:\"GET /api/v1/users/ HTTP/1.1\" 200 1863",
+        "DEBUG:django.request No path here",
+        "WARNING:django.request:",
+        "ERROR:django.request:   GET\t/tabbed/ 500 1ms  ",
+        "INFO:django.request:GET /caf\u00e9/ 200 1ms",
+        "Just some random text",
+        "CRITICAL:django.request:DELETE /api/v1/users/ 503 200ms",
+    ]
+    expected = [
+        (parsed["level"], parsed["handler"])
+        for parsed in map(parse_log_line, lines)
+        if parsed
+    ]
+    buffer = "\n".join(lines).encode("utf-8")
+    assert list(scan_request_lines(buffer)) == expected
+
+def test_scan_request_lines_respects_range_and_carriage_return():
+    """Тестирует диапазон сканирования и одиночный '\\r' как конец строки."""
+    buffer = b"INFO:django.request:GET /a 200 1ms\rERROR:django.request:GET /b 500 1ms\r\nINFO:django.request:GET /c 200 1ms\n"
+    assert list(scan_request_lines(buffer)) == [("INFO", "/a"), ("ERROR", "/b"), ("INFO", "/c")]
+    second_line_start = buffer.index(b"\n") + 1
+    assert list(scan_request_lines(buffer, second_line_start)) == [("INFO", "/c")]
+
+@pytest.mark.parametrize(
+    "line, timestamp, seconds",
+    [
+        ("2024-05-01 14:00:00,250 INFO:django.request:GET /a/ 200 1ms", "2024-05-01 14:00:00,250", 1714572000.25),
+        ("[2024-05-01T16:00:00+02:00] INFO:django.request:GET /a/ 200 1ms", "2024-05-01T16:00:00+02:00", 1714572000.0),
+        ("[01/May/2024 14:00:00] INFO:django.request:GET /a/ 200 1ms", "01/May/2024 14:00:00", 1714572000.0),
+        ("INFO:django.request:GET /a/ 200 1ms", None, None),
+    ],
+)
+def test_parse_log_record_timestamps(line, timestamp, seconds):
+    """Тестирует метки времени распространенных форматтеров Django перед уровнем."""
+    record = parse_log_record(line)
+    assert (record.level, record.logger, record.timestamp) == ("INFO", "django.request", timestamp)
+    assert parse_log_line(line) == {"level": "INFO", "handler": "/a/"}
+    assert list(scan_request_lines(line.encode("utf-8"))) == [("INFO", "/a/")]
+    if timestamp is not None:
+        assert parse_timestamp(timestamp) == seconds
+
+def test_parse_timestamp_access_log_offset():
+    """Тестирует время журналов доступа ('01/May/2024:16:00:00 +0200')."""
+    assert parse_timestamp("01/May/2024:16:00:00 +0200") == 1714572000.0
+    assert parse_timestamp("01/May/2024:14:00:00 +0000") == parse_timestamp("01/May/2024 14:00:00")
+
+def test_parse_timestamp_rejects_invalid():
+    assert parse_timestamp("2024-13-01 00:00:00") is None
+    assert parse_timestamp("01/Foo/2024 14:00:00") is None
+    assert parse_log_record("2024-05-01 INFO:django.request:GET /a/ 200 1ms") is None
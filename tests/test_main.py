@@ -1,17 +1,28 @@
+import json
 import pytest
 import sys
 from pathlib import Path
-from unittest.mock import patch, MagicMock
+from unittest.mock import ANY, patch, MagicMock
 
 from log_analyzer.main import parse_arguments, main
 
+def _cli_args(log_files, **overrides):
+    """Аргументы CLI со значениями по умолчанию из parse_arguments и заданными переопределениями."""
+    args = parse_arguments(list(log_files) + ["--report", "handlers"])
+    for name, value in overrides.items():
+        setattr(args, name, value)
+    return args
+
 def test_parse_arguments_ok(tmp_path):
     f1 = tmp_path / "f1.log"
     f2 = tmp_path / "f2.log"
     args_list = [str(f1), str(f2), "--report", "handlers"]
     parsed_args = parse_arguments(args_list)
     assert parsed_args.log_files == [str(f1), str(f2)]
-    assert parsed_args.report == "handlers"
+    assert parsed_args.report == ["handlers"]
+
+    parsed_args = parse_arguments([str(f1), "--report", "handlers,error_summary,handlers"])
+    assert parsed_args.report == ["handlers", "error_summary"]
 
 def test_parse_arguments_missing_report():
     with pytest.raises(SystemExit):
@@ -26,15 +37,15 @@ def test_parse_arguments_no_files():
         parse_arguments(["--report", "handlers"])
 
 @patch('log_analyzer.main.parse_arguments')
-@patch('log_analyzer.main.analyze_logs')
-@patch('log_analyzer.main.get_report_generator')
+@patch('log_analyzer.analyzer.analyze_logs')
+@patch('log_analyzer.reporting.get_report_generator')
 def test_main_flow_ok(mock_get_generator, mock_analyze, mock_parse_args, tmp_path):
     f1 = tmp_path / "main_ok1.log"
     f2 = tmp_path / "main_ok2.log"
     f1.touch()
     f2.touch()
 
-    mock_parse_args.return_value = MagicMock(log_files=[str(f1), str(f2)], report="handlers")
+    mock_parse_args.return_value = _cli_args([str(f1), str(f2)])
     mock_analyze.return_value = {"some": "data"}
     mock_report_instance = MagicMock()
     mock_get_generator.return_value = mock_report_instance
@@ -51,22 +62,22 @@ def test_main_flow_ok(mock_get_generator, mock_analyze, mock_parse_args, tmp_pat
     assert analyze_call_args[1] == "handlers"
     mock_analyze.assert_called_once()
     mock_get_generator.assert_called_once_with("handlers")
-    mock_report_instance.generate.assert_called_once_with({"some": "data"})
+    mock_report_instance.generate.assert_called_once_with({"some": "data"}, top=None, sort_by="total", writer=ANY)
 
 @patch('log_analyzer.main.parse_arguments')
 def test_main_file_not_found(mock_parse_args):
-    mock_parse_args.return_value = MagicMock(log_files=["non_existent_file.log"], report="handlers")
+    mock_parse_args.return_value = _cli_args(["non_existent_file.log"])
     with pytest.raises(SystemExit) as e:
         main()
     assert e.value.code == 1
 
 @patch('log_analyzer.main.parse_arguments')
-@patch('log_analyzer.main.analyze_logs')
-@patch('log_analyzer.main.get_report_generator')
+@patch('log_analyzer.analyzer.analyze_logs')
+@patch('log_analyzer.reporting.get_report_generator')
 def test_main_analysis_error(mock_get_generator, mock_analyze, mock_parse_args, tmp_path):
     f1 = tmp_path / "dummy_ae.log"
     f1.touch()
-    mock_parse_args.return_value = MagicMock(log_files=[str(f1)], report="handlers")
+    mock_parse_args.return_value = _cli_args([str(f1)])
     mock_analyze.side_effect = ValueError("Analysis failed!")
 
     with pytest.raises(SystemExit) as e:
@@ -75,12 +86,12 @@ def test_main_analysis_error(mock_get_generator, mock_analyze, mock_parse_args,
     mock_get_generator.assert_not_called()
 
 @patch('log_analyzer.main.parse_arguments')
-@patch('log_analyzer.main.analyze_logs')
-@patch('log_analyzer.main.get_report_generator')
+@patch('log_analyzer.analyzer.analyze_logs')
+@patch('log_analyzer.reporting.get_report_generator')
 def test_main_reporting_error(mock_get_generator, mock_analyze, mock_parse_args, tmp_path):
     f1 = tmp_path / "dummy_re.log"
     f1.touch()
-    mock_parse_args.return_value = MagicMock(log_files=[str(f1)], report="handlers")
+    mock_parse_args.return_value = _cli_args([str(f1)])
     mock_analyze.return_value = {"some": "data"}
     mock_report_instance = MagicMock()
     mock_report_instance.generate.side_effect = ValueError("Reporting failed!")
@@ -90,3 +101,222 @@ def test_main_reporting_error(mock_get_generator, mock_analyze, mock_parse_args,
         main()
     assert e.value.code == 1
     mock_report_instance.generate.assert_called_once()
+
+def test_parse_arguments_workers(tmp_path):
+    parsed_args = parse_arguments([str(tmp_path / "f1.log"), "--report", "handlers", "--workers", "3"])
+    assert parsed_args.workers == 3
+
+def test_parse_arguments_invalid_workers():
+    with pytest.raises(SystemExit):
+        parse_arguments(["file1.log", "--report", "handlers", "--workers", "0"])
+
+def test_parse_arguments_chunk_size_default(tmp_path):
+    parsed_args = parse_arguments([str(tmp_path / "f1.log"), "--report", "handlers"])
+    assert parsed_args.chunk_size == 64
+
+def test_parse_arguments_engine(tmp_path):
+    parsed_args = parse_arguments([str(tmp_path / "f1.log"), "--report", "handlers", "--engine", "mmap"])
+    assert parsed_args.engine == "mmap"
+    with pytest.raises(SystemExit):
+        parse_arguments([str(tmp_path / "f1.log"), "--report", "handlers", "--engine", "unknown"])
+
+def test_parse_arguments_follow(tmp_path):
+    parsed_args = parse_arguments([str(tmp_path / "f1.log"), "--report", "handlers", "--follow", "--interval", "0.5"])
+    assert parsed_args.follow is True
+    assert parsed_args.interval == 0.5
+    with pytest.raises(SystemExit):
+        parse_arguments([str(tmp_path / "f1.log"), "--report", "handlers", "--interval", "0"])
+
+@patch('log_analyzer.main.parse_arguments')
+@patch('log_analyzer.follow.follow_logs')
+@patch('log_analyzer.analyzer.analyze_logs')
+def test_main_follow_mode(mock_analyze, mock_follow, mock_parse_args, tmp_path):
+    missing = tmp_path / "not_yet_created.log"
+    mock_parse_args.return_value = _cli_args([str(missing)], follow=True, interval=1.0)
+
+    main()
+
+    mock_follow.assert_called_once_with(
+        [missing], interval=1.0, from_end=False, normalizer=None, top=None, sort_by="total", log_format="auto",
+        sketch_capacity=None,
+    )
+    mock_analyze.assert_not_called()
+
+    mock_follow.reset_mock()
+    mock_parse_args.return_value = _cli_args([str(missing)], follow=True, from_end=True)
+    main()
+    assert mock_follow.call_args.kwargs["from_end"] is True
+
+@patch('log_analyzer.main.parse_arguments')
+def test_main_from_end_requires_follow(mock_parse_args, tmp_path, capsys):
+    mock_parse_args.return_value = _cli_args([str(tmp_path / "f1.log")], from_end=True)
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 1
+    assert "--from-end requires --follow" in capsys.readouterr().err
+
+@patch('log_analyzer.main.parse_arguments')
+@patch('log_analyzer.analyzer.analyze_logs')
+@patch('log_analyzer.reporting.get_report_generator')
+def test_main_passes_normalizer(mock_get_generator, mock_analyze, mock_parse_args, tmp_path):
+    f1 = tmp_path / "norm.log"
+    f1.touch()
+    mock_parse_args.return_value = _cli_args([str(f1)], normalize=True, normalize_rule=["^/v[0-9]+/=/"])
+
+    main()
+
+    normalizer = mock_analyze.call_args.kwargs["normalizer"]
+    assert normalizer("/v2/users/42/") == "/users/{id}/"
+
+@patch('log_analyzer.main.parse_arguments')
+def test_main_invalid_normalize_rule(mock_parse_args, tmp_path):
+    f1 = tmp_path / "norm_bad.log"
+    f1.touch()
+    mock_parse_args.return_value = _cli_args([str(f1)], normalize_rule=["no-separator"])
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 1
+
+@patch('log_analyzer.main.parse_arguments')
+@patch('log_analyzer.analyzer.analyze_logs')
+def test_main_approx_rejects_cache(mock_analyze, mock_parse_args, tmp_path):
+    f1 = tmp_path / "approx.log"
+    f1.touch()
+    mock_parse_args.return_value = _cli_args([str(f1)], approx=100, cache=tmp_path / "cache.db")
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 1
+    mock_analyze.assert_not_called()
+
+    parsed_args = parse_arguments([str(f1), "--report", "handlers", "--top", "5", "--sort-by", "ERROR"])
+    assert parsed_args.top == 5 and parsed_args.sort_by == "ERROR"
+
+@patch('log_analyzer.main.parse_arguments')
+def test_main_multiple_reports_single_pass(mock_parse_args, tmp_path, capsys):
+    f1 = tmp_path / "multi.log"
+    f1.write_text(
+        "INFO:django.request:GET /a/ 200 1ms\n"
+        "ERROR:django.request:Internal Server Error: /b/\n"
+        "CRITICAL:app.tasks:boom\n"
+    )
+    mock_parse_args.return_value = _cli_args([str(f1)], report=["handlers", "error_summary", "status_by_logger"])
+
+    main()
+    output = capsys.readouterr().out
+
+    assert output.count("Analyzing for") == 1
+    assert "Total requests: 1" in output
+    assert "Total errors: 2" in output
+    assert "Total records: 3" in output
+
+    mock_parse_args.return_value = _cli_args([str(f1)], report=["error_summary"], cache=tmp_path / "cache.db")
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 1
+
+def test_parse_arguments_time_options(tmp_path):
+    f1 = str(tmp_path / "f1.log")
+    parsed_args = parse_arguments(
+        [f1, "--report", "timeline", "--since", "2024-05-01 14:00", "--until", "2024-05-02", "--bucket", "5m"]
+    )
+    assert parsed_args.since == 1714572000.0
+    assert parsed_args.until == 1714608000.0
+    assert parsed_args.bucket == 300
+
+    for option, value in (("--since", "yesterday"), ("--bucket", "5x"), ("--bucket", "0m")):
+        with pytest.raises(SystemExit):
+            parse_arguments([f1, "--report", "timeline", option, value])
+
+@patch('log_analyzer.main.parse_arguments')
+@patch('log_analyzer.analyzer.analyze_logs')
+def test_main_rejects_invalid_time_options(mock_analyze, mock_parse_args, tmp_path):
+    f1 = tmp_path / "time.log"
+    f1.touch()
+    for overrides in (
+        {"bucket": 60},
+        {"since": 200.0, "until": 100.0},
+        {"since": 100.0, "cache": tmp_path / "cache.db"},
+    ):
+        mock_parse_args.return_value = _cli_args([str(f1)], **overrides)
+        with pytest.raises(SystemExit) as e:
+            main()
+        assert e.value.code == 1
+    mock_analyze.assert_not_called()
+
+@patch('log_analyzer.main.parse_arguments')
+def test_main_format_and_output(mock_parse_args, tmp_path, capsys):
+    f1 = tmp_path / "fmt.log"
+    f1.write_text(
+        "INFO:django.request:GET /a/ 200 1ms\n"
+        "ERROR:django.request:Internal Server Error: /b/\n"
+    )
+    mock_parse_args.return_value = _cli_args([str(f1)], report=["handlers", "error_summary"], format="json")
+    main()
+    output = capsys.readouterr().out
+    document = json.loads(output)
+    assert document["handlers"]["total_requests"] == 1
+    assert document["error_summary"]["total_errors"] == 1
+
+    out_file = tmp_path / "report.ndjson"
+    mock_parse_args.return_value = _cli_args([str(f1)], format="ndjson", output=out_file)
+    main()
+    assert "Analysis complete." in capsys.readouterr().out
+    lines = [json.loads(line) for line in out_file.read_text().splitlines()]
+    assert lines[0] == {"report": "handlers", "total_requests": 1}
+
+    mock_parse_args.return_value = _cli_args([str(f1)], no_progress=True)
+    main()
+    output = capsys.readouterr().out
+    assert "Analyzing for" not in output and output.startswith("Total requests: 1")
+
+    mock_parse_args.return_value = _cli_args([str(f1)], follow=True, format="csv")
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 1
+
+@patch('log_analyzer.main.parse_arguments')
+@patch('log_analyzer.streams.analyze_streams')
+def test_main_stream_sources(mock_streams, mock_parse_args, tmp_path):
+    mock_streams.return_value = {}
+    mock_parse_args.return_value = _cli_args(["-", "tcp://127.0.0.1:5140"], idle_timeout=5.0)
+    main()
+    mock_streams.assert_called_once()
+    assert mock_streams.call_args.args[0] == ["-", "tcp://127.0.0.1:5140"]
+    assert mock_streams.call_args.kwargs["idle_timeout"] == 5.0
+
+    for log_files, overrides in (
+        (["-"], {"cache": tmp_path / "cache.db"}),
+        (["tcp://127.0.0.1"], {}),
+    ):
+        mock_parse_args.return_value = _cli_args(log_files, **overrides)
+        with pytest.raises(SystemExit) as e:
+            main()
+        assert e.value.code == 1
+
+def test_import_main_is_lazy():
+    """Тестирует, что импорт CLI не загружает модули, нужные только отдельным режимам."""
+    import subprocess
+
+    heavy = ["asyncio", "csv", "json", "hashlib", "calendar", "concurrent.futures", "socket",
+             "gzip", "lzma", "log_analyzer.columnar", "log_analyzer.streams", "log_analyzer.cache", "log_analyzer.partial",
+             "log_analyzer.analyzer", "log_analyzer.formats", "log_analyzer.log_parser", "log_analyzer.output",
+             "log_analyzer.reporting", "log_analyzer.signatures", "log_analyzer.sketch", "log_analyzer.compression"]
+    code = f"import sys, log_analyzer.main; print([m for m in {heavy!r} if m in sys.modules])"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=Path(__file__).resolve().parent.parent, check=True)
+    assert result.stdout.strip() == "[]"
+
+def test_lines_engine_does_not_import_mmap(tmp_path):
+    """Тестирует, что mmap загружается только движком 'mmap'."""
+    import subprocess
+
+    log_path = tmp_path / "app.log"
+    log_path.write_text("INFO:django.request:GET /a 200 1ms\n")
+    code = (
+        "import sys; from log_analyzer.main import main; "
+        f"main([{str(log_path)!r}, '--report', 'handlers', '--no-progress']); "
+        "print('mmap' in sys.modules)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=Path(__file__).resolve().parent.parent, check=True)
+    assert result.stdout.strip().endswith("False")
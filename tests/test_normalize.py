@@ -0,0 +1,78 @@
+import pickle
+import pytest
+
+from log_analyzer.analyzer import analyze_logs
+from log_analyzer.normalize import PathNormalizer, build_normalizer, compile_route_template, parse_rule
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("/api/users/1831/orders/99/", "/api/users/{id}/orders/{id}/"),
+        ("/api/users/7/orders/3/", "/api/users/{id}/orders/{id}/"),
+        ("/files/3f2504e0-4f89-11d3-9a0c-0305e82c3301/", "/files/{uuid}/"),
+        ("/blobs/9f86d081884c7d659a2feaa0c55ad015/", "/blobs/{hash}/"),
+        ("/cafe/beef/", "/cafe/beef/"),
+        ("/api/v1/users/", "/api/v1/users/"),
+    ],
+)
+def test_builtin_rules(path, expected):
+    assert PathNormalizer()(path) == expected
+
+def test_route_templates_win_over_rules():
+    """Тестирует, что совпавший шаблон маршрута возвращается как есть."""
+    normalizer = PathNormalizer(templates=["/api/users/<int:user_id>/", "/pages/<slug:name>/"])
+    assert normalizer("/api/users/42/") == "/api/users/<int:user_id>/"
+    assert normalizer("/pages/about-us/") == "/pages/<slug:name>/"
+    assert normalizer("/api/users/abc/") == "/api/users/abc/"
+
+def test_user_rules_applied_before_builtins():
+    normalizer = PathNormalizer(rules=[parse_rule(r"/v[0-9]+/=/")])
+    assert normalizer("/v2/items/15/") == "/items/{id}/"
+
+def test_memo_runs_rules_once_per_distinct_path():
+    normalizer = PathNormalizer()
+    for _ in range(3):
+        normalizer("/api/users/1/")
+    normalizer("/api/users/2/")
+    info = normalizer._memo.cache_info()
+    assert info.misses == 2 and info.hits == 2
+
+def test_normalizer_pickles_without_memo():
+    normalizer = PathNormalizer(templates=["/a/<int:pk>/"])
+    normalizer("/a/1/")
+    restored = pickle.loads(pickle.dumps(normalizer))
+    assert restored("/a/5/") == "/a/<int:pk>/"
+    assert restored.fingerprint() == normalizer.fingerprint()
+
+def test_build_normalizer_from_cli_settings(tmp_path):
+    route_file = tmp_path / "routes.txt"
+    route_file.write_text("# comment\n/api/orders/<uuid:order_id>/\n\n")
+    assert build_normalizer() is None
+    normalizer = build_normalizer(route_file=route_file)
+    assert normalizer.builtin is False
+    assert normalizer.templates == ["/api/orders/<uuid:order_id>/"]
+    with pytest.raises(ValueError):
+        compile_route_template("/x/<float:value>/")
+
+@pytest.mark.parametrize("engine", ["lines", "mmap"])
+def test_analyze_logs_with_normalizer(tmp_path, capsys, engine):
+    """Тестирует нормализацию в анализаторе: последовательно, параллельно и с кэшем."""
+    file_path = tmp_path / "ids.log"
+    file_path.write_text(
+        "INFO:django.request:GET /api/users/1831/orders/99/ 200 1ms\n"
+        "ERROR:django.request:GET /api/users/7/orders/3/?x=1 500 1ms\n"
+    )
+    normalizer = PathNormalizer()
+    expected = {"/api/users/{id}/orders/{id}/": {"INFO": 1, "ERROR": 1}}
+
+    serial = analyze_logs([file_path], "handlers", engine=engine, normalizer=normalizer)
+    parallel = analyze_logs([file_path, file_path], "handlers", workers=2, engine=engine, normalizer=normalizer)
+    cache_path = tmp_path / "cache.sqlite"
+    raw = analyze_logs([file_path], "handlers", engine=engine, cache_path=cache_path)
+    cached = analyze_logs([file_path], "handlers", engine=engine, cache_path=cache_path, normalizer=normalizer)
+
+    assert dict(serial.items()) == expected
+    assert parallel.counts("/api/users/{id}/orders/{id}/") == (0, 2, 0, 2, 0)
+    assert len(raw) == 2
+    assert dict(cached.items()) == expected
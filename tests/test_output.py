@@ -0,0 +1,114 @@
+import csv
+import json
+from io import StringIO
+
+import pytest
+
+from log_analyzer.output import OUTPUT_FORMATS, create_writer, TableWriter
+from log_analyzer.reporting import ErrorSummary, ErrorSummaryReport, HandlersReport
+from log_analyzer.store import HandlerStore
+
+
+@pytest.fixture
+def handler_store() -> HandlerStore:
+    return HandlerStore.from_compact({
+        "/b/": [0, 3, 0, 1, 0],
+        "/a/": [1, 0, 2, 0, 0],
+    })
+
+
+def _render(output_format, *reports):
+    """Выводит пары (имя отчета, функция генерации) в заданном формате и возвращает текст."""
+    stream = StringIO()
+    writer = create_writer(output_format, stream)
+    for name, generate in reports:
+        with writer.report(name):
+            generate(writer)
+    writer.close()
+    return stream.getvalue()
+
+
+def test_table_writer_layout(handler_store):
+    """Тестирует текстовую таблицу: выравнивание ключа, разделители и итоги."""
+    output = _render("table", ("handlers", lambda w: HandlersReport().generate(handler_store, writer=w)))
+    lines = output.splitlines()
+
+    assert lines[0] == "Total requests: 7"
+    assert lines[2] == "HANDLER \t   DEBUG\t    INFO\t WARNING\t   ERROR\tCRITICAL"
+    assert lines[3] == "-" * len(lines[2].expandtabs(8))
+    assert lines[4] == "/a/     \t       1\t       0\t       2\t       0\t       0"
+    assert lines[5].startswith("/b/ ")
+    assert lines[7] == "        \t       1\t       3\t       2\t       1\t       0"
+    assert len(lines) == 8
+
+
+def test_csv_writer(handler_store):
+    """Тестирует CSV: заголовок, строки таблицы без строки итогов."""
+    output = _render("csv", ("handlers", lambda w: HandlersReport().generate(handler_store, writer=w)))
+    rows = list(csv.reader(StringIO(output)))
+
+    assert rows == [
+        ["HANDLER", "DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        ["/a/", "1", "0", "2", "0", "0"],
+        ["/b/", "0", "3", "0", "1", "0"],
+    ]
+
+
+def test_json_writer_multiple_reports(handler_store):
+    """Тестирует JSON: один документ на все отчеты, итоги и строки таблиц."""
+    errors = ErrorSummary(
+        by_logger=HandlerStore.from_compact({"django.request": [0, 0, 0, 2, 0], "app": [0, 0, 0, 0, 1]}),
+        messages=HandlerStore.from_compact({"django.request: boom": [0, 0, 0, 2, 0], "app: fail": [0, 0, 0, 0, 1]}),
+    )
+    output = _render(
+        "json",
+        ("handlers", lambda w: HandlersReport().generate(handler_store, top=1, writer=w)),
+        ("error_summary", lambda w: ErrorSummaryReport().generate(errors, writer=w)),
+    )
+    document = json.loads(output)
+
+    assert document["handlers"]["total_requests"] == 7
+    assert document["handlers"]["handlers"]["rows"] == [
+        {"handler": "/b/", "DEBUG": 0, "INFO": 3, "WARNING": 0, "ERROR": 1, "CRITICAL": 0},
+    ]
+    assert document["handlers"]["handlers"]["totals"]["INFO"] == 3
+    assert document["error_summary"]["total_errors"] == 3
+    assert document["error_summary"]["messages"]["rows"][0] == {"message": "django.request: boom", "count": 2}
+
+
+def test_ndjson_writer(handler_store):
+    """Тестирует NDJSON: по объекту на итоги, каждую строку таблицы и строку итогов."""
+    output = _render("ndjson", ("handlers", lambda w: HandlersReport().generate(handler_store, writer=w)))
+    lines = [json.loads(line) for line in output.splitlines()]
+
+    assert lines[0] == {"report": "handlers", "total_requests": 7}
+    assert lines[1]["table"] == "handlers" and lines[1]["handler"] == "/a/"
+    assert lines[3]["totals"]["ERROR"] == 1
+    assert len(lines) == 4
+
+
+@pytest.mark.parametrize("output_format", OUTPUT_FORMATS)
+def test_empty_report(output_format):
+    """Тестирует отчет без данных: таблица пишет сообщение, JSON остается валидным."""
+    output = _render(output_format, ("handlers", lambda w: HandlersReport().generate(HandlerStore(), writer=w)))
+
+    if output_format == "table":
+        assert "No relevant log data found" in output
+    elif output_format == "json":
+        assert json.loads(output) == {"handlers": {}}
+    else:
+        assert output == ""
+
+
+def test_writer_batches_writes(monkeypatch):
+    """Тестирует, что строки пишутся в поток пачками, а не по одной."""
+    monkeypatch.setattr("log_analyzer.output.WRITE_BATCH_ROWS", 100)
+    stream = StringIO()
+    writes = []
+    stream.write = lambda text: writes.append(text) or len(text)
+    writer = TableWriter(stream)
+    writer.table("t", "KEY", ["N"], ((str(i), (i,)) for i in range(1000)), key_width=3)
+    writer.close()
+
+    assert 0 < len(writes) < 20
+    assert "".join(writes).count("\n") == 1003
@@ -0,0 +1,162 @@
+import gzip
+import json
+
+import pytest
+
+from log_analyzer.analyzer import ScanOptions, analyze_logs
+from log_analyzer.main import main
+from log_analyzer.partial import (
+    PARTIAL_FORMAT_VERSION,
+    PartialReader,
+    describe_sources,
+    partial_options,
+    reduce_partials,
+    write_partial,
+)
+
+REPORTS = ["handlers", "status_by_logger", "error_summary", "timeline", "latency", "error_signatures"]
+
+HOST_LOGS = {
+    "web1": (
+        "[2024-05-01 10:00:05] INFO:django.request:GET /api/v1/users/1/ 200 1ms\n"
+        "[2024-05-01 10:00:30] ERROR:django.request:POST /api/v1/orders/ 500 3ms\n"
+        "[2024-05-01 10:01:10] INFO:django.db.backends:(0.001) SELECT 1\n"
+    ),
+    "web2": (
+        "[2024-05-01 10:00:40] WARNING:django.request:GET /api/v1/users/2/ 404 1ms\n"
+        "[2024-05-01 10:02:00] ERROR:django.request:POST /api/v1/orders/ 500 3ms\n"
+        "[2024-05-01 10:02:30] CRITICAL:django.security:Suspicious operation\n"
+    ),
+    "web3": (
+        '10.0.0.7 - - [01/May/2024:10:01:15 +0000] "GET /api/v1/users/3/ HTTP/1.1" 500 12 "-" "curl/8.0"\n'
+    ),
+}
+
+
+@pytest.fixture
+def host_dirs(tmp_path):
+    """Корпус логов, разложенный по каталогам "хостов"."""
+    log_files = {}
+    for host, content in HOST_LOGS.items():
+        host_dir = tmp_path / host
+        host_dir.mkdir()
+        log_files[host] = host_dir / "app.log"
+        log_files[host].write_text(content)
+    return log_files
+
+
+def _map(log_files, path, options=ScanOptions(progress=False)):
+    data = analyze_logs(
+        log_files, REPORTS, sketch_capacity=options.sketch_capacity, sort_by=options.sort_by, progress=False
+    )
+    write_partial(path, data, partial_options(options), describe_sources(log_files))
+    return path
+
+
+def test_reduce_matches_direct_analysis(tmp_path, host_dirs):
+    """Тестирует, что объединение частичных результатов хостов совпадает с анализом всех логов сразу."""
+    partials = [_map([log_file], tmp_path / f"{host}.partial") for host, log_file in host_dirs.items()]
+    direct = analyze_logs(list(host_dirs.values()), REPORTS, progress=False)
+
+    result = reduce_partials(partials)
+
+    assert result.files == 3
+    assert [source["path"] for source in result.header.sources] == [str(path) for path in host_dirs.values()]
+    assert result.reports["handlers"] == direct["handlers"]
+    assert result.reports["status_by_logger"] == direct["status_by_logger"]
+    assert result.reports["error_summary"] == direct["error_summary"]
+    assert result.reports["timeline"] == direct["timeline"]
+    assert result.reports["error_signatures"] == direct["error_signatures"]
+
+
+def test_tree_merge(tmp_path, host_dirs):
+    """Тестирует слияние деревом: результат reduce снова объединяется с другими частями."""
+    web1, web2, web3 = (_map([log_file], tmp_path / f"{host}.partial") for host, log_file in host_dirs.items())
+    level = reduce_partials([web1, web2])
+    write_partial(tmp_path / "level.partial", level.reports, level.header.options, level.header.sources)
+
+    result = reduce_partials([tmp_path / "level.partial", web3])
+
+    assert result.reports == reduce_partials([web1, web2, web3]).reports
+    assert len(result.header.sources) == 3
+
+
+def test_partial_file_is_streamed_json(tmp_path, host_dirs):
+    """Тестирует формат файла: gzip, заголовок и по строке JSON на отчет, чтение по одному состоянию."""
+    path = _map(list(host_dirs.values()), tmp_path / "all.partial")
+    with gzip.open(path, "rt") as f:
+        header = json.loads(f.readline())
+    assert header["version"] == PARTIAL_FORMAT_VERSION and header["reports"] == REPORTS
+
+    with PartialReader(path) as reader:
+        states = reader.states()
+        name, state = next(states)
+        assert name == "handlers" and state["/api/v1/orders/"] == [0, 0, 0, 2, 0]
+        assert [name for name, _ in states] == REPORTS[1:]
+
+
+def test_reduce_approximate_sketches(tmp_path, host_dirs):
+    """Тестирует объединение сводок Space-Saving с разных хостов."""
+    options = ScanOptions(sketch_capacity=10, progress=False)
+    partials = [_map([log_file], tmp_path / f"{host}.partial", options) for host, log_file in host_dirs.items()]
+
+    sketch = reduce_partials(partials).reports["handlers"]
+
+    assert sketch.capacity == 10 and sketch.total() == 5
+    assert sketch.estimate("/api/v1/orders/") == (2, 0)
+
+
+def test_reduce_rejects_incompatible_and_foreign_files(tmp_path, host_dirs):
+    """Тестирует отказ при другой версии формата, других настройках и чужих файлах."""
+    exact = _map([host_dirs["web1"]], tmp_path / "exact.partial")
+    approx = _map([host_dirs["web2"]], tmp_path / "approx.partial", ScanOptions(sketch_capacity=5, progress=False))
+    with pytest.raises(ValueError, match="different reports or options"):
+        reduce_partials([exact, approx])
+
+    with gzip.open(exact, "rt") as f:
+        lines = f.readlines()
+    header = json.loads(lines[0])
+    header["version"] = PARTIAL_FORMAT_VERSION + 1
+    future = tmp_path / "future.partial"
+    with gzip.open(future, "wt") as f:
+        f.write(json.dumps(header) + "\n" + "".join(lines[1:]))
+    with pytest.raises(ValueError, match="version"):
+        reduce_partials([future])
+
+    truncated = tmp_path / "truncated.partial"
+    with gzip.open(truncated, "wt") as f:
+        f.write("".join(lines[:2]))
+    with pytest.raises(ValueError, match="truncated"):
+        reduce_partials([truncated])
+
+    with pytest.raises(ValueError, match="not a partial result"):
+        reduce_partials([host_dirs["web1"]])
+
+
+def test_map_reduce_commands(tmp_path, host_dirs, capsys):
+    """Тестирует подкоманды map и reduce: вывод совпадает с обычным запуском."""
+    partials = []
+    for host, log_file in host_dirs.items():
+        partial = tmp_path / f"{host}.partial"
+        main(["map", str(log_file), "--report", "handlers,error_summary", "--output", str(partial), "--no-progress"])
+        partials.append(str(partial))
+    assert "Wrote partial result for 'handlers, error_summary'" in capsys.readouterr().out
+
+    main(["reduce", *partials, "--format", "json", "--no-progress"])
+    reduced = capsys.readouterr().out
+    main([*map(str, host_dirs.values()), "--report", "handlers,error_summary", "--format", "json"])
+    assert reduced == capsys.readouterr().out
+
+    main(["reduce", *partials[:2], "--partial-output", str(tmp_path / "level.partial")])
+    assert "Merged 2 partial result(s) covering 2 file(s)" in capsys.readouterr().out
+    main(["reduce", str(tmp_path / "level.partial"), partials[2], "--format", "json", "--no-progress"])
+    assert capsys.readouterr().out == reduced
+
+    main(["reduce", *partials, "--report", "handlers", "--partial-output", str(tmp_path / "handlers.partial")])
+    capsys.readouterr()
+    with pytest.raises(SystemExit):
+        main(["reduce", str(tmp_path / "handlers.partial"), partials[0]])
+    assert "different reports or options" in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        main(["reduce", partials[0], "--report", "timeline"])
+    assert "not in the partial results" in capsys.readouterr().err
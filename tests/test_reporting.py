@@ -4,13 +4,16 @@ import sys
 from collections import defaultdict
 
 from log_analyzer.reporting import (
+    Aggregator,
     HandlersReport,
+    register_report,
     get_report_generator,
     get_available_report_names,
     AVAILABLE_REPORTS,
     BaseReport 
 )
-from log_analyzer.analyzer import HandlerData 
+from log_analyzer.analyzer import HandlerData, analyze_logs
+from log_analyzer.sketch import SpaceSaving
 
 # Фикстура для тестовых данных 
 @pytest.fixture
@@ -47,4 +50,161 @@ def test_get_report_generator():
 
 def test_get_available_report_names():
     names = get_available_report_names()
-    assert isinstance(names, list)
\ No newline at end of file
+    assert isinstance(names, list)
+
+def test_handlers_report_top_k(sample_handler_data, capsys):
+    report = HandlersReport()
+    report.generate(sample_handler_data, top=2, sort_by="total")
+    output = capsys.readouterr().out
+
+    assert "Total requests: 26" in output
+    assert output.index("/api/users") < output.index("/admin")
+    assert "/api/items" not in output
+
+    report.generate(sample_handler_data, top=1, sort_by="ERROR")
+    output = capsys.readouterr().out
+    assert "/admin" in output and "/api/users" not in output
+
+def test_handlers_report_approximate(capsys):
+    sketch = SpaceSaving(2)
+    for handler, level in [("/a", "INFO"), ("/a", "INFO"), ("/b", "ERROR"), ("/c", "DEBUG")]:
+        sketch.add(handler, level)
+
+    HandlersReport().generate(sketch, top=1)
+    output = capsys.readouterr().out
+
+    assert "Total requests: 4" in output
+    assert "Space-Saving, 2 counters" in output
+    assert "ESTIMATE" in output and "/a" in output and "/c" not in output
+
+def test_builtin_reports_registered():
+    assert {"handlers", "error_summary", "status_by_logger"} <= set(get_available_report_names())
+    assert get_report_generator("error_summary").name == "error_summary"
+
+def test_error_summary_and_status_by_logger_reports(tmp_path, capsys):
+    log_path = tmp_path / "reports.log"
+    log_path.write_text(
+        "ERROR:django.request:Internal Server Error: /a/\n"
+        "ERROR:django.request:Internal Server Error: /a/\n"
+        "CRITICAL:app.tasks:Task failed\n"
+        "INFO:app.tasks:Task done\n"
+    )
+    results = analyze_logs([log_path], ["error_summary", "status_by_logger"])
+    capsys.readouterr()
+
+    get_report_generator("error_summary").generate(results["error_summary"])
+    output = capsys.readouterr().out
+    assert "Total errors: 3" in output
+    assert output.index("django.request") < output.index("app.tasks")
+    assert "       2  django.request: Internal Server Error: /a/" in output
+
+    get_report_generator("status_by_logger").generate(results["status_by_logger"])
+    output = capsys.readouterr().out
+    assert "Total records: 4" in output
+    assert results["status_by_logger"].counts("app.tasks") == (0, 1, 0, 0, 1)
+
+def test_register_custom_report_single_pass(tmp_path, capsys):
+    """Тестирует подключение стороннего отчета через реестр и общий проход."""
+
+    class LineCounter(Aggregator):
+        def __init__(self, options):
+            super().__init__(options)
+            self.count = 0
+
+        def update(self, record):
+            self.count += 1
+
+        def merge(self, other):
+            self.count += other.count
+            return self
+
+        def finalize(self):
+            return self.count
+
+    @register_report("record_count")
+    class RecordCountReport(BaseReport):
+        aggregator = LineCounter
+
+        def generate(self, data, top=None, sort_by="total"):
+            print(f"Records: {data}")
+
+    try:
+        log_path = tmp_path / "custom.log"
+        log_path.write_text("INFO:django.request:GET /a/ 200 1ms\nGARBAGE\nDEBUG:x:y\n" * 30)
+        results = analyze_logs([log_path], ["record_count", "handlers"], chunk_size=256)
+        assert results["record_count"] == 60
+        assert results["handlers"].counts("/a/") == (0, 30, 0, 0, 0)
+    finally:
+        AVAILABLE_REPORTS.pop("record_count", None)
+
+def test_timeline_report_buckets(tmp_path, capsys):
+    log_path = tmp_path / "timeline.log"
+    log_path.write_text(
+        "2024-05-01 14:00:10,000 INFO:django.request:GET /a/ 200 1ms\n"
+        "2024-05-01 14:04:59,999 ERROR:django.request:GET /b/ 500 1ms\n"
+        "2024-05-01 14:05:00,000 INFO:django.request:GET /a/ 200 1ms\n"
+        "2024-05-01 14:05:01,000 INFO:app.tasks:Task done\n"
+        "INFO:django.request:GET /untimed/ 200 1ms\n"
+    )
+    timeline = analyze_logs([log_path], "timeline", bucket=300)
+    capsys.readouterr()
+
+    assert timeline.bucket == 300
+    assert sorted(timeline.buckets) == [1714572000, 1714572300]
+    assert list(timeline.buckets[1714572000]) == ["/a/", "/b/"]
+
+    get_report_generator("timeline").generate(timeline, top=1)
+    output = capsys.readouterr().out
+    assert "Total requests: 3 in 2 buckets of 300s" in output
+    assert "2024-05-01 14:05:00  /a/" in output
+    assert "Top 1 handlers per bucket" in output
+
+def test_latency_report_quantiles(tmp_path, capsys, monkeypatch):
+    """Тестирует квантили длительности и размера по хэндлерам и их слияние между процессами."""
+    monkeypatch.setattr("log_analyzer.analyzer.MIN_PARALLEL_BYTES", 0)
+    log_path = tmp_path / "latency.log"
+    log_path.write_text(
+        "".join(f"INFO:django.request:GET /a/?page={i} 200 {i}ms\n" for i in range(1, 101))
+        + "ERROR:django.request:Internal Server Error: /b/\n"
+        + "INFO:app.tasks:Task done in 5ms\n"
+        + '10.0.0.1 - - [01/May/2024:14:00:01 +0000] "GET /c/ HTTP/1.1" 200 2048 "-" "curl/8.0" 1.5\n'
+    )
+    latency = analyze_logs([log_path], "latency", progress=False)
+    parallel = analyze_logs([log_path], "latency", workers=2, chunk_size=512, progress=False)
+
+    assert parallel == latency
+    assert sorted(latency.durations) == ["/a/", "/c/"] and list(latency.sizes) == ["/c/"]
+    p50, p99 = latency.durations["/a/"].quantiles([0.5, 0.99])
+    assert abs(p50 - 50) <= 0.5 and abs(p99 - 99) <= 1
+    assert latency.durations["/c/"].max == 1500.0
+
+    get_report_generator("latency").generate(latency, top=1)
+    output = capsys.readouterr().out
+    assert "Timed requests: 101, responses with size: 1" in output
+    assert "P99_MS" in output and "/c/" not in output.split("Response sizes per handler:")[0]
+    assert "MEAN_B" in output
+
+def test_error_signatures_report(tmp_path, capsys, monkeypatch):
+    """Тестирует кластеры ошибок по шаблонам и их слияние между процессами."""
+    monkeypatch.setattr("log_analyzer.analyzer.MIN_PARALLEL_BYTES", 0)
+    log_path = tmp_path / "errors.log"
+    log_path.write_text(
+        "".join(f"[2024-05-01 10:00:{i:02d}] ERROR:app.orders:Order {i * 7} not found for 'user{i}'\n" for i in range(40))
+        + "[2024-05-01 10:01:00] INFO:app.orders:Order 5 created\n"
+        + "[2024-05-01 10:02:00] CRITICAL:app.db:Connection to 10.0.0.5:5432 lost\n"
+        + "CRITICAL:app.db:Connection to 10.0.0.6:5432 lost\n"
+    )
+    signatures = analyze_logs([log_path], "error_signatures", progress=False)
+    parallel = analyze_logs([log_path], "error_signatures", workers=2, chunk_size=512, progress=False)
+
+    assert parallel == signatures
+    rows = {details[2]: (count, details) for _, count, _, details in signatures.rows()}
+    assert sorted(rows) == ["app.db: Connection to <ip> lost", "app.orders: Order <num> not found for <str>"]
+    assert rows["app.db: Connection to <ip> lost"][0] == 2
+
+    get_report_generator("error_signatures").generate(signatures, top=1)
+    output = capsys.readouterr().out
+    assert "Total errors: 42 in 2 signatures" in output
+    assert "2024-05-01 10:00:00  2024-05-01 10:00:39" in output and "app.db" not in output
+    assert "Sample records (rebuilt from parsed fields" in output
+    assert "[2024-05-01 10:00:00] ERROR:app.orders:Order 0 not found for 'user0'" in output
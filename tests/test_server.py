@@ -0,0 +1,112 @@
+import os
+import stat
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from log_analyzer import client
+from log_analyzer.client import default_socket_path, encode_request, run_remote, trusted_directory
+from log_analyzer.server import decode_request
+
+ROOT = Path(__file__).resolve().parent.parent
+LOG_LINES = (
+    "INFO:django.request:GET /api/v1/users/ 200 1ms\n"
+    "ERROR:django.request:GET /api/v1/users/ 500 1ms\n"
+)
+
+def test_request_roundtrip():
+    """Тестирует кодирование и разбор запроса, включая не-UTF-8 аргументы."""
+    argv = ["app.log", "--report", "handlers", "caf\udce9.log"]
+    data = encode_request("/var/log", argv)
+
+    assert int.from_bytes(data[:4], "big") == len(data) - 4
+    assert decode_request(data[4:]) == ("/var/log", argv)
+
+def test_run_remote_without_server(tmp_path):
+    """Тестирует, что без сервера run_remote возвращает None."""
+    assert run_remote(["--help"], str(tmp_path / "missing.sock")) is None
+
+def test_default_socket_path_uses_private_directory(monkeypatch, tmp_path):
+    """Тестирует, что без $XDG_RUNTIME_DIR сокет лежит в личном каталоге, а не прямо в /tmp."""
+    monkeypatch.delenv("LOG_ANALYZER_SOCKET", raising=False)
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.setenv("TMPDIR", str(tmp_path))
+
+    path = Path(default_socket_path())
+    assert path.parent == tmp_path / f"log_analyzer-{os.getuid()}"
+
+def test_trusted_directory(monkeypatch, tmp_path):
+    """Тестирует, что каталог другого пользователя не считается доверенным."""
+    assert trusted_directory(str(tmp_path))
+    monkeypatch.setattr(client.os, "getuid", lambda: tmp_path.stat().st_uid + 1)
+    assert not trusted_directory(str(tmp_path))
+
+@pytest.fixture
+def server(tmp_path):
+    """Запускает сервер на временном сокете и останавливает его после теста."""
+    socket_path = tmp_path / "server.sock"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "log_analyzer.main", "serve", "--socket", str(socket_path)],
+        cwd=ROOT, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        assert process.stdout.readline().startswith(f"Serving on {socket_path}")
+        yield socket_path
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        process.stdout.close()
+    assert not socket_path.exists()
+
+def _run_client(socket_path, cwd, *args):
+    return subprocess.run(
+        [sys.executable, "-m", "log_analyzer.client", "--socket", str(socket_path), *args],
+        cwd=cwd, capture_output=True, text=True, env={"PYTHONPATH": str(ROOT)},
+    )
+
+def test_client_runs_command_on_server(server, tmp_path):
+    """Тестирует выполнение команды на сервере: рабочий каталог, вывод и коды выхода клиента."""
+    (tmp_path / "app.log").write_text(LOG_LINES)
+
+    result = _run_client(server, tmp_path, "app.log", "--report", "handlers", "--no-progress")
+    assert result.returncode == 0
+    assert "/api/v1/users/" in result.stdout
+    assert "Total requests: 2" in result.stdout
+
+    result = _run_client(server, tmp_path, "missing.log", "--report", "handlers")
+    assert result.returncode == 1
+    assert "missing.log" in result.stderr
+
+def test_client_refuses_server_of_another_user(server, monkeypatch, capsys):
+    """Тестирует, что клиент не отправляет запрос серверу другого пользователя."""
+    monkeypatch.setattr(client.os, "getuid", lambda: os.stat(server).st_uid + 1)
+
+    assert run_remote(["--help"], str(server)) == 1
+    assert "belongs to another user" in capsys.readouterr().err
+
+def test_server_creates_private_socket_directory(tmp_path):
+    """Тестирует, что сервер создает недостающий каталог сокета с правами 0700."""
+    socket_path = tmp_path / "private" / "server.sock"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "log_analyzer.main", "serve", "--socket", str(socket_path)],
+        cwd=ROOT, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        assert process.stdout.readline().startswith(f"Serving on {socket_path}")
+        assert stat.S_IMODE(socket_path.parent.stat().st_mode) == 0o700
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        process.stdout.close()
+
+def test_second_server_refuses_busy_socket(server):
+    """Тестирует, что второй сервер не занимает сокет работающего."""
+    result = subprocess.run(
+        [sys.executable, "-m", "log_analyzer.main", "serve", "--socket", str(server)],
+        cwd=ROOT, capture_output=True, text=True, timeout=30,
+    )
+    assert result.returncode == 1
+    assert "Could not start server" in result.stderr
+    assert server.exists()
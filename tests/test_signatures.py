@@ -0,0 +1,75 @@
+import json
+
+from log_analyzer.signatures import (
+    MAX_TEMPLATE_INPUT,
+    SignatureSummary,
+    _cached_signature,
+    message_signature,
+    template_message,
+)
+
+
+def test_template_masks_variable_parts():
+    """Тестирует маскирование чисел, ID, адресов и строк в кавычках."""
+    assert template_message("Order 1234 not found for user 'alice'") == "Order <num> not found for user <str>"
+    assert template_message('Key "a b" missing') == "Key <str> missing"
+    assert template_message("Connection to 10.0.0.5:5432 lost after 3.5s") == "Connection to <ip> lost after <num>s"
+    assert (
+        template_message("Task 3fa85f64-5717-4562-b3fc-2c963f66afa6 failed at 0xdeadbeef, hash 9f86d081884c7d65")
+        == "Task <uuid> failed at <hex>, hash <hex>"
+    )
+    assert template_message("Cache is cold") == "Cache is cold"
+
+
+def test_message_signature_groups_by_logger_and_template():
+    """Тестирует, что сигнатура зависит от шаблона и логгера, но не от замаскированных значений."""
+    signature, template = message_signature("app.orders", "Order 1 failed")
+    assert template == "app.orders: Order <num> failed" and len(signature) == 16
+    assert message_signature("app.orders", "Order 987 failed")[0] == signature
+    assert message_signature("app.billing", "Order 1 failed")[0] != signature
+    assert message_signature("app.orders", "Order 1 cancelled")[0] != signature
+
+def test_message_signature_memoizes_truncated_message():
+    """Тестирует, что кэш сигнатур хранит сообщения, обрезанные до MAX_TEMPLATE_INPUT."""
+    head = "Payload rejected: " + "x" * MAX_TEMPLATE_INPUT
+    first = message_signature("app.api", head + "a" * 100000)
+    hits = _cached_signature.cache_info().hits
+    assert message_signature("app.api", head + "b" * 100000) == first
+    assert _cached_signature.cache_info().hits == hits + 1
+
+
+def _add(summary, logger, message, level="ERROR", moment=None):
+    signature, template = message_signature(logger, message)
+    summary.add(signature, template, level, moment, f"{level}:{logger}:{message}")
+    return signature
+
+
+def test_summary_merge_and_compact_roundtrip():
+    """Тестирует первое/последнее появление, пример строки, слияние частей и JSON-состояние."""
+    first, second = SignatureSummary(10), SignatureSummary(10)
+    orders = _add(first, "app", "Order 1 failed", moment=100.0)
+    _add(first, "app", "Order 2 failed", "CRITICAL", moment=50.0)
+    _add(second, "app", "Order 3 failed", moment=300.0)
+    db = _add(second, "db", "Timeout after 5s")
+
+    merged = first.merge(second)
+    rows = {signature: (count, list(levels), list(details)) for signature, count, levels, details in merged.rows()}
+
+    assert merged.total() == 4 and not merged.approximate()
+    assert rows[orders] == (3, [0, 0, 0, 2, 1], [50.0, 300.0, "app: Order <num> failed", "ERROR:app:Order 1 failed"])
+    assert rows[db][2][:2] == [None, None]
+    restored = SignatureSummary.from_compact(json.loads(json.dumps(merged.to_compact())))
+    assert restored == merged
+
+
+def test_summary_memory_is_bounded():
+    """Тестирует, что сводка хранит не больше capacity сигнатур и остается точной для частых."""
+    summary = SignatureSummary(8)
+    for i in range(1000):
+        _add(summary, "app", "Frequent failure 1")
+        _add(summary, f"logger{i}", "Rare failure")
+
+    assert len(summary) == 8 and len(summary._details) <= 16
+    assert summary.approximate() and summary.total() == 2000
+    signature, count, levels, details = max(summary.rows(), key=lambda row: row[1])
+    assert count >= 1000 and details[2] == "app: Frequent failure <num>"
@@ -0,0 +1,121 @@
+import json
+import pickle
+import random
+from collections import Counter
+
+import pytest
+
+from log_analyzer.sketch import DDSketch, SpaceSaving
+
+
+def _zipf_stream(count, keys, seed=0):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(keys)]
+    return rng.choices([f"/h{rank}" for rank in range(keys)], weights=weights, k=count)
+
+
+def test_space_saving_exact_when_capacity_suffices():
+    """Тестирует, что при достаточной емкости оценки совпадают с точными значениями."""
+    sketch = SpaceSaving(10)
+    for handler, level in [("/a", "INFO"), ("/a", "ERROR"), ("/b", "INFO"), ("/a", "INFO")]:
+        sketch.add(handler, level)
+
+    assert sketch.estimate("/a") == (3, 0)
+    assert sketch.top(1) == [("/a", 3, 0, [0, 2, 0, 1, 0])]
+    assert sketch.level_totals() == [0, 3, 0, 1, 0]
+    assert sketch.total() == 4
+
+def test_space_saving_error_bounds():
+    """Тестирует гарантии: оценка не меньше истины, count - error не больше, error <= N/capacity."""
+    stream = _zipf_stream(20000, 2000)
+    exact = Counter(stream)
+    sketch = SpaceSaving(50)
+    for handler in stream:
+        sketch.add(handler, "INFO")
+
+    assert len(sketch) == 50
+    for handler in sketch:
+        estimate, error = sketch.estimate(handler)
+        assert estimate - error <= exact[handler] <= estimate
+        assert error <= sketch.error_bound()
+    for handler, count in exact.items():
+        if count > sketch.error_bound():
+            assert handler in sketch
+    assert [row[0] for row in sketch.top(3)] == ["/h0", "/h1", "/h2"]
+
+def test_space_saving_merge_keeps_bounds():
+    """Тестирует объединение сводок, построенных по частям потока."""
+    stream = _zipf_stream(30000, 3000, seed=1)
+    exact = Counter(stream)
+    parts = [SpaceSaving(40) for _ in range(3)]
+    for i, handler in enumerate(stream):
+        parts[i % 3].add(handler, "WARNING")
+
+    merged = SpaceSaving(40)
+    for part in parts:
+        merged.merge(pickle.loads(pickle.dumps(part)))
+
+    assert merged.total_weight == len(stream)
+    assert merged.level_totals()[2] == len(stream)
+    for handler in merged:
+        estimate, error = merged.estimate(handler)
+        assert estimate - error <= exact[handler] <= estimate
+    for handler, count in exact.items():
+        if count > merged.error_bound():
+            assert handler in merged
+
+def test_space_saving_weighted_by_level():
+    """Тестирует ранжирование по уровню: записи других уровней не вытесняют хэндлеры."""
+    sketch = SpaceSaving(2, sort_by="ERROR")
+    sketch.add("/errors", "ERROR", 5)
+    sketch.add("/noisy", "INFO", 1000)
+    sketch.add("/rare", "ERROR")
+
+    assert sketch.top(2)[0][:3] == ("/errors", 5, 0)
+    assert "/noisy" not in sketch
+    assert sketch.total() == 1006
+    with pytest.raises(ValueError):
+        sketch.merge(SpaceSaving(2))
+
+def test_space_saving_compact_roundtrip():
+    """Тестирует восстановление сводки из JSON-совместимого состояния."""
+    sketch = SpaceSaving(2)
+    for handler in ["/a", "/a", "/b", "/c", "/a"]:
+        sketch.add(handler, "INFO")
+    restored = SpaceSaving.from_compact(json.loads(json.dumps(sketch.to_compact())))
+
+    assert restored.top(2) == sketch.top(2)
+    assert restored.level_totals() == sketch.level_totals() and restored.error_bound() == sketch.error_bound()
+    restored.add("/d", "ERROR")
+    assert restored.total() == 6
+    with pytest.raises(ValueError):
+        SpaceSaving.from_compact({**sketch.to_compact(), "level_totals": [0]})
+
+def test_ddsketch_relative_error_and_merge():
+    """Тестирует относительную ошибку квантилей DDSketch, слияние и ограничение числа корзин."""
+    rng = random.Random(7)
+    values = [rng.lognormvariate(3, 1.5) for _ in range(20000)] + [0.0] * 100
+    whole, first, second = DDSketch(), DDSketch(), DDSketch()
+    for i, value in enumerate(values):
+        whole.add(value)
+        (first if i % 2 else second).add(value)
+    merged = first.merge(second)
+    exact = sorted(values)
+
+    assert merged == whole and merged.count == len(values)
+    for q, estimate in zip((0.0, 0.5, 0.95, 0.99, 1.0), merged.quantiles([0.0, 0.5, 0.95, 0.99, 1.0])):
+        expected = exact[int(q * (len(exact) - 1))]
+        assert abs(estimate - expected) <= 0.01 * expected
+    assert DDSketch.from_compact(json.loads(json.dumps(merged.to_compact()))) == merged
+    assert pickle.loads(pickle.dumps(merged)) == merged
+
+    bounded = DDSketch(max_buckets=8)
+    for value in values:
+        bounded.add(value)
+    assert len(bounded.to_compact()["bins"]) == 8
+    # Младшие корзины слиты вверх: нижние квантили завышаются, максимум точный
+    assert bounded.quantile(0.5) >= merged.quantile(0.5)
+    assert abs(bounded.quantile(1.0) - max(values)) <= 0.01 * max(values)
+    assert DDSketch().quantile(0.5) is None
+    with pytest.raises(ValueError):
+        merged.merge(DDSketch(relative_accuracy=0.05))
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from log_analyzer.analyzer import ScanOptions
+from log_analyzer.reporting import HandlersAggregator
+from log_analyzer.sources import SourceSpec, is_stream_source, parse_source
+from log_analyzer.streams import StreamIngest, _split_block
+
+LINE = b"INFO:django.request:GET /a/ 200 1ms\n"
+
+
+def test_parse_source():
+    """Тестирует разбор аргументов-источников."""
+    assert parse_source("-") == SourceSpec("stdin")
+    assert parse_source("tcp://0.0.0.0:5140") == SourceSpec("tcp", "0.0.0.0", 5140)
+    assert parse_source("tcp://:5140") == SourceSpec("tcp", "127.0.0.1", 5140)
+    assert parse_source("unix:///run/logs.sock") == SourceSpec("unix", "/run/logs.sock")
+    assert parse_source("app.log") == SourceSpec("file", "app.log")
+    for value in ("tcp://localhost", "tcp://localhost:http", "tcp://host:70000", "unix://"):
+        with pytest.raises(ValueError):
+            parse_source(value)
+
+    assert is_stream_source("-") and is_stream_source("tcp://h:1") and not is_stream_source("app.log")
+
+
+def test_parse_source_fifo(tmp_path):
+    """Тестирует распознавание именованного канала."""
+    fifo = tmp_path / "pipe"
+    os.mkfifo(fifo)
+    assert is_stream_source(str(fifo))
+    assert parse_source(str(fifo)) == SourceSpec("fifo", str(fifo))
+
+
+def test_split_block():
+    """Тестирует деление блока на завершенные строки и хвост."""
+    assert _split_block(b"a\r\nb\rc\npart", "src") == (["a", "b", "c"], b"part")
+    assert _split_block(b"no newline", "src") == ([], b"no newline")
+    assert _split_block("é\n".encode() + b"\xff\n", "src") == (["é", ""], b"")
+
+
+def _run_ingest(sources, scenario, **kwargs):
+    """Запускает прием, выполняет scenario(ingest) и возвращает счетчики хэндлеров."""
+    aggregator = HandlersAggregator(ScanOptions())
+
+    async def main():
+        ingest = StreamIngest(sources, [aggregator.update], **kwargs)
+        await ingest.start()
+        waiting = asyncio.ensure_future(ingest.wait())
+        await scenario(ingest, aggregator)
+        await waiting
+
+    asyncio.run(main())
+    return aggregator.counts
+
+
+async def _wait_for(condition, timeout=5.0):
+    """Ждет выполнения условия, уступая циклу событий."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "condition was not met in time"
+        await asyncio.sleep(0.01)
+
+
+def test_tcp_slow_sender_does_not_stall_others():
+    """Тестирует, что открытое медленное подключение не задерживает разбор остальных."""
+
+    async def scenario(ingest, aggregator):
+        host, port = ingest.addresses[0][:2]
+        _, slow = await asyncio.open_connection(host, port)
+        slow.write(b"ERROR:django.request:GET /slow/ 500 1ms\nINFO:django.request:GET /sl")
+        await slow.drain()
+        _, fast = await asyncio.open_connection(host, port)
+        fast.write(LINE * 1000)
+        await fast.drain()
+        fast.close()
+        await _wait_for(lambda: aggregator.counts.total() == 1001)
+        ingest.stop()
+        slow.close()
+
+    counts = _run_ingest(["tcp://127.0.0.1:0"], scenario, max_queued_batches=1)
+    assert counts.counts("/a/") == (0, 1000, 0, 0, 0)
+    assert counts.counts("/slow/") == (0, 0, 0, 1, 0)
+
+
+def test_unix_socket_idle_timeout(tmp_path):
+    """Тестирует прием через Unix-сокет и остановку по idle_timeout."""
+    socket_path = tmp_path / "logs.sock"
+
+    async def scenario(ingest, aggregator):
+        for _ in range(3):
+            _, writer = await asyncio.open_unix_connection(str(socket_path))
+            writer.write(LINE * 10)
+            await writer.drain()
+            writer.close()
+
+    counts = _run_ingest([f"unix://{socket_path}"], scenario, idle_timeout=0.3)
+    assert counts.total() == 30
+    assert not socket_path.exists()
+
+
+def test_fifo_and_file_sources(tmp_path):
+    """Тестирует чтение FIFO и обычного файла до конца потока и последнюю строку без '\\n'."""
+    fifo = tmp_path / "pipe"
+    os.mkfifo(fifo)
+    log_file = tmp_path / "app.log"
+    log_file.write_bytes(LINE * 5 + b"WARNING:django.request:GET /b/ 404 1ms")
+
+    def write_fifo():
+        with open(fifo, "wb") as f:
+            for _ in range(100):
+                f.write(LINE)
+
+    writer = threading.Thread(target=write_fifo)
+    writer.start()
+
+    async def scenario(ingest, aggregator):
+        pass
+
+    counts = _run_ingest([str(fifo), str(log_file)], scenario)
+    writer.join()
+    assert counts.counts("/a/") == (0, 105, 0, 0, 0)
+    assert counts.counts("/b/") == (0, 0, 1, 0, 0)
+
+
+def test_main_reads_stdin(tmp_path):
+    """Тестирует анализ данных из stdin через '-'."""
+    result = subprocess.run(
+        [sys.executable, "-m", "log_analyzer.main", "-", "--report", "handlers", "--format", "csv"],
+        input=LINE * 3 + b"ERROR:django.request:GET /b/ 500 1ms\n",
+        capture_output=True,
+        timeout=30,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.decode().splitlines()[1:] == ["/a/,0,3,0,0,0", "/b/,0,0,0,1,0"]
@@ -0,0 +1,75 @@
+import json
+import pickle
+from unittest.mock import patch
+
+import pytest
+
+from log_analyzer.analyzer import analyze_logs
+from log_analyzer.log_parser import classify_log_line
+from log_analyzer.main import main, parse_arguments
+from log_analyzer.stats import RunStats, ScanStats
+
+LOG_CONTENT = (
+    "INFO:django.request:GET /a/ 200 1ms\n"
+    "INFO:django.db.backends:(0.001) SELECT 1\n"
+    "Traceback (most recent call last):\n"
+    "ERROR:django.request:Internal Server Error\n"
+    "WARNING:django.request:GET /b/?x=1 404 1ms\n"
+)
+
+
+def test_classify_log_line_reasons():
+    """Тестирует причины отказа, совпадающие с логикой parse_log_line."""
+    assert classify_log_line("INFO:django.request:GET /a/?q=1 200 1ms") == ("INFO", "/a/")
+    assert classify_log_line("garbage") == "no_level_prefix"
+    assert classify_log_line("TRACE:django.request:GET /a/ 200 1ms") == "no_level_prefix"
+    assert classify_log_line("INFO:django.server:GET /a/ 200 1ms") == "other_logger"
+    assert classify_log_line("ERROR:django.request:Internal Server Error") == "no_path"
+
+def test_scan_stats_merge_and_pickle():
+    first = ScanStats()
+    first.lines_seen, first.lines_matched, first.bytes_read = 10, 4, 100
+    first.rejected["other_logger"] = 6
+    second = pickle.loads(pickle.dumps(first))
+
+    merged = ScanStats().merge(first).merge(second)
+    summary = merged.to_dict()
+    assert summary["lines_seen"] == 20 and summary["bytes_read"] == 200
+    assert summary["lines_rejected"] == {"other_logger": 12}
+
+@pytest.mark.parametrize("engine,workers", [("lines", 1), ("lines", 2), ("mmap", 1)])
+def test_analyze_logs_collects_stats(tmp_path, capsys, engine, workers):
+    """Тестирует счетчики строк и байт по файлам для разных режимов."""
+    log_path = tmp_path / "stats.log"
+    log_path.write_text(LOG_CONTENT * 20)
+    stats = RunStats()
+
+    analyze_logs([log_path, log_path], "handlers", workers=workers, chunk_size=512, engine=engine, stats=stats)
+    summary = stats.to_dict()
+
+    file_summary = summary["files"][str(log_path)]
+    assert file_summary["lines_seen"] == 200
+    assert file_summary["lines_matched"] == 80
+    assert file_summary["bytes_read"] == 2 * log_path.stat().st_size
+    assert sum(file_summary["lines_rejected"].values()) == 120
+    if engine == "lines":
+        assert file_summary["lines_rejected"] == {"no_level_prefix": 40, "other_logger": 40, "no_path": 40}
+    assert {"scan", "merge"} <= set(summary["stages"])
+
+@patch('log_analyzer.main.parse_arguments')
+def test_main_writes_stats_and_profile(mock_parse_args, tmp_path, capsys):
+    log_path = tmp_path / "main_stats.log"
+    log_path.write_text(LOG_CONTENT)
+    stats_path = tmp_path / "stats.json"
+    profile_path = tmp_path / "run.prof"
+    mock_parse_args.return_value = parse_arguments([
+        str(log_path), "--report", "handlers", "--workers", "1",
+        "--stats", str(stats_path), "--profile", str(profile_path),
+    ])
+
+    main()
+
+    summary = json.loads(stats_path.read_text(encoding="utf-8"))
+    assert summary["totals"]["lines_matched"] == 2
+    assert "report" in summary["stages"]
+    assert profile_path.stat().st_size > 0
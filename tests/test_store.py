@@ -0,0 +1,58 @@
+import pickle
+import pytest
+from collections import defaultdict
+
+from log_analyzer.store import HandlerStore
+
+
+def test_handler_store_add_and_read():
+    """Тестирует накопление счетчиков и чтение в прежнем формате."""
+    store = HandlerStore()
+    store.add("/a", "INFO")
+    store.add("/a", "INFO")
+    store.add("/a", "ERROR", 3)
+    store.add("/b", "DEBUG")
+
+    assert len(store) == 2
+    assert "/a" in store and "/c" not in store
+    assert store.counts("/a") == (0, 2, 0, 3, 0)
+    assert dict(store["/a"]) == {"INFO": 2, "ERROR": 3}
+    assert store["/a"]["WARNING"] == 0
+    assert store.level_totals() == [1, 2, 0, 3, 0]
+    assert store.total() == 6
+
+def test_handler_store_merge():
+    """Тестирует слияние: новые хэндлеры копируются, существующие складываются."""
+    first = HandlerStore.from_compact({"/a": [1, 0, 0, 0, 0], "/b": [0, 1, 0, 0, 0]})
+    second = HandlerStore.from_compact({"/b": [0, 2, 0, 0, 1], "/c": [0, 0, 5, 0, 0]})
+
+    merged = HandlerStore().merge(first).merge(second)
+
+    assert merged.to_compact() == {
+        "/a": [1, 0, 0, 0, 0],
+        "/b": [0, 3, 0, 0, 1],
+        "/c": [0, 0, 5, 0, 0],
+    }
+    assert first.to_compact() == {"/a": [1, 0, 0, 0, 0], "/b": [0, 1, 0, 0, 0]}
+
+def test_handler_store_from_mapping_and_pickle():
+    """Тестирует преобразование из вложенных словарей и сериализацию pickle."""
+    nested = defaultdict(lambda: defaultdict(int))
+    nested["/a"]["WARNING"] = 4
+    store = HandlerStore.from_mapping(nested)
+
+    restored = pickle.loads(pickle.dumps(store))
+    assert restored == store
+    assert HandlerStore.from_mapping(store) is store
+    assert dict(restored.items()) == {"/a": {"WARNING": 4}}
+
+def test_handler_store_sorted_rows():
+    """Тестирует вывод строк по алфавиту хэндлеров без изменения порядка хранения."""
+    store = HandlerStore.from_compact({"/c": [1, 0, 0, 0, 0], "/a": [0, 2, 0, 0, 0], "/b": [0, 0, 3, 0, 0]})
+
+    assert [(handler, list(row)) for handler, row in store.sorted_rows()] == [
+        ("/a", [0, 2, 0, 0, 0]),
+        ("/b", [0, 0, 3, 0, 0]),
+        ("/c", [1, 0, 0, 0, 0]),
+    ]
+    assert store.keys() == ["/c", "/a", "/b"]
@@ -0,0 +1,78 @@
+import pytest
+
+from log_analyzer.analyzer import analyze_logs
+from log_analyzer.bench import DEFAULT_PROFILE, SYNTHETIC_START_TIME, write_synthetic_log
+from log_analyzer.log_parser import parse_log_record, parse_timestamp
+from log_analyzer.stats import RunStats
+from log_analyzer.store import HandlerStore
+from log_analyzer.timeindex import build_time_index, time_range_offsets
+
+PROFILE = DEFAULT_PROFILE._replace(line_interval=1.0, malformed_ratio=0.05)
+
+
+@pytest.fixture
+def timed_log(tmp_path):
+    return write_synthetic_log(tmp_path / "timed.log", count=5000, profile=PROFILE)
+
+
+def _expected_handlers(log_path, since, until):
+    """Эталон: полный проход с отбором записей по времени вручную."""
+    expected = HandlerStore()
+    with log_path.open() as f:
+        for line in f:
+            record = parse_log_record(line)
+            if record is None or record.logger != "django.request" or record.timestamp is None:
+                continue
+            if since <= parse_timestamp(record.timestamp) < until:
+                expected.add(record.message.split()[1], record.level)
+    return expected
+
+
+def test_build_time_index_is_sorted_and_line_aligned(timed_log):
+    entries = build_time_index(timed_log, step=4096)
+    content = timed_log.read_bytes()
+
+    assert len(entries) > 10
+    assert [entry.timestamp for entry in entries] == sorted(entry.timestamp for entry in entries)
+    for entry in entries:
+        assert entry.offset == 0 or content[entry.offset - 1:entry.offset] == b"\n"
+
+
+def test_time_range_offsets_narrow_the_scan(timed_log):
+    """Тестирует, что участок из индекса покрывает интервал и короче файла."""
+    since, until = SYNTHETIC_START_TIME + 2000, SYNTHETIC_START_TIME + 2500
+    start, end = time_range_offsets(timed_log, since, until, step=4096)
+    size = timed_log.stat().st_size
+
+    assert 0 < start < end < size
+    assert end - start < size / 4
+    assert (0, size) == time_range_offsets(timed_log, None, None, step=4096)
+
+
+@pytest.mark.parametrize("workers,chunk_size", [(1, 1 << 20), (2, 16 * 1024)])
+def test_analyze_logs_time_window(timed_log, capsys, workers, chunk_size):
+    """Тестирует совпадение отбора по времени с полным проходом и сокращение прочитанных байт."""
+    since, until = SYNTHETIC_START_TIME + 1000.5, SYNTHETIC_START_TIME + 1600
+    stats = RunStats()
+
+    result = analyze_logs(
+        [timed_log], "handlers", workers=workers, chunk_size=chunk_size, since=since, until=until, stats=stats
+    )
+
+    assert result == _expected_handlers(timed_log, since, until)
+    totals = stats.totals()
+    assert totals.bytes_read < timed_log.stat().st_size
+    assert totals.rejected["out_of_range"] > 0
+
+
+def test_time_window_skips_records_without_timestamp(tmp_path, capsys):
+    log_path = tmp_path / "mixed.log"
+    log_path.write_text(
+        "INFO:django.request:GET /old/ 200 1ms\n"
+        "2024-05-01 14:00:00,000 INFO:django.request:GET /new/ 200 1ms\n"
+    )
+    stats = RunStats()
+    result = analyze_logs([log_path], ["handlers"], since=parse_timestamp("2024-05-01 00:00:00"), stats=stats)
+
+    assert list(result["handlers"]) == ["/new/"]
+    assert stats.totals().rejected["no_timestamp"] == 1